@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Agent 主循环基准测试
+Benchmark for mini_agent.Agent.run
+用本地模拟 LLM 服务（Anthropic / OpenAI 两种协议）回放脚本化的工具调用对话，
+把框架自身的开销与模型延迟分开统计：每步开销、日志开销、内存增长。
+
+场景:
+    steps          - 步数（5 / 20 / 50）
+    history        - 工具结果大小，即历史长度（1KB / 10KB / 50KB，20 步）
+    fanout         - 每步并行发起的工具调用数（1 / 4 / 16）
+    summarization  - 小 token_limit + 大工具结果，触发历史总结
+
+用法:
+    python benchmarks/bench_agent_loop.py --output bench-before.json
+    # 修改代码后
+    python benchmarks/bench_agent_loop.py --output bench-after.json --compare bench-before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_llm_server import MockLLMServer, MockReply, has_tools, request_text  # noqa: E402
+
+from mini_agent.agent import Agent  # noqa: E402
+from mini_agent.llm import LLMClient  # noqa: E402
+from mini_agent.retry import RetryConfig  # noqa: E402
+from mini_agent.schema import LLMProvider  # noqa: E402
+from mini_agent.tools.base import Tool, ToolResult  # noqa: E402
+
+STEP_MARKER = re.compile(r"\[step (\d+)\]")
+FINAL_ANSWER = "报告已完成。"
+
+# 对比时关注的指标（越小越好）
+COMPARE_METRICS = (
+    "overhead_ms_per_step",
+    "overhead_ms_last_step",
+    "logging_ms_per_step",
+    "client_ms_per_request",
+    "memory_peak_kb",
+    "memory_retained_kb",
+)
+
+
+class EchoTool(Tool):
+    """返回固定大小的结果，模拟数据查询工具"""
+
+    def __init__(self, payload_bytes: int):
+        self.payload = "x" * payload_bytes
+
+    @property
+    def name(self) -> str:
+        return "echo"
+
+    @property
+    def description(self) -> str:
+        return "Return a payload tagged with the step number."
+
+    @property
+    def parameters(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {"step": {"type": "integer"}, "call": {"type": "integer"}},
+            "required": ["step"],
+        }
+
+    async def execute(self, step: int, call: int = 0) -> ToolResult:
+        return ToolResult(success=True, content=f"[step {step}] {self.payload}")
+
+
+def make_script(steps: int, fanout: int):
+    """生成无状态的回放脚本：根据请求中已出现的最大步号决定下一步
+
+    - 带工具的请求：第 N 步发起 fanout 个 echo 调用，超过 steps 后给出最终回答
+    - 不带工具的请求（历史总结）：返回保留步号的总结文本，保证总结后进度可以继续
+    """
+
+    def script(request: dict, protocol: str) -> MockReply:
+        done = max((int(n) for n in STEP_MARKER.findall(request_text(request))), default=0)
+        if not has_tools(request):
+            return MockReply(text=f"Executed echo up to [step {done}].")
+        step = done + 1
+        if step > steps:
+            return MockReply(text=FINAL_ANSWER)
+        return MockReply(
+            text=f"Step {step}",
+            tool_calls=[("echo", {"step": step, "call": call}) for call in range(fanout)],
+        )
+
+    return script
+
+
+def build_scenarios(quick: bool = False) -> list:
+    """场景列表：name, steps, fanout, payload_bytes, token_limit"""
+    scenarios = []
+    for steps in (5, 20) if quick else (5, 20, 50):
+        scenarios.append({"name": f"steps-{steps}", "steps": steps, "fanout": 1, "payload": 256, "token_limit": 80000})
+    for kb in (1, 10) if quick else (1, 10, 50):
+        scenarios.append({"name": f"history-{kb}kb", "steps": 20, "fanout": 1, "payload": kb * 1024, "token_limit": 10**9})
+    for fanout in (1, 4) if quick else (1, 4, 16):
+        scenarios.append({"name": f"fanout-{fanout}", "steps": 10, "fanout": fanout, "payload": 1024, "token_limit": 80000})
+    scenarios.append({"name": "summarization", "steps": 20, "fanout": 1, "payload": 8 * 1024, "token_limit": 12000})
+    return scenarios
+
+
+class Probe:
+    """统计 LLM 调用、工具执行和日志写入的耗时，按步切分"""
+
+    def __init__(self, agent: Agent):
+        self.agent = agent
+        self.llm_time = 0.0
+        self.llm_calls = 0
+        self.tool_time = 0.0
+        self.log_time = 0.0
+        self.step_overheads = []
+        self._mark = None
+
+        generate = agent.llm.generate
+
+        async def timed_generate(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await generate(*args, **kwargs)
+            finally:
+                self.llm_time += time.perf_counter() - start
+                self.llm_calls += 1
+
+        agent.llm.generate = timed_generate
+
+        for tool in agent.tools.values():
+            tool.execute = self._timed(tool.execute, "tool_time")
+        for method in ("start_new_run", "log_request", "log_response", "log_tool_result"):
+            setattr(agent.logger, method, self._timed_sync(getattr(agent.logger, method)))
+        agent.on_step = self.on_step
+
+    def _timed(self, func, attr):
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                setattr(self, attr, getattr(self, attr) + time.perf_counter() - start)
+
+        return wrapper
+
+    def _timed_sync(self, func):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.log_time += time.perf_counter() - start
+
+        return wrapper
+
+    def _snapshot(self):
+        return time.perf_counter(), self.llm_time + self.tool_time
+
+    def start(self):
+        self._mark = self._snapshot()
+
+    def on_step(self, step: int, max_steps: int, tool_names: list):
+        """每步结束时记录该步的框架开销（墙钟时间 - LLM - 工具）"""
+        now, external = self._snapshot()
+        wall = now - self._mark[0]
+        self.step_overheads.append(wall - (external - self._mark[1]))
+        self._mark = (now, external)
+
+
+async def run_once(server: MockLLMServer, provider: LLMProvider, scenario: dict, workdir: Path, trace_memory: bool) -> dict:
+    """运行一次场景，返回原始计时"""
+    llm = LLMClient(
+        api_key="bench",
+        provider=provider,
+        api_base=server.api_base(provider.value),
+        model="mock-model",
+        retry_config=RetryConfig(enabled=False),
+    )
+    agent = Agent(
+        llm_client=llm,
+        system_prompt="You are a benchmark agent. Call tools until the task is finished.",
+        tools=[EchoTool(scenario["payload"])],
+        max_steps=scenario["steps"] + 2,
+        workspace_dir=str(workdir / "workspace"),
+        token_limit=scenario["token_limit"],
+    )
+    agent.logger.log_dir = workdir / "log"
+    agent.logger.log_dir.mkdir(parents=True, exist_ok=True)
+    agent.add_user_message("Run the scripted benchmark task.")
+    probe = Probe(agent)
+
+    if trace_memory:
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+
+    probe.start()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        result = await agent.run()
+    wall = time.perf_counter() - start
+
+    memory = {}
+    if trace_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory = {"memory_peak_kb": (peak - baseline) / 1024, "memory_retained_kb": (current - baseline) / 1024}
+
+    if result != FINAL_ANSWER:
+        raise RuntimeError(f"场景 {scenario['name']} 未正常结束: {result[:200]}")
+
+    log_bytes = sum(path.stat().st_size for path in agent.logger.log_dir.glob("*.log"))
+    return {
+        "wall": wall,
+        "llm": probe.llm_time,
+        "llm_calls": probe.llm_calls,
+        "tool": probe.tool_time,
+        "log": probe.log_time,
+        "log_bytes": log_bytes,
+        "steps": len(probe.step_overheads),
+        "step_overheads": probe.step_overheads,
+        "messages": len(agent.messages),
+        **memory,
+    }
+
+
+def summarize_runs(runs: list, latency: float) -> dict:
+    """多次运行取中位数，换算成每步/每请求指标"""
+
+    def median(key):
+        return statistics.median(run[key] for run in runs)
+
+    steps = runs[0]["steps"]
+    overhead = statistics.median(run["wall"] - run["llm"] - run["tool"] for run in runs)
+    client = statistics.median((run["llm"] - run["llm_calls"] * latency) / run["llm_calls"] for run in runs)
+    return {
+        "steps": steps,
+        "llm_requests": runs[0]["llm_calls"],
+        "final_messages": runs[0]["messages"],
+        "wall_s": round(median("wall"), 4),
+        "overhead_ms_per_step": round(overhead / steps * 1000, 3),
+        "overhead_ms_first_step": round(statistics.median(run["step_overheads"][0] for run in runs) * 1000, 3),
+        "overhead_ms_last_step": round(statistics.median(run["step_overheads"][-1] for run in runs) * 1000, 3),
+        "logging_ms_per_step": round(median("log") / steps * 1000, 3),
+        "log_kb": round(median("log_bytes") / 1024, 1),
+        # HTTP 客户端 + SDK 解析的耗时（扣除模拟延迟）
+        "client_ms_per_request": round(client * 1000, 3),
+        "tool_ms_per_step": round(median("tool") / steps * 1000, 3),
+    }
+
+
+async def run_benchmark(args) -> dict:
+    scenarios = build_scenarios(quick=args.quick)
+    if args.scenario:
+        scenarios = [s for s in scenarios if any(s["name"].startswith(prefix) for prefix in args.scenario)]
+    providers = [LLMProvider(p) for p in args.providers]
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench-agent-") as tmp:
+        # 预热：首次调用会触发 SDK 的延迟导入和初始化，不计入结果
+        warmup = {"name": "warmup", "steps": 2, "fanout": 1, "payload": 16, "token_limit": 80000}
+        with MockLLMServer(make_script(2, 1)) as server:
+            for provider in providers:
+                await run_once(server, provider, warmup, Path(tmp) / f"warmup-{provider.value}", trace_memory=False)
+
+        for scenario in scenarios:
+            script = make_script(scenario["steps"], scenario["fanout"])
+            with MockLLMServer(script, latency=args.latency, jitter=args.jitter) as server:
+                for provider in providers:
+                    key = f"{provider.value}/{scenario['name']}"
+                    runs = []
+                    for index in range(args.repeat):
+                        workdir = Path(tmp) / f"{provider.value}-{scenario['name']}-{index}"
+                        runs.append(await run_once(server, provider, scenario, workdir, trace_memory=False))
+                    metrics = summarize_runs(runs, args.latency)
+
+                    # 内存单独测一次（tracemalloc 会显著拖慢计时）
+                    workdir = Path(tmp) / f"{provider.value}-{scenario['name']}-memory"
+                    traced = await run_once(server, provider, scenario, workdir, trace_memory=True)
+                    metrics["memory_peak_kb"] = round(traced["memory_peak_kb"], 1)
+                    metrics["memory_retained_kb"] = round(traced["memory_retained_kb"], 1)
+
+                    results[key] = {"scenario": scenario, "metrics": metrics}
+                    print(
+                        f"  {key:<32} 步数 {metrics['steps']:>3}  每步开销 {metrics['overhead_ms_per_step']:>8.2f} ms"
+                        f"  末步 {metrics['overhead_ms_last_step']:>8.2f} ms  日志 {metrics['logging_ms_per_step']:>7.2f} ms/步"
+                        f"  内存峰值 {metrics['memory_peak_kb']:>9.1f} KB"
+                    )
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict):
+    """打印与基线结果的对比（正数表示变慢/变大）"""
+    print(f"\n📊 对比基线 {baseline['meta'].get('commit')} → {current['meta'].get('commit')}")
+    for key, entry in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        parts = []
+        for metric in COMPARE_METRICS:
+            new, old = entry["metrics"].get(metric), base["metrics"].get(metric)
+            if new is None or not old:
+                continue
+            parts.append(f"{metric} {(new - old) / old * 100:+.1f}%")
+        print(f"  {key:<32} " + "  ".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent 主循环基准测试")
+    parser.add_argument("--providers", nargs="+", default=["anthropic", "openai"], choices=["anthropic", "openai"])
+    parser.add_argument("--scenario", nargs="*", help="只运行名称以这些前缀开头的场景（如 steps history）")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟的 LLM 延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟抖动（秒）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个场景的重复次数（取中位数）")
+    parser.add_argument("--quick", action="store_true", help="使用较小的场景规模")
+    parser.add_argument("--output", help="结果 JSON 输出路径")
+    parser.add_argument("--compare", help="与之前保存的结果 JSON 对比")
+    args = parser.parse_args()
+
+    print(f"🚀 Agent 主循环基准测试（模拟延迟 {args.latency * 1000:.0f} ms，重复 {args.repeat} 次）")
+    results = asyncio.run(run_benchmark(args))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n💾 结果已保存: {args.output}")
+
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
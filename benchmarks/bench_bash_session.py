@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Bash 工具基准测试：每条命令新建进程 vs 持久 shell 会话
+Benchmark for BashTool with and without persistent_session
+连续执行大量短命令（Agent 常见的 echo / pwd / ls / grep / git status 等），
+统计单条命令延迟（P50 / P95）和吞吐量。
+
+用法:
+    python benchmarks/bench_bash_session.py --commands 500 --output bash-bench.json
+    python benchmarks/bench_bash_session.py --compare bash-bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_agent_loop import git_commit  # noqa: E402
+
+from mini_agent.tools.bash_tool import BashTool  # noqa: E402
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# 短命令混合负载
+WORKLOAD = [
+    "echo hello",
+    "pwd",
+    "ls",
+    "test -f pyproject.toml && echo yes",
+    "grep -c def mini_agent/tools/bash_tool.py",
+    "cat pyproject.toml | wc -l",
+    "git status --short | head -5",
+    "date +%s",
+]
+
+MODES = {
+    "spawn": {},
+    "session": {"persistent_session": True},
+}
+
+COMPARE_METRICS = ["p50_ms", "p95_ms", "total_s"]
+
+
+async def run_mode(options: dict, commands: int) -> dict:
+    bash_tool = BashTool(**options)
+    latencies = []
+    failures = 0
+    try:
+        # 预热（会话模式下启动 shell）
+        await bash_tool.execute(command=f"cd {REPO_DIR}")
+        start = time.perf_counter()
+        for index in range(commands):
+            command = WORKLOAD[index % len(WORKLOAD)]
+            if not options.get("persistent_session"):
+                command = f"cd {REPO_DIR} && {command}"
+            began = time.perf_counter()
+            result = await bash_tool.execute(command=command)
+            latencies.append((time.perf_counter() - began) * 1000)
+            failures += not result.success
+        total = time.perf_counter() - start
+    finally:
+        await bash_tool.close_session()
+
+    latencies.sort()
+    return {
+        "commands": commands,
+        "failures": failures,
+        "total_s": round(total, 3),
+        "commands_per_s": round(commands / total, 1),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+    }
+
+
+def compare(current: dict, baseline: dict):
+    """打印与基线结果的对比（正数表示变慢）"""
+    print(f"\n📊 对比基线 {baseline['meta'].get('commit')} → {current['meta'].get('commit')}")
+    for mode, metrics in current["results"].items():
+        base = baseline["results"].get(mode)
+        if base is None:
+            continue
+        parts = []
+        for metric in COMPARE_METRICS:
+            new, old = metrics.get(metric), base.get(metric)
+            if new is None or not old:
+                continue
+            parts.append(f"{metric} {(new - old) / old * 100:+.1f}%")
+        print(f"  {mode:<10} " + "  ".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bash 工具基准测试（新建进程 vs 持久会话）")
+    parser.add_argument("--commands", type=int, default=500, help="每种模式执行的命令数")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--output", help="结果 JSON 输出路径")
+    parser.add_argument("--compare", help="与之前保存的结果 JSON 对比")
+    args = parser.parse_args()
+
+    if platform.system() == "Windows":
+        print("⚠️  持久会话仅支持 Unix，Windows 下跳过")
+        return
+
+    print(f"🚀 Bash 工具基准测试（每种模式 {args.commands} 条短命令）")
+    results = {}
+    for mode in args.modes:
+        metrics = asyncio.run(run_mode(MODES[mode], args.commands))
+        results[mode] = metrics
+        print(
+            f"  {mode:<10} 总耗时 {metrics['total_s']:>7.3f} s  吞吐 {metrics['commands_per_s']:>8.1f} 条/s"
+            f"  P50 {metrics['p50_ms']:>7.3f} ms  P95 {metrics['p95_ms']:>7.3f} ms  失败 {metrics['failures']}"
+        )
+    if "spawn" in results and "session" in results:
+        print(f"\n⚡ 持久会话加速比: {results['spawn']['total_s'] / results['session']['total_s']:.1f}x")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "commands": args.commands,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n💾 结果已保存: {args.output}")
+
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
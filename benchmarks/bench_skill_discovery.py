@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Skill 发现启动耗时基准测试
+Benchmark for SkillLoader.discover_skills
+对比三种启动方式（CLI / ACP 每次启动都会执行一次技能发现）：
+    legacy - 不使用清单：rglob 全树 + 解析 YAML + 路径改写
+    cold   - 使用清单但清单不存在（首次启动，生成清单）
+    warm   - 清单已存在且技能未变化（日常启动）
+另外测量 get_skill 首次加载完整技能内容的耗时。
+
+用法:
+    python benchmarks/bench_skill_discovery.py --output skills-bench.json
+    python benchmarks/bench_skill_discovery.py --compare skills-bench.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_agent_loop import git_commit  # noqa: E402
+
+from mini_agent.tools.skill_loader import SkillLoader  # noqa: E402
+
+DEFAULT_SKILLS_DIR = Path(__file__).resolve().parent.parent / "mini_agent" / "skills"
+
+COMPARE_METRICS = ["p50_ms", "p95_ms"]
+
+
+def measure(func, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        with redirect_stdout(StringIO()):
+            start = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[max(int(len(samples) * 0.95) - 1, 0)], 3),
+    }
+
+
+def compare(current: dict, baseline: dict):
+    """打印与基线结果的对比（正数表示变慢）"""
+    print(f"\n📊 对比基线 {baseline['meta'].get('commit')} → {current['meta'].get('commit')}")
+    for mode, metrics in current["results"].items():
+        base = baseline["results"].get(mode)
+        if base is None:
+            continue
+        parts = []
+        for metric in COMPARE_METRICS:
+            new, old = metrics.get(metric), base.get(metric)
+            if new is None or not old:
+                continue
+            parts.append(f"{metric} {(new - old) / old * 100:+.1f}%")
+        print(f"  {mode:<10} " + "  ".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Skill 发现启动耗时基准测试")
+    parser.add_argument("--skills-dir", default=str(DEFAULT_SKILLS_DIR), help="技能目录")
+    parser.add_argument("--repeat", type=int, default=20, help="每种方式的重复次数")
+    parser.add_argument("--output", help="结果 JSON 输出路径")
+    parser.add_argument("--compare", help="与之前保存的结果 JSON 对比")
+    args = parser.parse_args()
+
+    skills_dir = Path(args.skills_dir)
+    if not skills_dir.exists():
+        print(f"⚠️  技能目录不存在: {skills_dir}（如为子模块，请先 git submodule update --init）")
+        return
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manifest = Path(tmpdir) / "skills-manifest.json"
+
+        def legacy():
+            SkillLoader(str(skills_dir)).discover_skills()
+
+        def cold():
+            manifest.unlink(missing_ok=True)
+            SkillLoader(str(skills_dir), manifest_path=manifest).discover_skills()
+
+        def warm():
+            SkillLoader(str(skills_dir), manifest_path=manifest).discover_skills()
+
+        def first_get_skill():
+            loader = SkillLoader(str(skills_dir), manifest_path=manifest)
+            names = [skill.name for skill in loader.discover_skills()]
+            start = time.perf_counter()
+            for name in names:
+                loader.get_skill(name)
+            return (time.perf_counter() - start) * 1000 / max(len(names), 1)
+
+        skill_count = len(SkillLoader(str(skills_dir)).discover_skills())
+        print(f"🚀 Skill 发现基准测试（{skills_dir}，{skill_count} 个技能，重复 {args.repeat} 次）")
+        results = {}
+        for mode, func in [("legacy", legacy), ("cold", cold), ("warm", warm)]:
+            results[mode] = measure(func, args.repeat)
+            print(f"  {mode:<10} P50 {results[mode]['p50_ms']:>8.3f} ms  P95 {results[mode]['p95_ms']:>8.3f} ms")
+
+        with redirect_stdout(StringIO()):
+            get_skill_ms = round(first_get_skill(), 3)
+        results["get_skill"] = {"p50_ms": get_skill_ms}
+        print(f"  {'get_skill':<10} 首次加载平均 {get_skill_ms:.3f} ms/技能")
+        print(f"\n⚡ 日常启动加速比: {results['legacy']['p50_ms'] / max(results['warm']['p50_ms'], 1e-3):.1f}x")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "skills": skill_count,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n💾 结果已保存: {args.output}")
+
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
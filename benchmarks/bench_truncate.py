@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+token 截断基准测试
+Benchmark for mini_agent.tools.file_tools.truncate_text_by_tokens
+分别在 1KB / 1MB / 50MB 的行情文本上测量截断耗时，并与"整段编码计数"的旧算法对比。
+tiktoken 词表不可用（如离线环境）时，只测量按字符估算的降级路径。
+
+用法:
+    python benchmarks/bench_truncate.py --output truncate-bench.json
+    python benchmarks/bench_truncate.py --compare truncate-bench.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_agent_loop import git_commit  # noqa: E402
+
+from mini_agent.tools.file_tools import _get_encoding, truncate_text_by_tokens  # noqa: E402
+
+SIZES = {"1KB": 1024, "1MB": 1024 * 1024, "50MB": 50 * 1024 * 1024}
+
+# 中英文混合的行情数据行
+SAMPLE_LINE = "2024-06-28,688256,寒武纪,收盘 245.60,涨幅 +3.14%,成交额 12.8亿,market cap rose on AI demand\n"
+
+COMPARE_METRICS = ["new_ms", "old_ms"]
+
+
+def make_text(size: int) -> str:
+    return (SAMPLE_LINE * (size // len(SAMPLE_LINE) + 1))[:size]
+
+
+def full_encode_truncate(text: str, max_tokens: int, encoding) -> str:
+    """旧算法：对全文编码计数，再按比例截取首尾"""
+    token_count = len(encoding.encode(text, disallowed_special=()))
+    if token_count <= max_tokens:
+        return text
+    chars_per_half = int((max_tokens / 2) / (token_count / len(text)) * 0.95)
+    return text[:chars_per_half] + "\n...\n" + text[-chars_per_half:]
+
+
+def timed(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def compare(current: dict, baseline: dict):
+    """打印与基线结果的对比（正数表示变慢）"""
+    print(f"\n📊 对比基线 {baseline['meta'].get('commit')} → {current['meta'].get('commit')}")
+    for name, metrics in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        parts = []
+        for metric in COMPARE_METRICS:
+            new, old = metrics.get(metric), base.get(metric)
+            if new is None or not old:
+                continue
+            parts.append(f"{metric} {(new - old) / old * 100:+.1f}%")
+        print(f"  {name:<6} " + "  ".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="token 截断基准测试")
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES))
+    parser.add_argument("--max-tokens", type=int, default=32000, help="截断上限（ReadTool 默认 32000）")
+    parser.add_argument("--repeat", type=int, default=5, help="每个规模的重复次数（取中位数）")
+    parser.add_argument("--skip-old", action="store_true", help="不测量旧算法（50MB 全文编码耗时较长）")
+    parser.add_argument("--output", help="结果 JSON 输出路径")
+    parser.add_argument("--compare", help="与之前保存的结果 JSON 对比")
+    args = parser.parse_args()
+
+    encoding = _get_encoding()
+    if encoding is None:
+        print("⚠️  tiktoken 词表不可用，只测量按字符估算的降级路径")
+
+    print(f"🚀 token 截断基准测试（上限 {args.max_tokens} tokens，重复 {args.repeat} 次）")
+    results = {}
+    for name in args.sizes:
+        text = make_text(SIZES[name])
+        output = truncate_text_by_tokens(text, args.max_tokens)
+        metrics = {
+            "chars": len(text),
+            "output_chars": len(output),
+            "new_ms": timed(lambda: truncate_text_by_tokens(text, args.max_tokens), args.repeat),
+        }
+        if encoding is not None and not args.skip_old:
+            repeat = 1 if len(text) > 10 * 1024 * 1024 else args.repeat
+            metrics["old_ms"] = timed(lambda: full_encode_truncate(text, args.max_tokens, encoding), repeat)
+        results[name] = metrics
+
+        line = f"  {name:<6} 新算法 {metrics['new_ms']:>10.3f} ms"
+        if "old_ms" in metrics:
+            line += f"  旧算法 {metrics['old_ms']:>10.3f} ms  加速 {metrics['old_ms'] / max(metrics['new_ms'], 1e-3):>8.1f}x"
+        print(line + f"  输出 {metrics['output_chars']} 字符")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "tiktoken": encoding is not None,
+            "max_tokens": args.max_tokens,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n💾 结果已保存: {args.output}")
+
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Web 服务器压测脚本
+Benchmark for web_server
+以指定并发访问首页、报告页和图片，统计吞吐量与延迟分位数
+
+用法:
+    python web_server.py --production --port 8080 &
+    python benchmarks/bench_web_server.py --base-url http://127.0.0.1:8080 --concurrency 64 --duration 30
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import time
+from collections import defaultdict
+
+import httpx
+
+
+def percentile(values, pct):
+    """计算分位数（values 需已排序）"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def discover_targets(client: httpx.AsyncClient, report: str = None, image: str = None) -> dict:
+    """找出要压测的报告和图片（未指定时取最新的一篇报告及其第一张图片）"""
+    if report is None:
+        response = await client.get("/api/reports", params={"status": "success", "limit": 1, "fields": "filename"})
+        reports = response.json().get("reports", [])
+        report = reports[0]["filename"] if reports else None
+
+    if image is None and report:
+        response = await client.get(f"/report/{report}")
+        match = re.search(r'src="/images/([^"]+)"', response.text)
+        image = match.group(1) if match else None
+
+    targets = {"index": "/"}
+    if report:
+        targets["report"] = f"/report/{report}"
+        targets["api_report"] = f"/api/report/{report}"
+    if image:
+        targets["image"] = f"/images/{image}"
+    return targets
+
+
+async def worker(client, paths, deadline, results, conditional):
+    """循环请求各路径直到截止时间；conditional 时携带上次的 ETag 模拟回访客户端"""
+    etags = {}
+    index = 0
+    while time.perf_counter() < deadline:
+        name, path = paths[index % len(paths)]
+        index += 1
+        headers = {"Accept-Encoding": "gzip, br"}
+        if conditional and name in etags:
+            headers["If-None-Match"] = etags[name]
+
+        start = time.perf_counter()
+        try:
+            response = await client.get(path, headers=headers)
+            await response.aread()
+        except httpx.HTTPError:
+            results[name]["errors"] += 1
+            continue
+        elapsed = time.perf_counter() - start
+
+        stats = results[name]
+        stats["latencies"].append(elapsed)
+        stats["bytes"] += len(response.content)
+        stats["status"][response.status_code] += 1
+        if "etag" in response.headers:
+            etags[name] = response.headers["etag"]
+
+
+async def run_benchmark(args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        targets = await discover_targets(client, args.report, args.image)
+        paths = [(name, targets[name]) for name in args.endpoints if name in targets]
+        if not paths:
+            raise SystemExit("没有可压测的路径，请确认服务器已启动且存在报告")
+
+        results = defaultdict(lambda: {"latencies": [], "bytes": 0, "errors": 0, "status": defaultdict(int)})
+        deadline = time.perf_counter() + args.duration
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            worker(client, paths[i % len(paths):] + paths[:i % len(paths)], deadline, results, args.conditional)
+            for i in range(args.concurrency)
+        ])
+        wall = time.perf_counter() - started
+
+    summary = {
+        "base_url": args.base_url,
+        "concurrency": args.concurrency,
+        "duration_s": round(wall, 2),
+        "conditional": args.conditional,
+        "endpoints": {},
+    }
+    for name, _ in paths:
+        stats = results[name]
+        latencies = sorted(stats["latencies"])
+        summary["endpoints"][name] = {
+            "path": targets[name],
+            "requests": len(latencies),
+            "errors": stats["errors"],
+            "rps": round(len(latencies) / wall, 1),
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "mb_transferred": round(stats["bytes"] / 1024 / 1024, 2),
+            "status": dict(stats["status"]),
+        }
+    summary["total_rps"] = round(sum(e["rps"] for e in summary["endpoints"].values()), 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="金融报告 Web 服务器压测")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8080", help="服务器地址")
+    parser.add_argument("--concurrency", type=int, default=32, help="并发客户端数")
+    parser.add_argument("--duration", type=float, default=20, help="压测时长（秒）")
+    parser.add_argument("--endpoints", nargs="+", default=["index", "report", "api_report", "image"],
+                        help="要压测的端点: index / report / api_report / image")
+    parser.add_argument("--report", default=None, help="报告文件名（默认取最新报告）")
+    parser.add_argument("--image", default=None, help="图片路径，相对 /images/（默认取报告中的第一张图）")
+    parser.add_argument("--conditional", action="store_true", help="携带 If-None-Match 模拟回访客户端")
+    parser.add_argument("--output", default=None, help="结果保存为 JSON 文件")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run_benchmark(args))
+
+    print(f"\n{'='*72}")
+    print(f"并发 {summary['concurrency']}，时长 {summary['duration_s']}s，总吞吐 {summary['total_rps']} req/s")
+    print(f"{'='*72}")
+    print(f"{'端点':<12}{'请求数':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'MB':>8}{'错误':>6}")
+    for name, e in summary["endpoints"].items():
+        print(f"{name:<12}{e['requests']:>8}{e['rps']:>9}{e['p50_ms']:>9}{e['p95_ms']:>9}{e['p99_ms']:>9}"
+              f"{e['mb_transferred']:>8}{e['errors']:>6}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"\n📄 结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
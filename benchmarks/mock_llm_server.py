@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+本地模拟 LLM 服务
+Mock LLM Server
+同时支持 Anthropic Messages（POST /v1/messages）和 OpenAI Chat Completions
+（POST /v1/chat/completions）协议，按脚本回放文本和工具调用，延迟可配置。
+只依赖标准库，供基准测试和离线压测使用。
+
+脚本是一个函数 script(request, protocol) -> MockReply：
+    request  - 请求体（JSON 解析后的 dict）
+    protocol - "anthropic" 或 "openai"
+回复由服务按对应协议编码；脚本应只根据请求内容决定回复，这样多个 Agent 可以并发共用一个服务。
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Tuple
+
+
+@dataclass
+class MockReply:
+    """一次模拟回复"""
+
+    text: str = ""
+    # [(工具名, 参数 dict)]
+    tool_calls: List[Tuple[str, dict]] = field(default_factory=list)
+    thinking: Optional[str] = None
+
+
+def request_text(request: dict) -> str:
+    """请求中所有消息的文本（脚本据此判断进度）"""
+    return json.dumps(request.get("messages", []), ensure_ascii=False)
+
+
+def has_tools(request: dict) -> bool:
+    """请求是否带有工具定义（Agent 的总结请求不带工具）"""
+    return bool(request.get("tools"))
+
+
+class MockLLMServer:
+    """在后台线程运行的模拟 LLM 服务
+
+    用法:
+        with MockLLMServer(script, latency=0.05) as server:
+            client = LLMClient(api_key="x", provider=..., api_base=server.api_base(provider))
+    """
+
+    def __init__(
+        self,
+        script: Callable[[dict, str], MockReply],
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Args:
+            script: 回复脚本
+            latency: 每次请求的模拟延迟（秒）
+            jitter: 延迟的随机抖动幅度（秒，均匀分布）
+            host / port: 监听地址，端口为 0 时自动分配
+        """
+        self.script = script
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def api_base(self, provider: str) -> str:
+        """LLMClient 使用的 api_base（OpenAI SDK 不会自动补 /v1）"""
+        return self.base_url if str(provider).lower().endswith("anthropic") else f"{self.base_url}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # 协议编码
+    # ------------------------------------------------------------------
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # 保持连接，避免每次请求重新建连
+            disable_nagle_algorithm = True  # 响应头和响应体分两次写出，否则会叠加 40ms 的延迟确认
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+
+                if self.path.endswith("/messages"):
+                    protocol = "anthropic"
+                elif self.path.endswith("/chat/completions"):
+                    protocol = "openai"
+                else:
+                    self._send(404, {"error": {"type": "not_found", "message": self.path}})
+                    return
+
+                with server._lock:
+                    server.requests += 1
+
+                delay = server.latency + (random.uniform(-server.jitter, server.jitter) if server.jitter else 0)
+                if delay > 0:
+                    time.sleep(delay)
+
+                reply = server.script(request, protocol)
+                input_tokens = len(request_text(request)) // 4
+                encode = _encode_anthropic if protocol == "anthropic" else _encode_openai
+                self._send(200, encode(request, reply, input_tokens))
+
+            def _send(self, status: int, body: dict):
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):  # 不打印访问日志
+                pass
+
+        return Handler
+
+
+def _encode_anthropic(request: dict, reply: MockReply, input_tokens: int) -> dict:
+    content = []
+    if reply.thinking:
+        content.append({"type": "thinking", "thinking": reply.thinking, "signature": ""})
+    if reply.text:
+        content.append({"type": "text", "text": reply.text})
+    for name, arguments in reply.tool_calls:
+        content.append({"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:20]}", "name": name, "input": arguments})
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:20]}",
+        "type": "message",
+        "role": "assistant",
+        "model": request.get("model", "mock"),
+        "content": content,
+        "stop_reason": "tool_use" if reply.tool_calls else "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": input_tokens, "output_tokens": len(reply.text) // 4 + 1},
+    }
+
+
+def _encode_openai(request: dict, reply: MockReply, input_tokens: int) -> dict:
+    message = {"role": "assistant", "content": reply.text or None}
+    if reply.thinking:
+        message["reasoning_details"] = [{"type": "reasoning.text", "text": reply.thinking}]
+    if reply.tool_calls:
+        message["tool_calls"] = [
+            {
+                "id": f"call_{uuid.uuid4().hex[:20]}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(arguments, ensure_ascii=False)},
+            }
+            for name, arguments in reply.tool_calls
+        ]
+    output_tokens = len(reply.text) // 4 + 1
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:20]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "mock"),
+        "choices": [{
+            "index": 0,
+            "message": message,
+            "finish_reason": "tool_calls" if reply.tool_calls else "stop",
+        }],
+        "usage": {
+            "prompt_tokens": input_tokens,
+            "completion_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        },
+    }
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+每日批量任务模拟器
+Daily Batch Simulator
+离线跑通 调度器 → 报告生成器 → Agent → 工具 → 元数据 → Web 报告目录 整条链路：
+N 只合成股票，每只生成普通版和专业版两篇报告；模拟 LLM 先调用数据工具，再用 write_file 写出报告。
+在不同并发度下统计批次总耗时、吞吐量、单篇延迟、峰值内存（RSS）和文件系统操作次数，
+用于评估 worker 数量，并在往 stocks_config.yaml 添加股票前发现扩展瓶颈。
+
+- 模拟 LLM 服务运行在主进程，每个并发度在独立子进程中执行（峰值 RSS 互不影响）
+- MCP 数据工具替换为本地桩（可配置延迟和返回大小），不连接任何外部服务
+- 调度器里为真实 API 限流设置的固定等待（5 秒 / 10 秒）不计入
+- --days 2 时第二天走增量报告路径（阅读上次报告）
+
+用法:
+    python benchmarks/simulate_daily_batch.py --stocks 50 --concurrency 1 4 16 --output batch.json
+    python benchmarks/simulate_daily_batch.py --stocks 200 --days 2 --llm-latency 0.2 --compare batch.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_agent_loop import git_commit  # noqa: E402
+from mock_llm_server import MockLLMServer, MockReply, has_tools, request_text  # noqa: E402
+
+from mini_agent.tools.base import Tool, ToolResult  # noqa: E402
+
+DATA_MARKER = "[sim-data]"
+WRITE_SUCCESS = "Successfully wrote to"
+FILENAME_PATTERN = re.compile(r"保存文件名\*\*：`([^`]+)`")
+DATA_TOOLS = ("get_stock_quote", "get_stock_kline", "search_financial_news")
+FINAL_ANSWER = "报告已生成并保存。"
+
+# 对比时关注的指标: (指标, 越大越好)
+COMPARE_METRICS = (
+    ("batch_seconds", False),
+    ("reports_per_minute", True),
+    ("report_p95_seconds", False),
+    ("peak_rss_mb", False),
+    ("fs_ops_per_report", False),
+)
+
+
+# ----------------------------------------------------------------------
+# 模拟 LLM 脚本
+# ----------------------------------------------------------------------
+
+def synthetic_report(filename: str, size_kb: int) -> str:
+    """生成一篇合成报告（不含数据标记，增量报告阅读时不会干扰脚本判断）"""
+    stock_code = filename.split("_")[0]
+    sections = [f"# {stock_code} 股票分析报告\n"]
+    paragraph = f"{stock_code} 近期成交量温和放大，股价在均线附近震荡，基本面与行业景气度保持稳定。"
+    index = 1
+    while sum(len(s.encode("utf-8")) for s in sections) < size_kb * 1024:
+        sections.append(f"## {index}. 分析要点\n\n" + paragraph * 4 + "\n")
+        index += 1
+    sections.append("## 风险提示\n\n本报告仅供参考，不构成投资建议。\n")
+    return "\n".join(sections)
+
+
+def make_script(report_kb: int):
+    """无状态脚本：依据请求内容推进 数据查询 → write_file → 最终回答"""
+
+    def script(request: dict, protocol: str) -> MockReply:
+        text = request_text(request)
+        if not has_tools(request):
+            return MockReply(text="已查询行情与新闻数据，正在撰写报告。")
+        if WRITE_SUCCESS in text:
+            return MockReply(text=FINAL_ANSWER)
+
+        match = FILENAME_PATTERN.search(text)
+        if match is None:
+            return MockReply(text="未找到报告文件名。")
+        filename = match.group(1)
+
+        if text.count(DATA_MARKER) < len(DATA_TOOLS):
+            code = filename.split("_")[0]
+            return MockReply(text="先查询数据。", tool_calls=[(name, {"code": code}) for name in DATA_TOOLS])
+        return MockReply(
+            text="数据已齐备，开始撰写报告。",
+            tool_calls=[("write_file", {"path": filename, "content": synthetic_report(filename, report_kb)})],
+        )
+
+    return script
+
+
+# ----------------------------------------------------------------------
+# 子进程：在给定并发度下跑完整批次
+# ----------------------------------------------------------------------
+
+class StubDataTool(Tool):
+    """MCP 数据工具的本地桩"""
+
+    def __init__(self, name: str, latency: float, payload_bytes: int):
+        self._name = name
+        self.latency = latency
+        self.payload = "行情数据 " * max(1, payload_bytes // 13)
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def description(self) -> str:
+        return f"Simulated {self._name} data source."
+
+    @property
+    def parameters(self) -> dict:
+        return {"type": "object", "properties": {"code": {"type": "string"}}, "required": ["code"]}
+
+    async def execute(self, code: str) -> ToolResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return ToolResult(success=True, content=f"{DATA_MARKER} {self._name} {code}: {self.payload}")
+
+
+class FsOpsCounter:
+    """通过审计钩子统计文件系统操作（审计钩子无法移除，只在 active 时计数）"""
+
+    EVENTS = {
+        "os.rename": "rename",
+        "os.remove": "remove",
+        "os.mkdir": "mkdir",
+        "os.listdir": "listdir",
+        "os.scandir": "listdir",
+        "os.utime": "utime",
+        "os.truncate": "truncate",
+    }
+
+    def __init__(self):
+        self.counts = Counter()
+        self.active = False
+        sys.addaudithook(self._hook)
+
+    def _hook(self, event, args):
+        if not self.active:
+            return
+        if event == "open":
+            path, mode, flags = args
+            if not isinstance(path, (str, bytes, os.PathLike)):
+                return
+            writing = any(c in mode for c in "wax+") if isinstance(mode, str) else bool(flags & (os.O_WRONLY | os.O_RDWR))
+            self.counts["open_write" if writing else "open_read"] += 1
+        elif event in self.EVENTS:
+            self.counts[self.EVENTS[event]] += 1
+
+
+def peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def write_workspace(workdir: Path, args) -> dict:
+    """准备配置文件和合成股票列表"""
+    import yaml
+
+    config_path = workdir / "config.yaml"
+    config_path.write_text(yaml.safe_dump({
+        "api_key": "simulated",
+        "api_base": args.api_base,
+        "model": "mock-model",
+        "provider": args.provider,
+        "max_steps": 10,
+        "retry": {"enabled": False},
+    }), encoding="utf-8")
+
+    stocks = [{"code": f"{900000 + i:06d}", "name": f"模拟股份{i}", "market": "模拟"} for i in range(args.stocks)]
+    stocks_path = workdir / "stocks_config.yaml"
+    stocks_path.write_text(yaml.safe_dump({"stocks": stocks}, allow_unicode=True), encoding="utf-8")
+    return {"config": config_path, "stocks": stocks_path}
+
+
+async def run_batch(scheduler, date: datetime, concurrency: int) -> dict:
+    """按调度器的顺序（每只股票先普通版后专业版）生成报告，最多 concurrency 篇同时进行"""
+    from report_events import TASK_FINISHED, TASK_STARTED
+
+    reporter = scheduler.reporter
+    jobs = [(stock["code"], version) for stock in scheduler.stocks for version in ("normal", "professional")]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failed = 0
+
+    async def generate(stock_code, version):
+        nonlocal failed
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await reporter.generate_stock_report(stock_code=stock_code, version=version, date=date)
+            except Exception:
+                failed += 1
+            latencies.append(time.perf_counter() - start)
+
+    reporter.events.publish(TASK_STARTED, total=len(jobs), stocks=[stock["code"] for stock in scheduler.stocks])
+    start = time.perf_counter()
+    await asyncio.gather(*(generate(code, version) for code, version in jobs))
+    duration = time.perf_counter() - start
+    reporter.events.publish(
+        TASK_FINISHED, total=len(jobs), success=len(jobs) - failed,
+        failed=failed, duration_seconds=round(duration, 1)
+    )
+    return {"seconds": duration, "reports": len(jobs), "failed": failed, "latencies": latencies}
+
+
+def run_worker(args) -> dict:
+    """子进程入口：在临时目录中跑 args.days 天的批次"""
+    workdir = Path(args.workdir)
+    # Agent 日志写在 ~/.mini-agent/log，指向临时目录以免污染本机并计入文件操作
+    os.environ["HOME"] = str(workdir / "home")
+
+    import financial_reporter
+    from report_catalog import ReportCatalog
+    from scheduler import ReportScheduler
+
+    stub_tools = [StubDataTool(name, args.tool_latency, args.tool_payload) for name in DATA_TOOLS]
+
+    async def load_stub_tools(config_path: str = "mcp.json", use_cache: bool = True, cache_path=None):
+        return list(stub_tools)
+
+    financial_reporter.load_mcp_tools_async = load_stub_tools
+
+    paths = write_workspace(workdir, args)
+    reports_dir = workdir / "reports"
+    counter = FsOpsCounter()
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        scheduler = ReportScheduler(
+            config_path=str(paths["config"]),
+            reports_dir=str(reports_dir),
+            stocks_config_path=str(paths["stocks"]),
+        )
+        # PromptBuilder 使用仓库内的 prompts 目录
+        scheduler.reporter.prompt_builder = financial_reporter.PromptBuilder(str(ROOT_DIR / "prompts"))
+
+        async def run_days():
+            start_day = datetime(2026, 1, 5, 9, 0)
+            return [
+                await run_batch(scheduler, start_day + timedelta(days=day), args.concurrency)
+                for day in range(args.days)
+            ]
+
+        counter.active = True
+        days = asyncio.run(run_days())
+        counter.active = False
+
+    # Web 端：冷启动加载报告目录并做一次分页查询
+    catalog_start = time.perf_counter()
+    catalog = ReportCatalog(reports_dir / "metadata")
+    catalog.query(limit=50)
+    catalog_ms = (time.perf_counter() - catalog_start) * 1000
+
+    latencies = sorted(latency for day in days for latency in day["latencies"])
+    reports = sum(day["reports"] for day in days)
+    batch_seconds = sum(day["seconds"] for day in days)
+    fs_ops = sum(counter.counts.values())
+    disk_bytes = sum(path.stat().st_size for path in reports_dir.rglob("*") if path.is_file())
+    return {
+        "concurrency": args.concurrency,
+        "reports": reports,
+        "failed": sum(day["failed"] for day in days),
+        "batch_seconds": round(batch_seconds, 3),
+        "day_seconds": [round(day["seconds"], 3) for day in days],
+        "reports_per_minute": round(reports / batch_seconds * 60, 1),
+        "report_p50_seconds": round(statistics.median(latencies), 3),
+        "report_p95_seconds": round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "fs_ops": dict(counter.counts),
+        "fs_ops_per_report": round(fs_ops / reports, 1),
+        "disk_mb": round(disk_bytes / 1024 / 1024, 2),
+        "catalog_entries": len(catalog.all_reports()),
+        "catalog_load_ms": round(catalog_ms, 2),
+    }
+
+
+# ----------------------------------------------------------------------
+# 主进程：启动模拟 LLM，逐个并发度启动子进程
+# ----------------------------------------------------------------------
+
+def run_level(args, server: MockLLMServer, concurrency: int, tmp: str) -> dict:
+    workdir = Path(tmp) / f"c{concurrency}"
+    workdir.mkdir()
+    result_path = workdir / "result.json"
+    command = [
+        sys.executable, __file__, "--worker",
+        "--workdir", str(workdir),
+        "--result-file", str(result_path),
+        "--api-base", server.api_base(args.provider),
+        "--provider", args.provider,
+        "--stocks", str(args.stocks),
+        "--days", str(args.days),
+        "--concurrency", str(concurrency),
+        "--tool-latency", str(args.tool_latency),
+        "--tool-payload", str(args.tool_payload),
+    ]
+    requests_before = server.requests
+    subprocess.run(command, check=True, cwd=ROOT_DIR)
+    result = json.loads(result_path.read_text(encoding="utf-8"))
+    result["llm_requests"] = server.requests - requests_before
+    return result
+
+
+def compare(current: dict, baseline: dict):
+    """打印与基线结果的对比（正数表示变好）"""
+    print(f"\n📊 对比基线 {baseline['meta'].get('commit')} → {current['meta'].get('commit')}")
+    base_levels = {level["concurrency"]: level for level in baseline["levels"]}
+    for level in current["levels"]:
+        base = base_levels.get(level["concurrency"])
+        if base is None:
+            continue
+        parts = []
+        for metric, higher_is_better in COMPARE_METRICS:
+            new, old = level.get(metric), base.get(metric)
+            if new is None or not old:
+                continue
+            change = (new - old) / old * 100
+            parts.append(f"{metric} {change if higher_is_better else -change:+.1f}%")
+        print(f"  并发 {level['concurrency']:>3}  " + "  ".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="每日批量任务模拟器")
+    parser.add_argument("--stocks", type=int, default=20, help="合成股票数量（每只生成 2 篇报告）")
+    parser.add_argument("--days", type=int, default=1, help="模拟天数，第二天起为增量报告")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="要测试的并发度")
+    parser.add_argument("--provider", choices=["anthropic", "openai"], default="anthropic")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="模拟的 LLM 延迟（秒）")
+    parser.add_argument("--llm-jitter", type=float, default=0.0, help="LLM 延迟抖动（秒）")
+    parser.add_argument("--tool-latency", type=float, default=0.02, help="数据工具延迟（秒）")
+    parser.add_argument("--tool-payload", type=int, default=2048, help="数据工具返回大小（字节）")
+    parser.add_argument("--report-kb", type=int, default=8, help="合成报告大小（KB）")
+    parser.add_argument("--output", help="结果 JSON 输出路径")
+    parser.add_argument("--compare", help="与之前保存的结果 JSON 对比")
+    # 子进程参数
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    parser.add_argument("--api-base", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        args.concurrency = args.concurrency[0]
+        result = run_worker(args)
+        Path(args.result_file).write_text(json.dumps(result, ensure_ascii=False), encoding="utf-8")
+        return
+
+    print(f"🚀 模拟每日批次：{args.stocks} 只股票 × 2 个版本 × {args.days} 天，"
+          f"LLM 延迟 {args.llm_latency * 1000:.0f} ms，协议 {args.provider}")
+    levels = []
+    with tempfile.TemporaryDirectory(prefix="sim-batch-") as tmp, \
+            MockLLMServer(make_script(args.report_kb), latency=args.llm_latency, jitter=args.llm_jitter) as server:
+        for concurrency in args.concurrency:
+            result = run_level(args, server, concurrency, tmp)
+            levels.append(result)
+            print(
+                f"  并发 {concurrency:>3}  报告 {result['reports']:>5}（失败 {result['failed']}）"
+                f"  耗时 {result['batch_seconds']:>8.2f}s  吞吐 {result['reports_per_minute']:>8.1f} 篇/分"
+                f"  P95 {result['report_p95_seconds']:>6.2f}s  RSS {result['peak_rss_mb']:>7.1f} MB"
+                f"  文件操作 {result['fs_ops_per_report']:>6.1f}/篇"
+            )
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "stocks": args.stocks,
+            "days": args.days,
+            "provider": args.provider,
+            "llm_latency": args.llm_latency,
+            "tool_latency": args.tool_latency,
+            "report_kb": args.report_kb,
+        },
+        "levels": levels,
+    }
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n💾 结果已保存: {args.output}")
+
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
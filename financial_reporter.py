@@ -6,6 +6,8 @@ Financial Report Generator Module
 """
 
 import os
+import gzip
+import hashlib
 import json
 import asyncio
 from datetime import datetime
@@ -20,7 +22,21 @@ from mini_agent.tools.bash_tool import BashTool, BashOutputTool
 from mini_agent.tools.file_tools import ReadTool, WriteTool, EditTool
 from mini_agent.tools.mcp_loader import load_mcp_tools_async
 
+from image_variants import ImageVariantPipeline
 from prompt_builder import PromptBuilder
+from report_events import (
+    EVENTS_FILENAME, REPORT_COMPLETED, REPORT_FAILED, REPORT_STARTED, STEP_PROGRESS, ReportEventLog,
+)
+from report_search import INDEX_FILENAME, ReportSearchIndex
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，缺失时只生成 gzip
+    brotli = None
+
+
+# 报告写入时预压缩的变体: Content-Encoding -> 文件后缀
+COMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
 
 
 class FinancialReporter:
@@ -51,6 +67,15 @@ class FinancialReporter:
         self.images_dir = self.reports_dir / "images"
         self.images_dir.mkdir(parents=True, exist_ok=True)
         
+        # 图表的响应式变体（WebP / AVIF，多种宽度）
+        self.image_pipeline = ImageVariantPipeline(self.images_dir)
+        
+        # 全文检索索引（报告保存后增量更新）
+        self.search_index = ReportSearchIndex(self.reports_dir / INDEX_FILENAME, self.reports_dir)
+        
+        # 进度事件日志（Web 服务器通过 SSE 推送给页面）
+        self.events = ReportEventLog(self.reports_dir / EVENTS_FILENAME)
+        
         # 初始化 PromptBuilder（新架构）
         self.prompts_dir = Path(prompts_dir)
         self.prompt_builder = PromptBuilder(prompts_dir)
@@ -108,10 +133,15 @@ class FinancialReporter:
         
         # 使用 PromptBuilder 构建 system_prompt 和 task
         try:
-            system_prompt = self.prompt_builder.build_system_prompt(
+            assembly = self.prompt_builder.assemble_system_prompt(
                 perspective=version,  # professional / normal
                 format=format_type    # first / incremental
             )
+            system_prompt = assembly.prompt
+            budget_text = f"（预算 {assembly.budget}）" if assembly.budget is not None else ""
+            print(f"📏 系统提示词: {assembly.tokens} tokens{budget_text}")
+            if assembly.dropped:
+                print(f"   已省略组件: {', '.join(assembly.dropped)}")
             
             task = self.prompt_builder.build_task(
                 perspective=version,
@@ -125,7 +155,20 @@ class FinancialReporter:
             raise
         
         # 创建 Agent 并执行
-        agent = await self._create_agent(stock_code, system_prompt)
+        def on_step(step: int, max_steps: int, tool_names: list):
+            self.events.publish(
+                STEP_PROGRESS, stock_code=stock_code, version=version,
+                step=step, max_steps=max_steps, tools=tool_names
+            )
+        
+        # WriteTool 每次写入后回报摘要；报告定稿后直接使用，无需再读文件计算
+        report_writes = {}
+        def on_write(path: Path, digest: str, changed: bool):
+            stat = path.stat()
+            report_writes[path.resolve()] = (digest, stat.st_mtime_ns, stat.st_size)
+        
+        agent = await self._create_agent(stock_code, system_prompt, on_step=on_step, on_write=on_write)
+        self.events.publish(REPORT_STARTED, stock_code=stock_code, version=version, date=date_str)
         
         try:
             # 如果是增量报告，先让 Agent 阅读上次报告
@@ -145,6 +188,13 @@ class FinancialReporter:
             report_path = self.reports_dir / report_filename
             if not report_path.exists():
                 raise FileNotFoundError(f"Agent未能生成报告文件：{report_filename}")
+            report_digest = self._report_digest(report_path, report_writes)
+            
+            # 报告定稿后预压缩，Web 服务直接下发压缩变体
+            self._precompress_report(report_path)
+            
+            # 为报告引用的图表生成响应式变体
+            await self._build_image_variants(report_path)
             
             # 保存元数据
             metadata = self._save_metadata(
@@ -154,10 +204,21 @@ class FinancialReporter:
                 date_str=date_str,
                 report_filename=report_filename,
                 report_path=report_path,
+                report_digest=report_digest,
                 result=result,
                 status="success"
             )
             
+            # 更新全文检索索引
+            self._index_report(report_filename)
+            
+            # 字段与报告目录条目一致，页面可直接插入
+            self.events.publish(
+                REPORT_COMPLETED, stock_code=stock_code, version=version,
+                filename=report_filename, date=date_str, date_str=date_str_short,
+                timestamp=metadata['timestamp']
+            )
+            
             print(f"\n{'='*60}")
             print(f"✅ {stock_code} {version}版报告生成成功！")
             print(f"📄 报告位置：{report_path}")
@@ -177,15 +238,20 @@ class FinancialReporter:
                 status="failed",
                 error=str(e)
             )
+            self.events.publish(
+                REPORT_FAILED, stock_code=stock_code, version=version, date=date_str, error=str(e)
+            )
             raise
     
-    async def _create_agent(self, stock_code: str, system_prompt: str) -> Agent:
+    async def _create_agent(self, stock_code: str, system_prompt: str, on_step=None, on_write=None) -> Agent:
         """
         创建配置好的Agent实例
         
         Args:
             stock_code: 股票代码
             system_prompt: 系统提示词（由 PromptBuilder 构建）
+            on_step: 每完成一步的进度回调 on_step(step, max_steps, tool_names)
+            on_write: WriteTool 写入成功后的回调 on_write(path, sha256, changed)
         """
         # 1. 创建LLM客户端
         provider = LLMProvider.ANTHROPIC if self.config.llm.provider.lower() == "anthropic" else LLMProvider.OPENAI
@@ -203,7 +269,11 @@ class FinancialReporter:
         # 3. 初始化工具
         tools = []
         tools.extend([
-            WriteTool(workspace_dir=str(self.reports_dir)),
+            WriteTool(
+                workspace_dir=str(self.reports_dir),
+                durability=self.config.tools.write_durability,
+                on_write=on_write,
+            ),
             ReadTool(workspace_dir=str(self.reports_dir)),
         ])
         tools.append(BashTool())
@@ -211,7 +281,7 @@ class FinancialReporter:
         
         # 加载 MCP 工具
         try:
-            mcp_tools = await load_mcp_tools_async()
+            mcp_tools = await load_mcp_tools_async(use_cache=self.config.tools.mcp.tool_cache)
             if mcp_tools:
                 tools.extend(mcp_tools)
                 print(f"✅ 加载了 {len(mcp_tools)} 个 MCP 工具")
@@ -225,6 +295,7 @@ class FinancialReporter:
             tools=tools,
             max_steps=self.config.agent.max_steps,
             workspace_dir=str(self.reports_dir),
+            on_step=on_step,
         )
         
         return agent
@@ -299,6 +370,7 @@ class FinancialReporter:
             metadata['filename'] = kwargs.get('report_filename')
             metadata['filepath'] = str(kwargs.get('report_path'))
             metadata['file_size'] = kwargs.get('report_path').stat().st_size
+            metadata['sha256'] = kwargs.get('report_digest')
             
             result = kwargs.get('result', '')
             metadata['agent_output'] = result[:200] + "..." if len(result) > 200 else result
@@ -315,6 +387,50 @@ class FinancialReporter:
         
         return metadata
     
+    def _report_digest(self, report_path: Path, report_writes: dict) -> str:
+        """报告最终内容的 SHA-256：最后一次写入来自 WriteTool 且之后未被改动时直接复用，否则读文件计算"""
+        stat = report_path.stat()
+        recorded = report_writes.get(report_path.resolve())
+        if recorded is not None and recorded[1:] == (stat.st_mtime_ns, stat.st_size):
+            return recorded[0]
+        return hashlib.sha256(report_path.read_bytes()).hexdigest()
+    
+    def _precompress_report(self, report_path: Path):
+        """为报告生成 gzip（及可选的 brotli）压缩变体，与原文件放在同一目录"""
+        data = report_path.read_bytes()
+        variants = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants["br"] = brotli.compress(data, quality=11)
+        
+        for encoding, compressed in variants.items():
+            target = report_path.with_name(report_path.name + COMPRESSED_SUFFIXES[encoding])
+            # 临时文件 + 原子替换：下载方只会看到完整的旧文件或新文件，不会读到写了一半的压缩体
+            tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+            try:
+                tmp_path.write_bytes(compressed)
+                os.replace(tmp_path, target)
+            except OSError as e:
+                tmp_path.unlink(missing_ok=True)
+                print(f"⚠️  预压缩失败 {target}: {e}")
+    
+    async def _build_image_variants(self, report_path: Path):
+        """在转换进程池中为报告图片生成变体，失败不影响报告生成"""
+        if not self.image_pipeline.enabled:
+            return
+        try:
+            manifest = await asyncio.to_thread(self.image_pipeline.process_report, report_path)
+            if manifest:
+                print(f"🖼️  已生成 {len(manifest)} 张图片的响应式变体")
+        except Exception as e:
+            print(f"⚠️  生成图片变体失败 {report_path.name}: {e}")
+    
+    def _index_report(self, report_filename: str):
+        """把报告加入全文检索索引，失败不影响报告生成"""
+        try:
+            self.search_index.add_report_file(report_filename)
+        except Exception as e:
+            print(f"⚠️  更新检索索引失败 {report_filename}: {e}")
+    
     def get_all_reports(self) -> list:
         """获取所有报告的元数据列表"""
         reports = []
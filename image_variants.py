@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+报告图片响应式变体
+Responsive Image Variants
+报告定稿后为其引用的图表生成多种宽度的 WebP / AVIF 变体，
+按图片内容哈希存放（相同图片只转换一次），并为每篇报告写入 srcset 清单
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow 为可选依赖，缺失时页面直接使用原图
+    Image = None
+    features = None
+
+
+# 变体目录: reports/images/_variants/{内容哈希}/{宽度}w.{格式}
+VARIANTS_DIRNAME = "_variants"
+# 每篇报告的清单: reports/images/_variants/manifests/{报告文件名}.json
+MANIFESTS_DIRNAME = "manifests"
+
+# 报告页正文最宽 900px，覆盖手机、桌面和 2 倍屏
+VARIANT_WIDTHS = (480, 960, 1800)
+IMAGE_SIZES = "(max-width: 900px) 100vw, 900px"
+
+# 格式 -> (MIME 类型, 编码质量)，按优先级排列（<picture> 中靠前的优先）
+VARIANT_FORMATS = {
+    "avif": ("image/avif", 55),
+    "webp": ("image/webp", 80),
+}
+
+# 报告 Markdown 中引用的图片: ![说明](/images/688256/kline.png)
+_IMAGE_REF_PATTERN = re.compile(r'/images/([^\s()"\'<>]+\.(?:png|jpe?g))', re.IGNORECASE)
+# 渲染后的 <img> 标签
+_IMG_TAG_PATTERN = re.compile(r'<img\b[^>]*\bsrc="(/images/[^"]+)"[^>]*?/?>')
+
+
+def available_formats() -> List[str]:
+    """当前 Pillow 支持编码的变体格式"""
+    if Image is None:
+        return []
+    return [fmt for fmt in VARIANT_FORMATS if features.check(fmt)]
+
+
+def content_hash(path: Path) -> str:
+    """图片内容哈希，作为变体目录名"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:24]
+
+
+def build_variants(source_path: str, output_dir: str, formats: List[str], widths: tuple) -> dict:
+    """
+    生成一张图片的全部变体（在进程池中执行）
+
+    图片只解码一次，每个宽度缩放一次后编码为各个格式。
+    变体写完之后才写入 manifest.json，它的存在表示该目录已完整。
+
+    Args:
+        source_path: 原图路径
+        output_dir: 变体目录（按内容哈希命名）
+        formats: 要生成的格式
+        widths: 目标宽度（大于原图宽度的会被跳过）
+
+    Returns:
+        图片清单 {"width", "height", "variants": [{"format", "width", "file", "bytes"}]}
+    """
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+
+    with Image.open(source_path) as image:
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        source_width, source_height = image.size
+
+        # 不放大；原图比最小宽度还窄时只按原尺寸转换格式
+        target_widths = sorted({min(w, source_width) for w in widths})
+
+        variants = []
+        for width in target_widths:
+            height = max(1, round(source_height * width / source_width))
+            resized = image if width == source_width else image.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                filename = f"{width}w.{fmt}"
+                target = output / filename
+                tmp = output / f".{filename}.{os.getpid()}.tmp"
+                resized.save(tmp, format=fmt.upper(), quality=VARIANT_FORMATS[fmt][1])
+                os.replace(tmp, target)
+                variants.append({
+                    "format": fmt,
+                    "width": width,
+                    "file": filename,
+                    "bytes": target.stat().st_size,
+                })
+
+    manifest = {"width": source_width, "height": source_height, "variants": variants}
+    _write_json(output / "manifest.json", manifest)
+    return manifest
+
+
+class ImageVariantPipeline:
+    """为报告引用的图片生成响应式变体
+
+    - 变体按原图内容哈希存放，相同内容的图片（包括被覆盖回原样的图）不会重复转换
+    - 转换在进程池中执行，不占用调用方线程，也不在 Web 请求路径上
+    - 每篇报告保存一份清单，记录定稿时各图片对应的变体；
+      之后同名图片被新一天的图表覆盖，历史报告仍显示当时的图
+    """
+
+    def __init__(self, images_dir, max_workers: Optional[int] = None):
+        """
+        Args:
+            images_dir: 图片目录（reports/images）
+            max_workers: 转换进程数，默认为 CPU 核数
+        """
+        self.images_dir = Path(images_dir)
+        self.variants_dir = self.images_dir / VARIANTS_DIRNAME
+        self.manifests_dir = self.variants_dir / MANIFESTS_DIRNAME
+        self.max_workers = max_workers
+        self.formats = available_formats()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.formats)
+
+    def manifest_path(self, report_filename: str) -> Path:
+        return self.manifests_dir / f"{report_filename}.json"
+
+    def process_report(self, report_path) -> Dict[str, dict]:
+        """
+        为一篇报告引用的图片生成变体并写入报告清单
+
+        Args:
+            report_path: 报告 Markdown 文件路径
+
+        Returns:
+            报告清单 {"/images/...": {"hash", "width", "height", "variants"}}
+        """
+        if not self.enabled:
+            return {}
+
+        report_path = Path(report_path)
+        content = report_path.read_text(encoding="utf-8")
+        sources = list(dict.fromkeys(_IMAGE_REF_PATTERN.findall(content)))
+
+        manifest = self.process_images(sources)
+        self.manifests_dir.mkdir(parents=True, exist_ok=True)
+        _write_json(self.manifest_path(report_path.name), manifest)
+        return manifest
+
+    def process_images(self, relative_paths: List[str]) -> Dict[str, dict]:
+        """
+        为一组图片生成变体，已转换过的内容直接复用
+
+        Args:
+            relative_paths: 相对 images 目录的路径
+
+        Returns:
+            {"/images/{路径}": {"hash", "width", "height", "variants"}}
+        """
+        results = {}
+        pending = {}
+        images_root = self.images_dir.resolve()
+        for relative_path in relative_paths:
+            source = (self.images_dir / relative_path).resolve()
+            # 只处理 images 目录内的原图
+            if not source.is_relative_to(images_root) or not source.is_file():
+                continue
+            if VARIANTS_DIRNAME in source.relative_to(images_root).parts:
+                continue
+            digest = content_hash(source)
+            cached = _read_json(self.variants_dir / digest / "manifest.json")
+            if cached is not None:
+                results[f"/images/{relative_path}"] = {"hash": digest, **cached}
+                continue
+            future = self._pool().submit(
+                build_variants, str(source), str(self.variants_dir / digest), self.formats, VARIANT_WIDTHS
+            )
+            pending[relative_path] = (digest, future)
+
+        for relative_path, (digest, future) in pending.items():
+            try:
+                results[f"/images/{relative_path}"] = {"hash": digest, **future.result()}
+            except Exception as e:
+                print(f"⚠️  生成图片变体失败 {relative_path}: {e}")
+
+        return results
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def shutdown(self):
+        """关闭转换进程池"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def load_report_manifest(images_dir, report_filename: str) -> Optional[dict]:
+    """读取报告清单，不存在时返回 None"""
+    return _read_json(Path(images_dir) / VARIANTS_DIRNAME / MANIFESTS_DIRNAME / f"{report_filename}.json")
+
+
+def responsive_images(html_content: str, manifest: dict) -> str:
+    """
+    把渲染后 HTML 中有变体的 <img> 替换为 <picture>
+
+    原 <img> 保留为回退，并补充尺寸和延迟加载属性。
+
+    Args:
+        html_content: render_markdown 的输出
+        manifest: 报告清单
+
+    Returns:
+        替换后的 HTML
+    """
+    if not manifest:
+        return html_content
+
+    def replace(match):
+        img_tag = match.group(0)
+        entry = manifest.get(html.unescape(match.group(1)))
+        if not entry or not entry.get("variants"):
+            return img_tag
+
+        sources = []
+        for fmt, (mime_type, _) in VARIANT_FORMATS.items():
+            srcset = ", ".join(
+                f"/images/{VARIANTS_DIRNAME}/{entry['hash']}/{variant['file']} {variant['width']}w"
+                for variant in entry["variants"] if variant["format"] == fmt
+            )
+            if srcset:
+                sources.append(f'<source type="{mime_type}" srcset="{srcset}" sizes="{IMAGE_SIZES}">')
+
+        attrs = ' loading="lazy" decoding="async"'
+        if " width=" not in img_tag:
+            attrs += f' width="{entry["width"]}" height="{entry["height"]}"'
+        img_tag = re.sub(r"\s*/?>$", attrs + ">", img_tag, count=1)
+        return f"<picture>{''.join(sources)}{img_tag}</picture>"
+
+    return _IMG_TAG_PATTERN.sub(replace, html_content)
+
+
+def _read_json(path: Path) -> Optional[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"⚠️  读取图片清单失败 {path}: {e}")
+        return None
+
+
+def _write_json(path: Path, data: dict):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def main():
+    """为已有报告补生成图片变体"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="报告图片响应式变体")
+    parser.add_argument("--reports-dir", help="报告存储目录", default="./reports")
+    parser.add_argument("--workers", help="转换进程数", type=int, default=None)
+    args = parser.parse_args()
+
+    reports_dir = Path(args.reports_dir)
+    pipeline = ImageVariantPipeline(reports_dir / "images", max_workers=args.workers)
+    if not pipeline.enabled:
+        print("❌ 需要安装 Pillow 才能生成图片变体: pip install pillow")
+        raise SystemExit(1)
+
+    try:
+        for report_path in sorted(reports_dir.glob("*.md")):
+            manifest = pipeline.process_report(report_path)
+            if manifest:
+                print(f"🖼️  {report_path.name}: {len(manifest)} 张图片")
+    finally:
+        pipeline.shutdown()
+
+
+if __name__ == "__main__":
+    main()
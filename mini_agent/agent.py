@@ -4,7 +4,7 @@ import asyncio
 import json
 from pathlib import Path
 from time import perf_counter
-from typing import Optional
+from typing import Callable, Optional
 
 import tiktoken
 
@@ -53,6 +53,7 @@ class Agent:
         max_steps: int = 50,
         workspace_dir: str = "./workspace",
         token_limit: int = 80000,  # Summary triggered when tokens exceed this value
+        on_step: Optional[Callable[[int, int, list[str]], None]] = None,
     ):
         self.llm = llm_client
         self.tools = {tool.name: tool for tool in tools}
@@ -61,6 +62,8 @@ class Agent:
         self.workspace_dir = Path(workspace_dir)
         # Cancellation event for interrupting agent execution (set externally, e.g., by Esc key)
         self.cancel_event: Optional[asyncio.Event] = None
+        # Progress callback invoked after each completed step: on_step(step, max_steps, tool_names)
+        self.on_step = on_step
 
         # Ensure workspace exists
         self.workspace_dir.mkdir(parents=True, exist_ok=True)
@@ -87,6 +90,15 @@ class Agent:
         """Add a user message to history."""
         self.messages.append(Message(role="user", content=content))
 
+    def _notify_step(self, step: int, tool_names: list[str]):
+        """Report step progress to the on_step callback; callback errors never stop the run."""
+        if self.on_step is None:
+            return
+        try:
+            self.on_step(step, self.max_steps, tool_names)
+        except Exception as e:
+            print(f"{Colors.DIM}⚠️  on_step callback failed: {e}{Colors.RESET}")
+
     def _check_cancelled(self) -> bool:
         """Check if agent execution has been cancelled.
 
@@ -418,6 +430,7 @@ Requirements:
                 step_elapsed = perf_counter() - step_start_time
                 total_elapsed = perf_counter() - run_start_time
                 print(f"\n{Colors.DIM}⏱️  Step {step + 1} completed in {step_elapsed:.2f}s (total: {total_elapsed:.2f}s){Colors.RESET}")
+                self._notify_step(step + 1, [])
                 return response.content
 
             # Check for cancellation before executing tools
@@ -510,6 +523,7 @@ Requirements:
             step_elapsed = perf_counter() - step_start_time
             total_elapsed = perf_counter() - run_start_time
             print(f"\n{Colors.DIM}⏱️  Step {step + 1} completed in {step_elapsed:.2f}s (total: {total_elapsed:.2f}s){Colors.RESET}")
+            self._notify_step(step + 1, [tool_call.function.name for tool_call in response.tool_calls])
 
             step += 1
 
@@ -31,7 +31,7 @@ from mini_agent.agent import Agent
 from mini_agent.config import Config
 from mini_agent.schema import LLMProvider
 from mini_agent.tools.base import Tool
-from mini_agent.tools.bash_tool import BashKillTool, BashOutputTool, BashTool
+from mini_agent.tools.bash_tool import BackgroundShellManager, BashKillTool, BashOutputTool, BashSessionPool, BashTool
 from mini_agent.tools.file_tools import EditTool, ReadTool, WriteTool
 from mini_agent.tools.mcp_loader import cleanup_mcp_connections, load_mcp_tools_async, set_mcp_timeout_config
 from mini_agent.tools.note_tool import SessionNoteTool
@@ -345,7 +345,7 @@ async def initialize_base_tools(config: Config):
 
     # 1. Bash tool and Bash Output tool
     if config.tools.enable_bash:
-        bash_tool = BashTool()
+        bash_tool = BashTool(persistent_session=config.tools.bash_persistent_session)
         tools.append(bash_tool)
         print(f"{Colors.GREEN}✅ Loaded Bash tool{Colors.RESET}")
 
@@ -411,7 +411,7 @@ async def initialize_base_tools(config: Config):
             # Use priority search for mcp.json
             mcp_config_path = Config.find_config_file(config.tools.mcp_config_path)
             if mcp_config_path:
-                mcp_tools = await load_mcp_tools_async(str(mcp_config_path))
+                mcp_tools = await load_mcp_tools_async(str(mcp_config_path), use_cache=mcp_config.tool_cache)
                 if mcp_tools:
                     tools.extend(mcp_tools)
                     print(f"{Colors.GREEN}✅ Loaded {len(mcp_tools)} MCP tools (from: {mcp_config_path}){Colors.RESET}")
@@ -444,8 +444,8 @@ def add_workspace_tools(tools: List[Tool], config: Config, workspace_dir: Path):
         tools.extend(
             [
                 ReadTool(workspace_dir=str(workspace_dir)),
-                WriteTool(workspace_dir=str(workspace_dir)),
-                EditTool(workspace_dir=str(workspace_dir)),
+                WriteTool(workspace_dir=str(workspace_dir), durability=config.tools.write_durability),
+                EditTool(workspace_dir=str(workspace_dir), durability=config.tools.write_durability),
             ]
         )
         print(f"{Colors.GREEN}✅ Loaded file operation tools (workspace: {workspace_dir}){Colors.RESET}")
@@ -797,6 +797,8 @@ async def run_agent(workspace_dir: Path):
     try:
         print(f"{Colors.BRIGHT_CYAN}Cleaning up MCP connections...{Colors.RESET}")
         await cleanup_mcp_connections()
+        await BashSessionPool.close_all()
+        await BackgroundShellManager.terminate_all()
         print(f"{Colors.GREEN}✅ Cleanup complete{Colors.RESET}\n")
     except Exception as e:
         print(f"{Colors.YELLOW}Error during cleanup (can be ignored): {e}{Colors.RESET}\n")
@@ -43,6 +43,7 @@ class MCPConfig(BaseModel):
     connect_timeout: float = 10.0  # Connection timeout (seconds)
     execute_timeout: float = 60.0  # Tool execution timeout (seconds)
     sse_read_timeout: float = 120.0  # SSE read timeout (seconds)
+    tool_cache: bool = True  # Build tools from cached schemas and connect to servers on first use
 
 
 class ToolsConfig(BaseModel):
@@ -50,7 +51,9 @@ class ToolsConfig(BaseModel):
 
     # Basic tools (file operations, bash)
     enable_file_tools: bool = True
+    write_durability: str = "atomic"  # "atomic" | "fsync" | "fsync_dir" (see WRITE_DURABILITY_LEVELS)
     enable_bash: bool = True
+    bash_persistent_session: bool = False  # Run foreground commands in one long-lived bash session
     enable_note: bool = True
 
     # Skills
@@ -144,11 +147,14 @@ class Config(BaseModel):
             connect_timeout=mcp_data.get("connect_timeout", 10.0),
             execute_timeout=mcp_data.get("execute_timeout", 60.0),
             sse_read_timeout=mcp_data.get("sse_read_timeout", 120.0),
+            tool_cache=mcp_data.get("tool_cache", True),
         )
 
         tools_config = ToolsConfig(
             enable_file_tools=tools_data.get("enable_file_tools", True),
+            write_durability=tools_data.get("write_durability", "atomic"),
             enable_bash=tools_data.get("enable_bash", True),
+            bash_persistent_session=tools_data.get("bash_persistent_session", False),
             enable_note=tools_data.get("enable_note", True),
             enable_skills=tools_data.get("enable_skills", True),
             skills_dir=tools_data.get("skills_dir", "./skills"),
@@ -4,16 +4,48 @@ Supports both bash (Unix/Linux/macOS) and PowerShell (Windows).
 """
 
 import asyncio
+import atexit
+import codecs
+import os
 import platform
 import re
+import shlex
+import shutil
+import signal
+import tempfile
 import time
 import uuid
+from collections import deque
 from typing import Any
 
 from pydantic import Field, model_validator
 
 from .base import Tool, ToolResult
 
+# Memory budget for each background shell's buffered output; older lines are evicted to a spill file
+MAX_BUFFERED_OUTPUT_BYTES = 1024 * 1024
+# Size cap for each spill file; lines evicted beyond it are discarded
+MAX_SPILL_BYTES = 64 * 1024 * 1024
+# Bytes requested per read from a process pipe
+READ_CHUNK_SIZE = 64 * 1024
+# Text without a newline longer than this is emitted as a line (e.g. progress bars)
+MAX_PARTIAL_LINE_CHARS = 64 * 1024
+# Foreground output returned to the model per stream; beyond it only head and tail are kept
+MAX_FOREGROUND_OUTPUT_BYTES = 30 * 1024
+# Foreground commands producing more than this (stdout + stderr) are stopped early
+MAX_FOREGROUND_TOTAL_BYTES = 256 * 1024 * 1024
+# How long a pipe may stay idle before checking whether the shell exited while its
+# children still hold the pipe open (process.wait() only returns once the pipe closes)
+EXIT_CHECK_SECONDS = 1.0
+# Commands a persistent shell session runs before it is replaced by a fresh one
+SESSION_MAX_COMMANDS = 500
+# Age (seconds) after which a persistent shell session is replaced by a fresh one
+SESSION_MAX_AGE_SECONDS = 30 * 60
+# How long an interrupted command may take to hand control back to its session shell
+SESSION_INTERRUPT_GRACE_SECONDS = 2.0
+# Persistent shell sessions kept alive at once; the least recently used idle one is closed first
+MAX_PERSISTENT_SESSIONS = 16
+
 
 class BashOutputResult(ToolResult):
     """Bash command execution result with separated stdout and stderr.
@@ -28,6 +60,9 @@ class BashOutputResult(ToolResult):
     stderr: str = Field(description="The command's standard error output")
     exit_code: int = Field(description="The command's exit code")
     bash_id: str | None = Field(default=None, description="Shell process ID (only when run_in_background=True)")
+    dropped_lines: int | None = Field(
+        default=None, description="Background output lines evicted from the buffer before they were read"
+    )
 
     @model_validator(mode="after")
     def format_content(self) -> "BashOutputResult":
@@ -41,6 +76,8 @@ class BashOutputResult(ToolResult):
             output += f"\n[bash_id]:\n{self.bash_id}"
         if self.exit_code:
             output += f"\n[exit_code]:\n{self.exit_code}"
+        if self.dropped_lines:
+            output += f"\n[dropped_lines]:\n{self.dropped_lines}"
 
         if not output:
             output = "(no output)"
@@ -49,31 +86,211 @@ class BashOutputResult(ToolResult):
         return self
 
 
+_spill_dir: str | None = None
+
+
+def get_spill_dir() -> str:
+    """Per-process directory holding spill files; it is removed when the process exits."""
+    global _spill_dir
+    if _spill_dir is None or not os.path.isdir(_spill_dir):
+        _spill_dir = tempfile.mkdtemp(prefix="mini-agent-bash-")
+        atexit.register(shutil.rmtree, _spill_dir, ignore_errors=True)
+    return _spill_dir
+
+
+class LineDecoder:
+    """Incremental UTF-8 decoder that splits a byte stream into lines.
+
+    Multi-byte characters split across chunks are decoded correctly; invalid bytes
+    are replaced. A trailing partial line is held until its newline arrives.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+
+    def feed(self, data: bytes) -> list[str]:
+        """Decode a chunk and return the lines it completes."""
+        text = self._partial + self._decoder.decode(data)
+        lines = text.split("\n")
+        self._partial = lines.pop()
+        if len(self._partial) > MAX_PARTIAL_LINE_CHARS:
+            lines.append(self._partial)
+            self._partial = ""
+        return lines
+
+    def flush(self) -> list[str]:
+        """Return whatever is left once the stream has ended."""
+        text = self._partial + self._decoder.decode(b"", final=True)
+        self._partial = ""
+        return [text] if text else []
+
+
+class OutputCapture:
+    """Size-capped capture of one foreground output stream.
+
+    Output is kept in memory until it exceeds max_bytes. From then on only the head
+    and tail are kept, and the complete stream is written to a temp spill file whose
+    path is reported back to the model.
+    """
+
+    def __init__(self, name: str, max_bytes: int):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._buffer = bytearray()
+        self._head = b""
+        self._tail = bytearray()
+        self.spill_path: str | None = None
+        self._spill_file = None
+
+    @property
+    def truncated(self) -> bool:
+        return self.spill_path is not None
+
+    def feed(self, data: bytes):
+        self.total_bytes += len(data)
+        if self._spill_file is None:
+            self._buffer += data
+            if len(self._buffer) > self.max_bytes:
+                self._start_spill()
+            return
+
+        self._spill_file.write(data)
+        self._tail += data
+        excess = len(self._tail) - self.max_bytes // 2
+        if excess > 0:
+            del self._tail[:excess]
+
+    def _start_spill(self):
+        fd, self.spill_path = tempfile.mkstemp(prefix=f"bash-{self.name}-", suffix=".log", dir=get_spill_dir())
+        self._spill_file = os.fdopen(fd, "wb")
+        self._spill_file.write(self._buffer)
+        half = self.max_bytes // 2
+        self._head = bytes(self._buffer[:half])
+        self._tail = bytearray(self._buffer[-half:])
+        self._buffer = bytearray()
+
+    def close(self):
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def text(self) -> str:
+        """Decoded output; when truncated, head and tail around an omission notice."""
+        if not self.truncated:
+            return self._buffer.decode("utf-8", errors="replace")
+
+        # Cut on character boundaries: drop an incomplete trailing / leading UTF-8 sequence
+        head = codecs.getincrementaldecoder("utf-8")(errors="replace").decode(self._head)
+        tail = bytes(self._tail)
+        skip = 0
+        while skip < min(3, len(tail)) and tail[skip] & 0xC0 == 0x80:
+            skip += 1
+        tail = tail[skip:].decode("utf-8", errors="replace")
+
+        omitted = self.total_bytes - len(self._head) - len(self._tail)
+        notice = f"[... {omitted} bytes of {self.name} omitted; full output ({self.total_bytes} bytes) saved to {self.spill_path} ...]"
+        return f"{head}\n{notice}\n{tail}"
+
+
 class BackgroundShell:
     """Background shell data container.
 
     Pure data class that only stores state and output.
     IO operations are managed externally by BackgroundShellManager.
+
+    Output is kept in a ring buffer bounded by max_buffer_bytes. Lines are addressed by
+    their absolute line number, so the read cursor stays valid after eviction. Evicted
+    lines are appended to a spill file (up to MAX_SPILL_BYTES) so the full log survives.
     """
 
-    def __init__(self, bash_id: str, command: str, process: "asyncio.subprocess.Process", start_time: float):
+    def __init__(
+        self,
+        bash_id: str,
+        command: str,
+        process: "asyncio.subprocess.Process",
+        start_time: float,
+        max_buffer_bytes: int | None = None,
+    ):
         self.bash_id = bash_id
         self.command = command
         self.process = process
         self.start_time = start_time
-        self.output_lines: list[str] = []
+        self.max_buffer_bytes = max_buffer_bytes or MAX_BUFFERED_OUTPUT_BYTES
+        self._lines: deque[tuple[str, int]] = deque()  # (line, size in bytes)
+        self.buffered_bytes = 0
+        self.first_line_index = 0  # Absolute number of the oldest buffered line
+        self.total_lines = 0
         self.last_read_index = 0
+        self.dropped_lines = 0  # Lines evicted before they were read
+        self._unreported_dropped = 0
+        self.spill_path: str | None = None
+        self.spill_bytes = 0
+        self._spill_file = None
         self.status = "running"
         self.exit_code: int | None = None
 
+    @property
+    def output_lines(self) -> list[str]:
+        """Lines currently held in the buffer."""
+        return [line for line, _ in self._lines]
+
     def add_output(self, line: str):
-        """Add new output line."""
-        self.output_lines.append(line)
+        """Add new output line, evicting the oldest lines once over the byte budget."""
+        size = len(line.encode("utf-8", errors="replace")) + 1
+        self._lines.append((line, size))
+        self.buffered_bytes += size
+        self.total_lines += 1
+
+        while self.buffered_bytes > self.max_buffer_bytes and len(self._lines) > 1:
+            evicted, evicted_size = self._lines.popleft()
+            self.buffered_bytes -= evicted_size
+            if self.first_line_index >= self.last_read_index:
+                self.dropped_lines += 1
+                self._unreported_dropped += 1
+            self.first_line_index += 1
+            self._spill(evicted, evicted_size)
+
+    def _spill(self, line: str, size: int):
+        """Append an evicted line to the spill file (created on first use)."""
+        if self.spill_bytes + size > MAX_SPILL_BYTES:
+            return
+        try:
+            if self._spill_file is None:
+                if self.spill_path is None:
+                    fd, self.spill_path = tempfile.mkstemp(
+                        prefix=f"bash-{self.bash_id}-", suffix=".log", dir=get_spill_dir()
+                    )
+                    os.close(fd)
+                self._spill_file = open(self.spill_path, "a", encoding="utf-8", errors="replace")
+            self._spill_file.write(line + "\n")
+            self.spill_bytes += size
+        except OSError:
+            # Spilling is best effort; the line is still counted as dropped
+            self.spill_bytes = MAX_SPILL_BYTES
+
+    def close_spill(self):
+        """Flush and close the spill file; it stays on disk until the shell is killed or the process exits."""
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def remove_spill(self):
+        """Close and delete the spill file (when the shell is killed or forgotten)."""
+        self.close_spill()
+        if self.spill_path is not None:
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+            self.spill_path = None
 
     def get_new_output(self, filter_pattern: str | None = None) -> list[str]:
         """Get new output since last check, optionally filtered by regex."""
-        new_lines = self.output_lines[self.last_read_index :]
-        self.last_read_index = len(self.output_lines)
+        start = max(self.last_read_index - self.first_line_index, 0)
+        new_lines = [self._lines[i][0] for i in range(start, len(self._lines))]
+        self.last_read_index = self.total_lines
 
         if filter_pattern:
             try:
@@ -85,11 +302,26 @@ class BackgroundShell:
 
         return new_lines
 
+    def consume_dropped(self) -> int:
+        """Number of unread lines evicted since the previous call."""
+        dropped, self._unreported_dropped = self._unreported_dropped, 0
+        return dropped
+
+    def dropped_notice(self, dropped: int) -> str:
+        """Header line telling the reader that output was skipped and where to find it."""
+        notice = f"[{dropped} earlier line(s) dropped from the output buffer"
+        if self.spill_path:
+            if self._spill_file is not None:
+                self._spill_file.flush()
+            notice += f"; evicted lines are saved in {self.spill_path}"
+        return notice + "]"
+
     def update_status(self, is_alive: bool, exit_code: int | None = None):
         """Update process status."""
         if not is_alive:
             self.status = "completed" if exit_code == 0 else "failed"
             self.exit_code = exit_code
+            self.close_spill()
         else:
             self.status = "running"
 
@@ -103,6 +335,7 @@ class BackgroundShell:
                 self.process.kill()
         self.status = "terminated"
         self.exit_code = self.process.returncode
+        self.close_spill()
 
 
 class BackgroundShellManager:
@@ -142,26 +375,12 @@ class BackgroundShellManager:
         async def monitor():
             try:
                 process = shell.process
-                # Continuously read output until process ends
-                while process.returncode is None:
-                    try:
-                        if process.stdout:
-                            line = await asyncio.wait_for(process.stdout.readline(), timeout=0.1)
-                            if line:
-                                decoded_line = line.decode("utf-8", errors="replace").rstrip("\n")
-                                shell.add_output(decoded_line)
-                            else:
-                                break
-                    except asyncio.TimeoutError:
-                        await asyncio.sleep(0.1)
-                        continue
-                    except Exception:
-                        await asyncio.sleep(0.1)
-                        continue
+                if process.stdout:
+                    await cls._read_output(process, shell)
 
                 # Process ended, wait for exit code
                 try:
-                    returncode = await process.wait()
+                    returncode = process.returncode if process.returncode is not None else await process.wait()
                 except Exception:
                     returncode = -1
 
@@ -178,6 +397,31 @@ class BackgroundShellManager:
         task = asyncio.create_task(monitor())
         cls._monitor_tasks[bash_id] = task
 
+    @staticmethod
+    async def _read_output(process: "asyncio.subprocess.Process", shell: BackgroundShell) -> None:
+        """Feed process output into the shell chunk by chunk until EOF.
+
+        Each read returns as soon as data arrives, so output is delivered without delay.
+        An idle pipe wakes the reader only every EXIT_CHECK_SECONDS to notice a shell that
+        exited while a child it started still holds the pipe open.
+        """
+        decoder = LineDecoder()
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(process.stdout.read(READ_CHUNK_SIZE), timeout=EXIT_CHECK_SECONDS)
+                except asyncio.TimeoutError:
+                    if process.returncode is not None:
+                        break
+                    continue
+                if not chunk:
+                    break
+                for line in decoder.feed(chunk):
+                    shell.add_output(line)
+        finally:
+            for line in decoder.flush():
+                shell.add_output(line)
+
     @classmethod
     def _cancel_monitor(cls, bash_id: str) -> None:
         """Cancel and remove a monitoring task (internal use only)."""
@@ -207,12 +451,246 @@ class BackgroundShellManager:
         # Terminate the process
         await shell.terminate()
 
-        # Clean up monitoring and remove from manager
+        # Clean up monitoring, spilled output and remove from manager
         cls._cancel_monitor(bash_id)
+        shell.remove_spill()
         cls._remove(bash_id)
 
         return shell
 
+    @classmethod
+    async def terminate_all(cls) -> None:
+        """Terminate every background shell and delete its spill file (call on shutdown)."""
+        for bash_id in list(cls._shells):
+            await cls.terminate(bash_id)
+
+
+class BashSession:
+    """A long-lived bash process that runs foreground commands one at a time.
+
+    Commands are evaluated in the session shell itself, so `cd`, variables and shell
+    functions carry over between calls (`declare`/`local` stay local, as the command is
+    evaluated inside a function). The end of each command is framed by a unique sentinel
+    line on stdout (carrying the exit code and working directory) and on stderr. A
+    timed-out command is interrupted with SIGINT, which the session shell traps, so the
+    session survives; if control does not come back the session is killed.
+
+    The bash process is replaced by a fresh one (started in the last working directory)
+    after max_commands commands, after max_age seconds, or once it has died.
+    """
+
+    def __init__(
+        self,
+        cwd: str | None = None,
+        max_commands: int = SESSION_MAX_COMMANDS,
+        max_age: float = SESSION_MAX_AGE_SECONDS,
+    ):
+        self.cwd = cwd
+        self.max_commands = max_commands
+        self.max_age = max_age
+        self.process: asyncio.subprocess.Process | None = None
+        self.started_at = 0.0
+        self.commands_run = 0
+        self.restarts = 0
+        self.lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    def needs_recycle(self) -> bool:
+        return (
+            not self.alive
+            or self.commands_run >= self.max_commands
+            or time.monotonic() - self.started_at >= self.max_age
+        )
+
+    async def _start(self):
+        cwd = self.cwd if self.cwd and os.path.isdir(self.cwd) else None
+        self.process = await asyncio.create_subprocess_exec(
+            "bash",
+            "--noprofile",
+            "--norc",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd,
+            start_new_session=True,
+        )
+        # Commands run inside a function so that SIGINT, which the session shell traps
+        # while its children get the default disposition back, stops the running
+        # command and unwinds the rest of it without ending the session
+        self.process.stdin.write(
+            b"trap 'return 130 2>/dev/null' INT\n"
+            b'__mini_agent_run() { eval "$__mini_agent_cmd"; }\n'
+        )
+        self.started_at = time.monotonic()
+        self.commands_run = 0
+
+    async def close(self):
+        """Kill the session shell and everything it started."""
+        process, self.process = self.process, None
+        if process is None or process.returncode is not None:
+            return
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        try:
+            await asyncio.wait_for(process.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(
+        self, command: str, timeout: float, stdout: OutputCapture, stderr: OutputCapture, max_total_bytes: int
+    ) -> tuple[int, str]:
+        """Run one command in the session, streaming its output into the captures.
+
+        Returns:
+            (exit_code, status) where status is "ok", "timeout", "limit" or "exited"
+            (the command ended the session shell, e.g. via `exit`)
+        """
+        async with self.lock:
+            if self.needs_recycle():
+                restarted = self.started_at > 0
+                await self.close()
+                await self._start()
+                if restarted:
+                    self.restarts += 1
+                    stdout.feed(
+                        b"[shell session restarted: variables and shell state were reset; "
+                        b"working directory kept]\n"
+                    )
+            return await self._run_locked(command, timeout, stdout, stderr, max_total_bytes)
+
+    async def _run_locked(self, command, timeout, stdout, stderr, max_total_bytes) -> tuple[int, str]:
+        process = self.process
+        sentinel = f"__mini_agent_done_{uuid.uuid4().hex}__"
+        # The command is passed quoted to eval so syntax errors stay inside it; stdin is
+        # detached so it cannot swallow the framing lines that follow. The leading newline
+        # puts the sentinel on its own line and is stripped again when parsing.
+        script = (
+            f"__mini_agent_cmd={shlex.quote(command)}\n"
+            "__mini_agent_run </dev/null\n"
+            f"__mini_agent_ec=$?; printf '\\n%s:%d:%s\\n' '{sentinel}' \"$__mini_agent_ec\" \"$PWD\"; "
+            f"printf '\\n%s\\n' '{sentinel}' >&2\n"
+        )
+        process.stdin.write(script.encode())
+        self.commands_run += 1
+
+        output_limit_hit = asyncio.Event()
+
+        def over_limit() -> bool:
+            if stdout.total_bytes + stderr.total_bytes > max_total_bytes:
+                output_limit_hit.set()
+                return True
+            return False
+
+        readers = asyncio.gather(
+            self._read_frame(process.stdout, f"\n{sentinel}:".encode(), stdout, over_limit),
+            self._read_frame(process.stderr, f"\n{sentinel}".encode(), stderr, over_limit),
+        )
+        limit_wait = asyncio.ensure_future(output_limit_hit.wait())
+        status = "ok"
+        try:
+            await process.stdin.drain()
+            done, _ = await asyncio.wait({readers, limit_wait}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                status = "timeout"
+                # Interrupt only the running command; the session shell traps SIGINT
+                try:
+                    os.killpg(process.pid, signal.SIGINT)
+                except ProcessLookupError:
+                    pass
+                done, _ = await asyncio.wait({readers}, timeout=SESSION_INTERRUPT_GRACE_SECONDS)
+            elif readers not in done:
+                status = "limit"
+        except (BrokenPipeError, ConnectionResetError):
+            done = set()
+        finally:
+            limit_wait.cancel()
+
+        frame = readers.result() if readers in done else None
+        if frame is None or None in frame or status == "limit":
+            # No complete frame: the shell exited, hung after an interrupt or was
+            # stopped for runaway output; it is replaced on the next command
+            exited = process.returncode is not None
+            await self.close()
+            readers.cancel()
+            readers.add_done_callback(lambda f: f.cancelled() or f.exception())
+            if status == "ok":
+                status = "exited" if exited else "timeout"
+            return (process.returncode if exited and process.returncode is not None else -1), status
+
+        exit_code, cwd = frame[0].split(b":", 1)
+        self.cwd = cwd.decode(errors="replace")
+        return int(exit_code), status
+
+    @staticmethod
+    async def _read_frame(stream: asyncio.StreamReader, marker: bytes, capture: OutputCapture, over_limit):
+        """Feed stream into capture up to the sentinel marker.
+
+        Returns the rest of the marker line, or None at EOF. Past the output limit the
+        stream is still drained (and discarded) so the pipe reaches EOF once the session
+        is killed.
+        """
+        pending = bytearray()
+        keep = len(marker) - 1
+        while True:
+            idx = pending.find(marker)
+            if idx >= 0:
+                end = pending.find(b"\n", idx + len(marker))
+                if end >= 0:
+                    capture.feed(bytes(pending[:idx]))
+                    return bytes(pending[idx + len(marker) : end])
+            elif len(pending) > keep:
+                # Everything except a possible partial marker at the end is command output
+                if not over_limit():
+                    capture.feed(bytes(pending[:-keep]))
+                del pending[:-keep]
+
+            chunk = await stream.read(READ_CHUNK_SIZE)
+            if not chunk:
+                capture.feed(bytes(pending))
+                return None
+            pending += chunk
+
+
+class BashSessionPool:
+    """Registry of persistent shell sessions, one per key (each BashTool owns one key)."""
+
+    _sessions: dict[str, BashSession] = {}
+
+    @classmethod
+    def get(cls, key: str, cwd: str | None = None, **options) -> BashSession:
+        """Get the session for key, creating it (and evicting the least recently used
+        idle session beyond MAX_PERSISTENT_SESSIONS) if needed."""
+        session = cls._sessions.pop(key, None)
+        if session is None:
+            session = BashSession(cwd=cwd, **options)
+            idle = [k for k, s in cls._sessions.items() if not s.lock.locked()]
+            for stale in idle[: max(0, len(cls._sessions) + 1 - MAX_PERSISTENT_SESSIONS)]:
+                evicted = cls._sessions.pop(stale)
+                asyncio.ensure_future(evicted.close())
+        # Re-inserting keeps the dict ordered from least to most recently used
+        cls._sessions[key] = session
+        return session
+
+    @classmethod
+    async def close(cls, key: str) -> None:
+        """Close and forget the session for key, if any."""
+        session = cls._sessions.pop(key, None)
+        if session is not None:
+            await session.close()
+
+    @classmethod
+    async def close_all(cls) -> None:
+        """Close every persistent session (call on shutdown)."""
+        sessions = list(cls._sessions.values())
+        cls._sessions.clear()
+        for session in sessions:
+            await session.close()
+
 
 class BashTool(Tool):
     """Execute shell commands in foreground or background.
@@ -222,10 +700,34 @@ class BashTool(Tool):
     - Unix/Linux/macOS: bash
     """
 
-    def __init__(self):
-        """Initialize BashTool with OS-specific shell detection."""
+    def __init__(
+        self,
+        max_output_bytes: int = MAX_FOREGROUND_OUTPUT_BYTES,
+        max_total_output_bytes: int = MAX_FOREGROUND_TOTAL_BYTES,
+        persistent_session: bool = False,
+        session_max_commands: int = SESSION_MAX_COMMANDS,
+        session_max_age: float = SESSION_MAX_AGE_SECONDS,
+    ):
+        """Initialize BashTool with OS-specific shell detection.
+
+        Args:
+            max_output_bytes: Foreground output returned per stream; longer output keeps
+                head and tail and is saved in full to a temp file
+            max_total_output_bytes: Foreground commands are stopped once stdout + stderr
+                exceed this size
+            persistent_session: Run foreground commands in one long-lived bash session owned
+                by this tool instead of a new process per command (Unix only); working
+                directory and exported variables persist between commands
+            session_max_commands: Commands after which the session is replaced by a fresh one
+            session_max_age: Seconds after which the session is replaced by a fresh one
+        """
         self.is_windows = platform.system() == "Windows"
         self.shell_name = "PowerShell" if self.is_windows else "bash"
+        self.max_output_bytes = max_output_bytes
+        self.max_total_output_bytes = max_total_output_bytes
+        self.persistent_session = persistent_session and not self.is_windows
+        self.session_key = f"bash-{uuid.uuid4().hex[:8]}"
+        self.session_options = {"max_commands": session_max_commands, "max_age": session_max_age}
 
     @property
     def name(self) -> str:
@@ -248,6 +750,7 @@ Tips:
   - Chain dependent commands with semicolon: git add . ; git commit -m "msg"
   - Use absolute paths instead of cd when possible
   - For background commands, monitor with bash_output and terminate with bash_kill
+  - Long output is cut to its beginning and end; the full output is saved to a file whose path is shown
 
 Examples:
   - git status
@@ -267,13 +770,21 @@ Tips:
   - Chain dependent commands with &&: git add . && git commit -m "msg"
   - Use absolute paths instead of cd when possible
   - For background commands, monitor with bash_output and terminate with bash_kill
+  - Long output is cut to its beginning and end; the full output is saved to a file whose path is shown
 
 Examples:
   - git status
   - npm test
   - python3 -m http.server 8080 (with run_in_background=true)"""
         }
-        return shell_examples["Windows"] if self.is_windows else shell_examples["Unix"]
+        if self.is_windows:
+            return shell_examples["Windows"]
+        if self.persistent_session:
+            return shell_examples["Unix"].replace(
+                "  - Use absolute paths instead of cd when possible\n",
+                "  - Foreground commands share one shell session: cd and exported variables persist between calls\n",
+            )
+        return shell_examples["Unix"]
 
     @property
     def parameters(self) -> dict[str, Any]:
@@ -369,53 +880,11 @@ Examples:
                     bash_id=bash_id,
                 )
 
-            else:
-                # Foreground execution: Create isolated process
-                if self.is_windows:
-                    process = await asyncio.create_subprocess_exec(
-                        *shell_cmd,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE,
-                    )
-                else:
-                    process = await asyncio.create_subprocess_shell(
-                        shell_cmd,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE,
-                    )
-
-                try:
-                    stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
-                except asyncio.TimeoutError:
-                    process.kill()
-                    error_msg = f"Command timed out after {timeout} seconds"
-                    return BashOutputResult(
-                        success=False,
-                        error=error_msg,
-                        stdout="",
-                        stderr=error_msg,
-                        exit_code=-1,
-                    )
-
-                # Decode output
-                stdout_text = stdout.decode("utf-8", errors="replace")
-                stderr_text = stderr.decode("utf-8", errors="replace")
-
-                # Create result (content auto-formatted by model_validator)
-                is_success = process.returncode == 0
-                error_msg = None
-                if not is_success:
-                    error_msg = f"Command failed with exit code {process.returncode}"
-                    if stderr_text:
-                        error_msg += f"\n{stderr_text.strip()}"
+            elif self.persistent_session:
+                return await self._run_in_session(command, timeout)
 
-                return BashOutputResult(
-                    success=is_success,
-                    error=error_msg,
-                    stdout=stdout_text,
-                    stderr=stderr_text,
-                    exit_code=process.returncode or 0,
-                )
+            else:
+                return await self._run_foreground(shell_cmd, timeout)
 
         except Exception as e:
             return BashOutputResult(
@@ -427,6 +896,146 @@ Examples:
             )
 
 
+    async def _run_foreground(self, shell_cmd, timeout: int) -> BashOutputResult:
+        """Run a foreground command, streaming its output into size-capped captures."""
+        # Foreground execution: Create isolated process (in its own process group on Unix,
+        # so the whole pipeline can be stopped on timeout or runaway output)
+        if self.is_windows:
+            process = await asyncio.create_subprocess_exec(
+                *shell_cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        else:
+            process = await asyncio.create_subprocess_shell(
+                shell_cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
+            )
+
+        stdout = OutputCapture("stdout", self.max_output_bytes)
+        stderr = OutputCapture("stderr", self.max_output_bytes)
+        output_limit_hit = asyncio.Event()
+
+        async def pump(stream: asyncio.StreamReader, capture: OutputCapture):
+            while chunk := await stream.read(READ_CHUNK_SIZE):
+                # Past the limit, keep draining (and discarding) so the killed process's
+                # pipes reach EOF and process.wait() can return
+                if output_limit_hit.is_set():
+                    continue
+                capture.feed(chunk)
+                if stdout.total_bytes + stderr.total_bytes > self.max_total_output_bytes:
+                    output_limit_hit.set()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        pumps = asyncio.gather(pump(process.stdout, stdout), pump(process.stderr, stderr))
+        limit_wait = asyncio.ensure_future(output_limit_hit.wait())
+        timed_out = False
+        try:
+            done, _ = await asyncio.wait({pumps, limit_wait}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                timed_out = True
+            elif pumps in done:
+                pumps.result()
+                await asyncio.wait_for(process.wait(), timeout=max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            timed_out = True
+        finally:
+            limit_wait.cancel()
+            if process.returncode is None:
+                self._kill(process)
+                try:
+                    await asyncio.wait_for(process.wait(), timeout=5)
+                except asyncio.TimeoutError:
+                    pass
+            pumps.cancel()
+            stdout.close()
+            stderr.close()
+
+        if timed_out:
+            status = "timeout"
+        elif output_limit_hit.is_set():
+            status = "limit"
+        else:
+            status = "ok"
+        return self._build_result(stdout, stderr, process.returncode, status, timeout)
+
+    async def _run_in_session(self, command: str, timeout: int) -> BashOutputResult:
+        """Run a foreground command in this tool's persistent bash session."""
+        session = BashSessionPool.get(self.session_key, cwd=os.getcwd(), **self.session_options)
+        stdout = OutputCapture("stdout", self.max_output_bytes)
+        stderr = OutputCapture("stderr", self.max_output_bytes)
+        try:
+            exit_code, status = await session.run(command, timeout, stdout, stderr, self.max_total_output_bytes)
+        finally:
+            stdout.close()
+            stderr.close()
+        if status == "exited":
+            status = "ok"
+        return self._build_result(stdout, stderr, exit_code, status, timeout)
+
+    async def close_session(self) -> None:
+        """Close this tool's persistent bash session, if one was started."""
+        await BashSessionPool.close(self.session_key)
+
+    def _build_result(
+        self, stdout: OutputCapture, stderr: OutputCapture, returncode: int | None, status: str, timeout: int
+    ) -> BashOutputResult:
+        """Turn captured output and how the command ended into a BashOutputResult."""
+        stdout_text = stdout.text()
+        stderr_text = stderr.text()
+
+        if status == "timeout":
+            error_msg = f"Command timed out after {timeout} seconds"
+            return BashOutputResult(
+                success=False,
+                error=error_msg,
+                stdout=stdout_text,
+                stderr=f"{stderr_text}\n{error_msg}" if stderr_text else error_msg,
+                exit_code=-1,
+            )
+
+        if status == "limit":
+            error_msg = (
+                f"Command stopped after producing more than {self.max_total_output_bytes} bytes of output; "
+                f"output so far is saved to {stdout.spill_path or stderr.spill_path}"
+            )
+            return BashOutputResult(
+                success=False,
+                error=error_msg,
+                stdout=stdout_text,
+                stderr=f"{stderr_text}\n{error_msg}" if stderr_text else error_msg,
+                exit_code=-1,
+            )
+
+        # Create result (content auto-formatted by model_validator)
+        is_success = returncode == 0
+        error_msg = None
+        if not is_success:
+            error_msg = f"Command failed with exit code {returncode}"
+            if stderr_text:
+                error_msg += f"\n{stderr_text.strip()}"
+
+        return BashOutputResult(
+            success=is_success,
+            error=error_msg,
+            stdout=stdout_text,
+            stderr=stderr_text,
+            exit_code=returncode or 0,
+        )
+
+    def _kill(self, process: "asyncio.subprocess.Process"):
+        """Kill a foreground command, including any children in its process group."""
+        try:
+            if self.is_windows:
+                process.kill()
+            else:
+                os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
 class BashOutputTool(Tool):
     """Retrieve output from background bash shells."""
 
@@ -501,6 +1110,9 @@ class BashOutputTool(Tool):
 
             # Get new output
             new_lines = bg_shell.get_new_output(filter_pattern=filter_str)
+            dropped = bg_shell.consume_dropped()
+            if dropped:
+                new_lines.insert(0, bg_shell.dropped_notice(dropped))
             stdout = "\n".join(new_lines) if new_lines else ""
 
             return BashOutputResult(
@@ -509,6 +1121,7 @@ class BashOutputTool(Tool):
                 stderr="",  # Background shells combine stdout/stderr
                 exit_code=bg_shell.exit_code if bg_shell.exit_code is not None else 0,
                 bash_id=bash_id,
+                dropped_lines=bg_shell.dropped_lines if bg_shell.status != "running" else None,
             )
 
         except Exception as e:
@@ -569,11 +1182,15 @@ class BashKillTool(Tool):
             bg_shell = BackgroundShellManager.get(bash_id)
             if bg_shell:
                 remaining_lines = bg_shell.get_new_output()
+                dropped = bg_shell.consume_dropped()
             else:
                 remaining_lines = []
+                dropped = 0
 
-            # Terminate through manager (handles all cleanup)
+            # Terminate through manager (handles all cleanup, including the spill file)
             bg_shell = await BackgroundShellManager.terminate(bash_id)
+            if dropped:
+                remaining_lines.insert(0, bg_shell.dropped_notice(dropped))
 
             # Get remaining output
             stdout = "\n".join(remaining_lines) if remaining_lines else ""
@@ -584,6 +1201,7 @@ class BashKillTool(Tool):
                 stderr="",
                 exit_code=bg_shell.exit_code if bg_shell.exit_code is not None else 0,
                 bash_id=bash_id,
+                dropped_lines=bg_shell.dropped_lines,
             )
 
         except ValueError as e:
@@ -1,12 +1,53 @@
 """File operation tools."""
 
+import bisect
+import functools
+import hashlib
+import mmap
+import os
+import re
+import uuid
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 import tiktoken
 
 from .base import Tool, ToolResult
 
+# Characters encoded per step while counting tokens; counting stops once the limit is exceeded
+TOKEN_COUNT_CHUNK_CHARS = 16 * 1024
+# Bytes between line-index checkpoints; a paged read scans at most about this far
+# past the nearest checkpoint before reaching its first line
+LINE_INDEX_STRIDE = 64 * 1024
+# Line indexes kept in memory, keyed by path and invalidated when mtime or size change
+MAX_CACHED_LINE_INDEXES = 64
+# Durability levels for file writes. All replace the file atomically (temp file + rename),
+# so a crash never leaves it half-written. "fsync" also flushes the data to disk before
+# the rename; "fsync_dir" additionally flushes the directory so the rename survives power loss.
+WRITE_DURABILITY_LEVELS = ("atomic", "fsync", "fsync_dir")
+
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding():
+    """cl100k_base encoder, loaded once per process; None (also cached) if tiktoken cannot load it."""
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def _split_chunks(text: str, start: int, size: int):
+    """Yield (chunk_start, chunk_end) spans of about size characters, ending after a newline when possible."""
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            newline = text.rfind("\n", start, end)
+            if newline >= start:
+                end = newline + 1
+        yield start, end
+        start = end
+
 
 def truncate_text_by_tokens(
     text: str,
@@ -17,6 +58,12 @@ def truncate_text_by_tokens(
     When text exceeds the specified token limit, performs intelligent truncation
     by keeping the front and back parts while truncating the middle.
 
+    Every token covers at least one UTF-8 byte, so text with no more bytes than
+    max_tokens is returned without encoding. Otherwise the text is encoded in chunks
+    only until the limit is exceeded, and just the head and tail windows are encoded
+    to cut them; the total token count of huge inputs is estimated from those windows.
+    Without tiktoken, tokens are estimated as 2.5 characters each.
+
     Args:
         text: Text to be truncated
         max_tokens: Maximum token limit
@@ -29,37 +76,234 @@ def truncate_text_by_tokens(
         >>> truncated = truncate_text_by_tokens(text, 64000)
         >>> print(truncated)
     """
-    encoding = tiktoken.get_encoding("cl100k_base")
-    token_count = len(encoding.encode(text))
-
-    # Return original text if under limit
-    if token_count <= max_tokens:
+    # Fast path: provably under the limit (checked on characters first, then bytes;
+    # text with more characters than max_tokens also has more bytes)
+    if len(text) <= max_tokens and (len(text) * 4 <= max_tokens or len(text.encode("utf-8")) <= max_tokens):
         return text
 
-    # Calculate token/character ratio for approximation
-    char_count = len(text)
-    ratio = token_count / char_count
-
-    # Keep head and tail mode: allocate half space for each (with 5% safety margin)
-    chars_per_half = int((max_tokens / 2) / ratio * 0.95)
+    # Each half keeps this many tokens (5% safety margin)
+    half_tokens = int(max_tokens / 2 * 0.95)
+
+    encoding = _get_encoding()
+    if encoding is None:
+        estimated = int(len(text) / 2.5)
+        if estimated <= max_tokens:
+            return text
+        chars_per_half = int(half_tokens * 2.5)
+        head_part = text[:chars_per_half]
+        tail_part = text[-chars_per_half:] if chars_per_half else ""
+        token_note = f"~{estimated}"
+    else:
+        # Count in chunks and stop as soon as the limit is exceeded; the tokens seen so
+        # far cover the head window
+        head_tokens: list[int] = []
+        head_chars = 0
+        for chunk_start, chunk_end in _split_chunks(text, 0, TOKEN_COUNT_CHUNK_CHARS):
+            head_tokens += encoding.encode(text[chunk_start:chunk_end], disallowed_special=())
+            head_chars = chunk_end
+            if len(head_tokens) > max_tokens:
+                break
+
+        if head_chars == len(text):
+            # Fully encoded: confirm with one exact count (chunk boundaries can add a token or two)
+            token_count = len(head_tokens)
+            if token_count > max_tokens:
+                token_count = len(encoding.encode(text, disallowed_special=()))
+            if token_count <= max_tokens:
+                return text
+            token_note = str(token_count)
+        else:
+            token_note = None
+
+        # Windows are a prefix / suffix of valid UTF-8, so ignoring errors only drops a
+        # character split at the cut
+        head_part = encoding.decode_bytes(head_tokens[:half_tokens]).decode("utf-8", errors="ignore")
+
+        # Tail window: size it from the head's characters-per-token ratio and widen it
+        # until it holds enough tokens (never reaching back into the kept head)
+        room = len(text) - len(head_part)
+        chars_per_token = head_chars / max(len(head_tokens), 1)
+        tail_chars = int(half_tokens * chars_per_token * 1.2) + 1
+        while True:
+            tail_chars = min(tail_chars, room)
+            tail_tokens = encoding.encode(text[-tail_chars:], disallowed_special=()) if tail_chars > 0 else []
+            if len(tail_tokens) >= half_tokens or tail_chars >= room:
+                break
+            tail_chars *= 2
+        tail_part = encoding.decode_bytes(tail_tokens[-half_tokens:]).decode("utf-8", errors="ignore") if half_tokens else ""
+
+        if token_note is None:
+            # Sampled estimate from the encoded head and tail windows
+            sampled_chars = head_chars + tail_chars
+            sampled_tokens = len(head_tokens) + len(tail_tokens)
+            token_note = f"~{int(len(text) * sampled_tokens / max(sampled_chars, 1))}"
 
     # Truncate front part: find nearest newline
-    head_part = text[:chars_per_half]
     last_newline_head = head_part.rfind("\n")
     if last_newline_head > 0:
         head_part = head_part[:last_newline_head]
 
     # Truncate back part: find nearest newline
-    tail_part = text[-chars_per_half:]
     first_newline_tail = tail_part.find("\n")
     if first_newline_tail > 0:
         tail_part = tail_part[first_newline_tail + 1 :]
 
     # Combine result
-    truncation_note = f"\n\n... [Content truncated: {token_count} tokens -> ~{max_tokens} tokens limit] ...\n\n"
+    truncation_note = f"\n\n... [Content truncated: {token_note} tokens -> ~{max_tokens} tokens limit] ...\n\n"
     return head_part + truncation_note + tail_part
 
 
+class LineIndex:
+    """Sparse line-offset index of a file, used to slice line ranges out of a memory map.
+
+    Roughly every LINE_INDEX_STRIDE bytes a checkpoint records where a line starts and
+    its line number, so the index of a 1 GB file takes a few hundred KB. Reading a range
+    of lines bisects to the nearest checkpoint and scans forward over at most one stride
+    plus the requested lines, instead of reading the whole file.
+
+    Indexes are cached per path and rebuilt when the file's mtime or size changes.
+    Lines are split on "\n" (CRLF included); the scan also notes whether the file has
+    a lone "\r" (classic Mac line ending), which only text-mode reading splits on.
+    """
+
+    _cache: "OrderedDict[str, LineIndex]" = OrderedDict()
+
+    def __init__(
+        self,
+        mtime_ns: int,
+        size: int,
+        line_numbers: list[int],
+        offsets: list[int],
+        total_lines: int,
+        lone_cr: bool = False,
+    ):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.line_numbers = line_numbers
+        self.offsets = offsets
+        self.total_lines = total_lines
+        self.lone_cr = lone_cr
+
+    @classmethod
+    def build(cls, f, stat: os.stat_result) -> "LineIndex":
+        """Scan an open binary file once, counting newlines and recording checkpoints.
+
+        Plain chunked reads are used rather than the memory map, so indexing a large
+        file does not leave it mapped into the process.
+        """
+        size = stat.st_size
+        line_numbers, offsets = [0], [0]
+        newlines = 0
+        pos = 0
+        # Set at a stride boundary that falls mid-line: checkpoint the next line start
+        pending = False
+        last_byte = 0x0A
+        # Carriage returns not followed by "\n", counted across chunk boundaries
+        lone_crs = 0
+
+        def checkpoint(number: int, start: int):
+            if offsets[-1] < start < size:
+                line_numbers.append(number)
+                offsets.append(start)
+
+        f.seek(0)
+        while chunk := f.read(LINE_INDEX_STRIDE):
+            if pending:
+                newline = chunk.find(b"\n")
+                if newline >= 0:
+                    checkpoint(newlines + 1, pos + newline + 1)
+                    pending = False
+            newlines += chunk.count(b"\n")
+            lone_crs += chunk.count(b"\r") - chunk.count(b"\r\n")
+            if last_byte == 0x0D and chunk[0] == 0x0A:
+                lone_crs -= 1
+            pos += len(chunk)
+            last_byte = chunk[-1]
+            if last_byte == 0x0A:
+                checkpoint(newlines, pos)
+            else:
+                pending = True
+
+        total_lines = newlines + (1 if pos and last_byte != 0x0A else 0)
+        return cls(stat.st_mtime_ns, pos, line_numbers, offsets, total_lines, lone_cr=lone_crs > 0)
+
+    @classmethod
+    def for_file(cls, path: Path, f, stat: os.stat_result) -> "LineIndex":
+        """Get the cached index for an open file, rebuilding it if the file changed."""
+        key = str(path.resolve())
+        index = cls._cache.get(key)
+        if index is None or (index.mtime_ns, index.size) != (stat.st_mtime_ns, stat.st_size):
+            index = cls.build(f, stat)
+            cls._cache[key] = index
+            while len(cls._cache) > MAX_CACHED_LINE_INDEXES:
+                cls._cache.popitem(last=False)
+        cls._cache.move_to_end(key)
+        return index
+
+    def byte_range(self, mm: mmap.mmap, start: int, end: int) -> tuple[int, int]:
+        """Byte span of lines [start, end) (0-indexed, end exclusive, within total_lines)."""
+        checkpoint = bisect.bisect_right(self.line_numbers, start) - 1
+        pos = self.offsets[checkpoint]
+        for _ in range(start - self.line_numbers[checkpoint]):
+            pos = mm.find(b"\n", pos) + 1
+        begin = pos
+        for _ in range(end - start):
+            newline = mm.find(b"\n", pos)
+            if newline < 0:
+                return begin, len(mm)
+            pos = newline + 1
+        return begin, pos
+
+
+def _line_window(start: int, limit: int | None, total_lines: int) -> tuple[int, int]:
+    """Clamp [start, start + limit) the way lines[start:end] slicing did for offset / limit."""
+    end = min((start + limit) if limit else total_lines, total_lines)
+    if end < 0:
+        # Same slice semantics as lines[start:end] for negative offsets / limits
+        end += total_lines
+    return max(start, 0), end
+
+
+def read_lines(file_path: Path, offset: int | None = None, limit: int | None = None) -> tuple[int, list[str]]:
+    """Read a window of lines from a UTF-8 text file without loading the whole file.
+
+    Line endings are "\n", "\r\n" and a lone "\r", as in text-mode reading. Files that
+    contain a lone "\r" (classic Mac line endings) are rare and are read in text mode
+    instead of through the line index.
+
+    Args:
+        file_path: File to read
+        offset: Starting line number (1-indexed); None reads from the start
+        limit: Number of lines; None reads to the end
+
+    Returns:
+        (index of the first returned line, 0-indexed; lines without their line endings)
+    """
+    start = (offset - 1) if offset else 0
+    with open(file_path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        if stat.st_size == 0:
+            return max(start, 0), []
+        index = LineIndex.for_file(file_path, f, stat)
+        if index.lone_cr:
+            with open(file_path, encoding="utf-8") as text_file:
+                lines = [line.rstrip("\n") for line in text_file]
+            start, end = _line_window(start, limit, len(lines))
+            return start, lines[start:end]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start, end = _line_window(start, limit, index.total_lines)
+            if start >= end:
+                return start, []
+            begin, stop = index.byte_range(mm, start, end)
+            text = mm[begin:stop].decode("utf-8")
+
+    lines = text.split("\n")
+    if text.endswith("\n"):
+        lines.pop()
+    # Match text-mode reading, which turns CRLF line endings into "\n"
+    return start, [line[:-1] if line.endswith("\r") else line for line in lines]
+
+
 class ReadTool(Tool):
     """Read file content."""
 
@@ -120,26 +364,11 @@ class ReadTool(Tool):
                     error=f"File not found: {path}",
                 )
 
-            # Read file content with line numbers
-            with open(file_path, encoding="utf-8") as f:
-                lines = f.readlines()
-
-            # Apply offset and limit
-            start = (offset - 1) if offset else 0
-            end = (start + limit) if limit else len(lines)
-            if start < 0:
-                start = 0
-            if end > len(lines):
-                end = len(lines)
-
-            selected_lines = lines[start:end]
+            # Read only the requested lines (offset / limit) through the cached line index
+            start, selected_lines = read_lines(file_path, offset, limit)
 
             # Format with line numbers (1-indexed)
-            numbered_lines = []
-            for i, line in enumerate(selected_lines, start=start + 1):
-                # Remove trailing newline for formatting
-                line_content = line.rstrip("\n")
-                numbered_lines.append(f"{i:6d}|{line_content}")
+            numbered_lines = [f"{i:6d}|{line}" for i, line in enumerate(selected_lines, start=start + 1)]
 
             content = "\n".join(numbered_lines)
 
@@ -152,16 +381,68 @@ class ReadTool(Tool):
             return ToolResult(success=False, content="", error=str(e))
 
 
+def atomic_write_bytes(file_path: Path, data: bytes, durability: str = "atomic") -> None:
+    """Replace file_path with data so readers see either the old or the new content.
+
+    Data goes to a temp file in the same directory, which then replaces the target via
+    os.replace. An existing file keeps its permissions; a symlink is written through.
+
+    Args:
+        file_path: File to write
+        data: Complete new content
+        durability: One of WRITE_DURABILITY_LEVELS
+    """
+    if file_path.is_symlink():
+        file_path = file_path.resolve()
+    tmp_path = file_path.with_name(f".{file_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp_path, "xb") as f:
+            f.write(data)
+            if durability != "atomic":
+                f.flush()
+                os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, file_path.stat().st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    if durability == "fsync_dir" and hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(file_path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
 class WriteTool(Tool):
     """Write content to a file."""
 
-    def __init__(self, workspace_dir: str = "."):
+    def __init__(
+        self,
+        workspace_dir: str = ".",
+        durability: str = "atomic",
+        on_write: Callable[[Path, str, bool], None] | None = None,
+    ):
         """Initialize WriteTool with workspace directory.
 
         Args:
             workspace_dir: Base directory for resolving relative paths
+            durability: One of WRITE_DURABILITY_LEVELS ("atomic", "fsync", "fsync_dir")
+            on_write: Called as on_write(path, sha256_hex, changed) once a write succeeds;
+                changed is False when the file already had this content and was left alone
         """
+        if durability not in WRITE_DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level: {durability} (expected one of {WRITE_DURABILITY_LEVELS})")
         self.workspace_dir = Path(workspace_dir).absolute()
+        self.durability = durability
+        self.on_write = on_write
+        # (mtime_ns, size, sha256) of files seen by this tool, so unchanged rewrites are
+        # detected without reading the file again
+        self._digests: dict[Path, tuple[int, int, str]] = {}
 
     @property
     def name(self) -> str:
@@ -203,22 +484,64 @@ class WriteTool(Tool):
             # Create parent directories if they don't exist
             file_path.parent.mkdir(parents=True, exist_ok=True)
 
-            file_path.write_text(content, encoding="utf-8")
-            return ToolResult(success=True, content=f"Successfully wrote to {file_path}")
+            # Same newline translation as writing in text mode
+            if os.linesep != "\n":
+                content = content.replace("\n", os.linesep)
+            data = content.encode("utf-8")
+            digest = hashlib.sha256(data).hexdigest()
+
+            changed = not self._has_content(file_path, len(data), digest)
+            if changed:
+                atomic_write_bytes(file_path, data, self.durability)
+                stat = file_path.stat()
+                self._digests[file_path] = (stat.st_mtime_ns, stat.st_size, digest)
+
+            message = f"Successfully wrote to {file_path}"
+            if not changed:
+                message += " (content unchanged, write skipped)"
+            if self.on_write is not None:
+                try:
+                    self.on_write(file_path, digest, changed)
+                except Exception as e:
+                    message += f" (post-write hook failed: {e})"
+            return ToolResult(success=True, content=message)
         except Exception as e:
             return ToolResult(success=False, content="", error=str(e))
 
+    def _has_content(self, file_path: Path, size: int, digest: str) -> bool:
+        """Whether file_path already holds content with this size and SHA-256."""
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            return False
+        if stat.st_size != size:
+            return False
+        cached = self._digests.get(file_path)
+        if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+            cached = (stat.st_mtime_ns, stat.st_size, hashlib.sha256(file_path.read_bytes()).hexdigest())
+            self._digests[file_path] = cached
+        return cached[2] == digest
+
 
 class EditTool(Tool):
-    """Edit file by replacing text."""
+    """Edit file by replacing text.
 
-    def __init__(self, workspace_dir: str = "."):
+    Several replacements can be applied in one call. All of them are located in a single
+    regex scan, checked for uniqueness and overlap, applied in one pass and written
+    atomically once; if any edit is invalid, the file is left untouched.
+    """
+
+    def __init__(self, workspace_dir: str = ".", durability: str = "atomic"):
         """Initialize EditTool with workspace directory.
 
         Args:
             workspace_dir: Base directory for resolving relative paths
+            durability: One of WRITE_DURABILITY_LEVELS ("atomic", "fsync", "fsync_dir")
         """
+        if durability not in WRITE_DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level: {durability} (expected one of {WRITE_DURABILITY_LEVELS})")
         self.workspace_dir = Path(workspace_dir).absolute()
+        self.durability = durability
 
     @property
     def name(self) -> str:
@@ -229,7 +552,9 @@ class EditTool(Tool):
         return (
             "Perform exact string replacement in a file. The old_str must match exactly "
             "and appear uniquely in the file, otherwise the operation will fail. "
-            "You must read the file first before editing. Preserve exact indentation from the source."
+            "You must read the file first before editing. Preserve exact indentation from the source. "
+            "To make several changes to one file, pass them together in `edits` instead of calling this "
+            "tool repeatedly: they are applied all-or-nothing in a single write and a compact diff is returned."
         )
 
     @property
@@ -249,13 +574,41 @@ class EditTool(Tool):
                     "type": "string",
                     "description": "Replacement string (use for refactoring, renaming, etc.)",
                 },
+                "edits": {
+                    "type": "array",
+                    "description": "Multiple replacements to apply at once (instead of old_str/new_str). "
+                    "Each old_str must be unique in the file and edits must not overlap.",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "old_str": {"type": "string", "description": "Exact string to find (must be unique in file)"},
+                            "new_str": {"type": "string", "description": "Replacement string"},
+                        },
+                        "required": ["old_str", "new_str"],
+                    },
+                },
             },
-            "required": ["path", "old_str", "new_str"],
+            "required": ["path"],
         }
 
-    async def execute(self, path: str, old_str: str, new_str: str) -> ToolResult:
+    async def execute(
+        self,
+        path: str,
+        old_str: str | None = None,
+        new_str: str | None = None,
+        edits: list[dict[str, str]] | None = None,
+    ) -> ToolResult:
         """Execute edit file."""
         try:
+            if edits is None:
+                if old_str is None or new_str is None:
+                    return ToolResult(success=False, content="", error="Provide old_str and new_str, or a list of edits")
+                edits = [{"old_str": old_str, "new_str": new_str}]
+            elif old_str is not None or new_str is not None:
+                return ToolResult(success=False, content="", error="Provide either old_str/new_str or edits, not both")
+            if not edits:
+                return ToolResult(success=False, content="", error="No edits given")
+
             file_path = Path(path)
             # Resolve relative paths relative to workspace_dir
             if not file_path.is_absolute():
@@ -269,17 +622,116 @@ class EditTool(Tool):
                 )
 
             content = file_path.read_text(encoding="utf-8")
+            pairs = [(edit["old_str"], edit["new_str"]) for edit in edits]
+
+            spans, error = self._locate(content, [old for old, _ in pairs])
+            if error:
+                return ToolResult(success=False, content="", error=error)
+
+            # Apply every replacement in one pass over the spans, in file order
+            pieces = []
+            pos = 0
+            for start, end, number in spans:
+                pieces.append(content[pos:start])
+                pieces.append(pairs[number][1])
+                pos = end
+            pieces.append(content[pos:])
+            new_content = "".join(pieces)
+
+            if os.linesep != "\n":
+                new_content = new_content.replace("\n", os.linesep)
+            atomic_write_bytes(file_path, new_content.encode("utf-8"), self.durability)
+
+            summary = f"Successfully edited {file_path}"
+            if len(pairs) > 1:
+                summary += f" ({len(pairs)} edits)"
+            return ToolResult(success=True, content=summary + "\n" + self._diff_summary(content, spans, pairs))
+        except Exception as e:
+            return ToolResult(success=False, content="", error=str(e))
 
-            if old_str not in content:
-                return ToolResult(
-                    success=False,
-                    content="",
-                    error=f"Text not found in file: {old_str}",
-                )
+    @staticmethod
+    def _locate(content: str, olds: list[str]) -> tuple[list[tuple[int, int, int]], str | None]:
+        """Find each old string's unique span with one scan of content.
 
-            new_content = content.replace(old_str, new_str)
-            file_path.write_text(new_content, encoding="utf-8")
+        Returns:
+            ([(start, end, edit_number)] sorted by start, None), or ([], error message)
+        """
+        single = len(olds) == 1
+
+        def label(number: int) -> str:
+            return "" if single else f"Edit #{number + 1}: "
+
+        for number, old in enumerate(olds):
+            if not old:
+                return [], f"{label(number)}old_str must not be empty"
+        # Two patterns matching at the same position would make one a substring of the
+        # other; such edits are ambiguous or overlap, so they are rejected up front
+        for i, a in enumerate(olds):
+            for j, b in enumerate(olds):
+                if i != j and a in b and (a != b or i < j):
+                    return [], f"Edit #{i + 1} and edit #{j + 1} overlap: old_str of #{i + 1} is contained in #{j + 1}"
+
+        # A zero-width lookahead reports every (even overlapping) occurrence of every pattern
+        pattern = re.compile("(?=(?:" + "|".join(f"(?P<e{n}>{re.escape(old)})" for n, old in enumerate(olds)) + "))")
+        found: list[list[int]] = [[] for _ in olds]
+        for match in pattern.finditer(content):
+            found[int(match.lastgroup[1:])].append(match.start())
+
+        def line_of(offset: int) -> int:
+            return content.count("\n", 0, offset) + 1
+
+        for number, starts in enumerate(found):
+            preview = olds[number] if len(olds[number]) <= 200 else olds[number][:200] + "..."
+            if not starts:
+                return [], f"{label(number)}Text not found in file: {preview}"
+            if len(starts) > 1:
+                lines = ", ".join(str(line) for line in dict.fromkeys(line_of(start) for start in starts[:10]))
+                return [], (
+                    f"{label(number)}Text appears {len(starts)} times in file (lines {lines}); "
+                    f"include more surrounding context to make it unique: {preview}"
+                )
 
-            return ToolResult(success=True, content=f"Successfully edited {file_path}")
-        except Exception as e:
-            return ToolResult(success=False, content="", error=str(e))
+        spans = sorted((starts[0], starts[0] + len(olds[number]), number) for number, starts in enumerate(found))
+        for (_, prev_end, prev), (start, _, number) in zip(spans, spans[1:]):
+            if start < prev_end:
+                return [], f"Edit #{prev + 1} and edit #{number + 1} overlap in the file"
+        return spans, None
+
+    @staticmethod
+    def _diff_summary(content: str, spans: list[tuple[int, int, int]], pairs: list[tuple[str, str]]) -> str:
+        """Compact diff: the changed lines before and after, one hunk per group of edits sharing lines."""
+        max_lines = 8
+
+        # Group edits whose lines touch, so each hunk shows the final text of its lines
+        groups: list[list[tuple[int, int, int]]] = []
+        for span in spans:
+            if groups and content.find("\n", groups[-1][-1][1], span[0]) < 0:
+                groups[-1].append(span)
+            else:
+                groups.append([span])
+
+        hunks = []
+        shift = 0
+        for group in groups:
+            line_start = content.rfind("\n", 0, group[0][0]) + 1
+            line_end = content.find("\n", group[-1][1])
+            if line_end < 0:
+                line_end = len(content)
+            pieces = []
+            pos = line_start
+            for start, end, number in group:
+                pieces += [content[pos:start], pairs[number][1]]
+                pos = end
+            pieces.append(content[pos:line_end])
+            before = content[line_start:line_end].split("\n")
+            after = "".join(pieces).split("\n")
+            first_line = content.count("\n", 0, line_start) + 1
+
+            hunk = [f"@@ line {first_line} (new {first_line + shift}): -{len(before)} +{len(after)} @@"]
+            for sign, lines in (("-", before), ("+", after)):
+                hunk.extend(f"{sign}{line}" for line in lines[:max_lines])
+                if len(lines) > max_lines:
+                    hunk.append(f"{sign}... ({len(lines) - max_lines} more lines)")
+            hunks.append("\n".join(hunk))
+            shift += len(after) - len(before)
+        return "\n".join(hunks)
@@ -1,7 +1,9 @@
 """MCP tool loader with real MCP client integration and timeout handling."""
 
 import asyncio
+import hashlib
 import json
+import time
 from contextlib import AsyncExitStack
 from dataclasses import dataclass
 from pathlib import Path
@@ -13,10 +15,15 @@ from mcp.client.sse import sse_client
 from mcp.client.streamable_http import streamablehttp_client
 
 from .base import Tool, ToolResult
+from .file_tools import atomic_write_bytes
 
 # Connection type aliases
 ConnectionType = Literal["stdio", "sse", "http", "streamable_http"]
 
+# Tool schemas of every configured server, so startup does not need to connect
+MCP_TOOL_CACHE_PATH = Path.home() / ".mini-agent" / "cache" / "mcp-tools.json"
+MCP_TOOL_CACHE_VERSION = 1
+
 
 @dataclass
 class MCPTimeoutConfig:
@@ -58,21 +65,27 @@ def get_mcp_timeout_config() -> MCPTimeoutConfig:
 
 
 class MCPTool(Tool):
-    """Wrapper for MCP tools with timeout handling."""
+    """Wrapper for MCP tools with timeout handling.
+
+    A tool built from the tool-list cache has no session yet; it is bound to its
+    server connection, which is opened on the first execute.
+    """
 
     def __init__(
         self,
         name: str,
         description: str,
         parameters: dict[str, Any],
-        session: ClientSession,
+        session: ClientSession | None = None,
         execute_timeout: float | None = None,
+        connection: "MCPServerConnection | None" = None,
     ):
         self._name = name
         self._description = description
         self._parameters = parameters
         self._session = session
         self._execute_timeout = execute_timeout
+        self._connection = connection
 
     @property
     def name(self) -> str:
@@ -91,9 +104,12 @@ class MCPTool(Tool):
         timeout = self._execute_timeout or _default_timeout_config.execute_timeout
 
         try:
+            # Lazily connected servers are bounded by connect_timeout, not execute_timeout
+            session = self._session if self._connection is None else await self._connection.get_session()
+
             # Wrap call_tool with timeout
             async with asyncio.timeout(timeout):
-                result = await self._session.call_tool(self._name, arguments=kwargs)
+                result = await session.call_tool(self._name, arguments=kwargs)
 
             # MCP tool results are a list of content items
             content_parts = []
@@ -119,6 +135,51 @@ class MCPTool(Tool):
             return ToolResult(success=False, content="", error=f"MCP tool execution failed: {str(e)}")
 
 
+class MCPToolCache:
+    """Persisted tool schemas of MCP servers, keyed by a hash of each server's config.
+
+    Lets startup build MCPTool objects without spawning or contacting the server.
+    Any change to a server's config entry (command, args, env, url, ...) misses the
+    cache, and a lazily opened session refreshes a stale entry.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._entries = self._load()
+
+    @staticmethod
+    def config_key(server_config: dict) -> str:
+        """Stable hash of a server's config entry (the entry itself is not stored)."""
+        data = json.dumps(server_config, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> list[dict] | None:
+        entry = self._entries.get(key)
+        return entry["tools"] if entry else None
+
+    def put(self, key: str, server_name: str, tools: list[dict]):
+        """Store a server's tool specs, merging with entries saved by other processes."""
+        if self.get(key) == tools:
+            return
+        self._entries = self._load()
+        self._entries[key] = {"server": server_name, "tools": tools}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            data = json.dumps({"version": MCP_TOOL_CACHE_VERSION, "servers": self._entries}, ensure_ascii=False)
+            atomic_write_bytes(self.path, data.encode("utf-8"))
+        except OSError as e:
+            print(f"⚠️  Failed to save MCP tool cache ({self.path}): {e}")
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            cache = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(cache, dict) or cache.get("version") != MCP_TOOL_CACHE_VERSION:
+            return {}
+        return cache.get("servers", {})
+
+
 class MCPServerConnection:
     """Manages connection to a single MCP server (STDIO or URL-based) with timeout handling."""
 
@@ -155,6 +216,13 @@ class MCPServerConnection:
         self.session: ClientSession | None = None
         self.exit_stack: AsyncExitStack | None = None
         self.tools: list[MCPTool] = []
+        self.connect_latency: float | None = None
+        self._owner_task: asyncio.Task | None = None
+        self._closing: asyncio.Event | None = None
+        self._connect_lock = asyncio.Lock()
+        # Tool-list cache entry refreshed after each successful connect
+        self._tool_cache: MCPToolCache | None = None
+        self._cache_key: str | None = None
 
     def _get_connect_timeout(self) -> float:
         """Get effective connect timeout."""
@@ -168,69 +236,169 @@ class MCPServerConnection:
         """Get effective execute timeout."""
         return self.execute_timeout or _default_timeout_config.execute_timeout
 
+    def use_tool_cache(self, cache: MCPToolCache, key: str):
+        """Save this server's tool list to ``cache`` under ``key`` whenever it connects."""
+        self._tool_cache = cache
+        self._cache_key = key
+
+    def load_cached_tools(self, tool_specs: list[dict]):
+        """Build tools from cached specs without connecting; the session opens on first execute."""
+        self.tools = self._build_tools(tool_specs)
+
+    def _build_tools(self, tool_specs: list[dict]) -> list[MCPTool]:
+        # Wrap each tool with execute timeout
+        execute_timeout = self._get_execute_timeout()
+        return [
+            MCPTool(
+                name=spec["name"],
+                description=spec["description"],
+                parameters=spec["parameters"],
+                execute_timeout=execute_timeout,
+                connection=self,
+            )
+            for spec in tool_specs
+        ]
+
     async def connect(self) -> bool:
-        """Connect to the MCP server with timeout protection."""
+        """Connect to the MCP server with timeout protection.
+
+        The transport and session contexts are entered and exited by a dedicated
+        owner task, so servers can be connected concurrently (e.g. via
+        ``asyncio.gather``) and still be disconnected later from any task.
+        """
         connect_timeout = self._get_connect_timeout()
+        start = time.perf_counter()
 
         try:
-            self.exit_stack = AsyncExitStack()
-
-            # Wrap connection with timeout
-            async with asyncio.timeout(connect_timeout):
-                if self.connection_type == "stdio":
-                    read_stream, write_stream = await self._connect_stdio()
-                elif self.connection_type == "sse":
-                    read_stream, write_stream = await self._connect_sse()
-                else:  # http / streamable_http
-                    read_stream, write_stream = await self._connect_streamable_http()
-
-                # Enter client session context
-                session = await self.exit_stack.enter_async_context(ClientSession(read_stream, write_stream))
-                self.session = session
-
-                # Initialize the session
-                await session.initialize()
-
-                # List available tools
-                tools_list = await session.list_tools()
-
-            # Wrap each tool with execute timeout
-            execute_timeout = self._get_execute_timeout()
-            for tool in tools_list.tools:
-                parameters = tool.inputSchema if hasattr(tool, "inputSchema") else {}
-                mcp_tool = MCPTool(
-                    name=tool.name,
-                    description=tool.description or "",
-                    parameters=parameters,
-                    session=session,
-                    execute_timeout=execute_timeout,
-                )
-                self.tools.append(mcp_tool)
+            tool_specs = await self._open(connect_timeout)
+            self.connect_latency = time.perf_counter() - start
+            self.tools = self._build_tools(tool_specs)
 
             conn_info = self.url if self.url else self.command
-            print(f"✓ Connected to MCP server '{self.name}' ({self.connection_type}: {conn_info}) - loaded {len(self.tools)} tools")
+            print(
+                f"✓ Connected to MCP server '{self.name}' ({self.connection_type}: {conn_info}) "
+                f"in {self.connect_latency:.2f}s - loaded {len(self.tools)} tools"
+            )
             for tool in self.tools:
                 desc = tool.description[:60] if len(tool.description) > 60 else tool.description
                 print(f"  - {tool.name}: {desc}...")
             return True
 
         except TimeoutError:
+            self.connect_latency = time.perf_counter() - start
             print(f"✗ Connection to MCP server '{self.name}' timed out after {connect_timeout}s")
-            if self.exit_stack:
-                await self.exit_stack.aclose()
-                self.exit_stack = None
             return False
 
         except Exception as e:
-            print(f"✗ Failed to connect to MCP server '{self.name}': {e}")
-            if self.exit_stack:
-                await self.exit_stack.aclose()
-                self.exit_stack = None
+            self.connect_latency = time.perf_counter() - start
+            print(f"✗ Failed to connect to MCP server '{self.name}' after {self.connect_latency:.2f}s: {e}")
             import traceback
 
             traceback.print_exc()
             return False
 
+    async def get_session(self) -> ClientSession:
+        """Return the live session, connecting on first use (or after the server went away)."""
+        if self.session is None:
+            async with self._connect_lock:
+                if self.session is None:
+                    connect_timeout = self._get_connect_timeout()
+                    start = time.perf_counter()
+                    try:
+                        await self._open(connect_timeout)
+                    except TimeoutError:
+                        raise ConnectionError(
+                            f"connection to MCP server '{self.name}' timed out after {connect_timeout}s"
+                        ) from None
+                    except Exception as e:
+                        raise ConnectionError(f"could not connect to MCP server '{self.name}': {e}") from e
+                    self.connect_latency = time.perf_counter() - start
+                    print(f"✓ Connected to MCP server '{self.name}' on first use in {self.connect_latency:.2f}s")
+        return self.session
+
+    async def _open(self, connect_timeout: float) -> list[dict]:
+        """Start the owner task, wait until the session is ready and return the tool specs."""
+        ready = asyncio.get_running_loop().create_future()
+        self._closing = asyncio.Event()
+        self._owner_task = asyncio.create_task(self._run(ready, connect_timeout), name=f"mcp-{self.name}")
+
+        try:
+            tools_list = await ready
+        except asyncio.CancelledError:
+            self._closing.set()
+            self._owner_task.cancel()
+            self._owner_task = None
+            raise
+        except Exception:
+            await self._join_owner_task()
+            raise
+
+        tool_specs = [
+            {
+                "name": tool.name,
+                "description": tool.description or "",
+                "parameters": tool.inputSchema if hasattr(tool, "inputSchema") else {},
+            }
+            for tool in tools_list.tools
+        ]
+        if self._tool_cache is not None:
+            self._tool_cache.put(self._cache_key, self.name, tool_specs)
+        return tool_specs
+
+    async def _run(self, ready: asyncio.Future, connect_timeout: float):
+        """Owner task: hold the transport and session open until disconnect()."""
+        try:
+            async with AsyncExitStack() as exit_stack:
+                self.exit_stack = exit_stack
+                try:
+                    # Wrap connection with timeout
+                    async with asyncio.timeout(connect_timeout):
+                        if self.connection_type == "stdio":
+                            read_stream, write_stream = await self._connect_stdio()
+                        elif self.connection_type == "sse":
+                            read_stream, write_stream = await self._connect_sse()
+                        else:  # http / streamable_http
+                            read_stream, write_stream = await self._connect_streamable_http()
+
+                        # Enter client session context
+                        session = await exit_stack.enter_async_context(ClientSession(read_stream, write_stream))
+
+                        # Initialize the session
+                        await session.initialize()
+
+                        # List available tools
+                        tools_list = await session.list_tools()
+                except BaseException as e:
+                    if not ready.done():
+                        if not isinstance(e, Exception):
+                            # e.g. a transport's cancel scope leaking a CancelledError on failure
+                            e = ConnectionError(f"connection aborted by transport ({type(e).__name__})")
+                        ready.set_exception(e)
+                    return
+
+                if ready.done():  # connect() was cancelled while we were connecting
+                    return
+                # Only publish the session once it is initialized
+                self.session = session
+                ready.set_result(tools_list)
+                await self._closing.wait()
+        except Exception:
+            # Teardown errors of a failed connection were already reported via ``ready``
+            if ready.done() and not ready.cancelled() and ready.exception() is None:
+                raise
+        finally:
+            self.exit_stack = None
+            self.session = None
+            if not ready.done():
+                ready.cancel()
+
+    async def _join_owner_task(self):
+        """Ask the owner task to close the connection and wait for it to finish."""
+        task, self._owner_task = self._owner_task, None
+        if task is not None:
+            self._closing.set()
+            await task
+
     async def _connect_stdio(self):
         """Connect via STDIO transport."""
         server_params = StdioServerParameters(command=self.command, args=self.args, env=self.env if self.env else None)
@@ -268,10 +436,7 @@ class MCPServerConnection:
 
     async def disconnect(self):
         """Properly disconnect from the MCP server."""
-        if self.exit_stack:
-            await self.exit_stack.aclose()
-            self.exit_stack = None
-            self.session = None
+        await self._join_owner_task()
 
 
 # Global connections registry
@@ -320,15 +485,23 @@ def _resolve_mcp_config_path(config_path: str) -> Path | None:
     return None
 
 
-async def load_mcp_tools_async(config_path: str = "mcp.json") -> list[Tool]:
+async def load_mcp_tools_async(
+    config_path: str = "mcp.json", use_cache: bool = True, cache_path: str | Path | None = None
+) -> list[Tool]:
     """
     Load MCP tools from config file.
 
     This function:
     1. Reads the MCP config file (with fallback to mcp-example.json)
-    2. Connects to each server (STDIO or URL-based)
-    3. Fetches tool definitions
-    4. Wraps them as Tool objects
+    2. Builds tools of servers found in the tool-list cache without connecting
+    3. Connects to the remaining enabled servers concurrently (STDIO or URL-based)
+    4. Fetches their tool definitions and saves them to the cache
+    5. Wraps them as Tool objects, in the order the servers appear in the config
+
+    Cached servers are only spawned/contacted when one of their tools is first
+    executed, so servers that are never used never start. A slow or unreachable
+    server only delays startup by its own connect_timeout, not by the sum of all
+    timeouts. Per-server connect latency is printed.
 
     Supported config formats:
     - STDIO: {"command": "...", "args": [...], "env": {...}}
@@ -345,6 +518,8 @@ async def load_mcp_tools_async(config_path: str = "mcp.json") -> list[Tool]:
 
     Args:
         config_path: Path to MCP configuration file (default: "mcp.json")
+        use_cache: Build tools from the tool-list cache and connect lazily (default: True)
+        cache_path: Tool-list cache file (default: MCP_TOOL_CACHE_PATH)
 
     Returns:
         List of Tool objects representing MCP tools
@@ -367,9 +542,11 @@ async def load_mcp_tools_async(config_path: str = "mcp.json") -> list[Tool]:
             print("No MCP servers configured")
             return []
 
-        all_tools = []
+        tool_cache = MCPToolCache(cache_path or MCP_TOOL_CACHE_PATH)
+        connections = []
+        cached = []
 
-        # Connect to each enabled server
+        # Build a connection for each enabled server (in config order)
         for server_name, server_config in mcp_servers.items():
             if server_config.get("disabled", False):
                 print(f"Skipping disabled server: {server_name}")
@@ -400,13 +577,39 @@ async def load_mcp_tools_async(config_path: str = "mcp.json") -> list[Tool]:
                 execute_timeout=server_config.get("execute_timeout"),
                 sse_read_timeout=server_config.get("sse_read_timeout"),
             )
-            success = await connection.connect()
+            cache_key = MCPToolCache.config_key(server_config)
+            connection.use_tool_cache(tool_cache, cache_key)
+            tool_specs = tool_cache.get(cache_key) if use_cache else None
+            if tool_specs is not None:
+                connection.load_cached_tools(tool_specs)
+                print(f"✓ MCP server '{connection.name}': {len(tool_specs)} tools from cache (connects on first use)")
+            connections.append(connection)
+            cached.append(tool_specs is not None)
+
+        # Connect to the uncached servers concurrently; each one is bounded by its own connect_timeout
+        start = time.perf_counter()
+        connected = await asyncio.gather(
+            *(connection.connect() for connection, hit in zip(connections, cached) if not hit)
+        )
+        elapsed = time.perf_counter() - start
+        connected = iter(connected)
+        results = [True if hit else next(connected) for hit in cached]
 
+        # Combine tool lists in config order, independent of which server answered first
+        all_tools = []
+        for connection, success in zip(connections, results):
             if success:
                 _mcp_connections.append(connection)
                 all_tools.extend(connection.tools)
 
-        print(f"\nTotal MCP tools loaded: {len(all_tools)}")
+        print(
+            f"\nTotal MCP tools loaded: {len(all_tools)} from {sum(results)}/{len(connections)} servers "
+            f"({sum(cached)} cached) in {elapsed:.2f}s"
+        )
+        for connection, success, hit in zip(connections, results, cached):
+            status = "✓" if success else "✗"
+            latency = "cached, not connected" if hit else f"{connection.connect_latency:.2f}s"
+            print(f"  {status} {connection.name}: {latency}")
 
         return all_tools
 
@@ -421,6 +624,5 @@ async def load_mcp_tools_async(config_path: str = "mcp.json") -> list[Tool]:
 async def cleanup_mcp_connections():
     """Clean up all MCP connections."""
     global _mcp_connections
-    for connection in _mcp_connections:
-        await connection.disconnect()
+    await asyncio.gather(*(connection.disconnect() for connection in _mcp_connections))
     _mcp_connections.clear()
@@ -4,14 +4,464 @@ This tool allows the agent to:
 - Record key points and important information during sessions
 - Recall previously recorded notes
 - Maintain context across agent execution chains
+
+Notes are stored as an append-only JSON Lines log (see NoteStore), so recording a
+note costs one locked append regardless of how many notes already exist. Recall can
+rank notes against a query with BM25 (see NoteSearchIndex) and return only the top
+matches that fit a token budget.
 """
 
 import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
 from .base import Tool, ToolResult
+from .file_tools import _get_encoding, atomic_write_bytes, truncate_text_by_tokens
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are not serialized across processes
+    fcntl = None
+
+# Compact once at least this many lines are superseded or unreadable
+# and they make up at least half of the log
+COMPACT_MIN_GARBAGE = 256
+
+# Records are written with category first and timestamp last, so the category can be
+# decoded without parsing the rest of the line and the text before the timestamp
+# identifies the note (quotes inside JSON strings are always escaped)
+_CATEGORY_PREFIX = b'{"category": '
+_TIMESTAMP_KEY = b', "timestamp": '
+_DECODER = json.JSONDecoder()
+
+# Okapi BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Query-mode recall defaults
+RECALL_DEFAULT_TOP_K = 5
+RECALL_DEFAULT_MAX_TOKENS = 1000
+# Smallest budget for a truncated best match: the truncation marker plus some note text
+RECALL_MIN_ENTRY_TOKENS = 64
+
+# Lowercase alphanumeric words, or runs of CJK characters (Han, kana, Hangul)
+_TERM_RE = re.compile(
+    r"(?P<cjk>[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]+)|[0-9a-z]+"
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into search terms.
+
+    Latin text becomes lowercase alphanumeric words. CJK text has no word boundaries,
+    so each run becomes overlapping character bigrams ("寒武纪" -> "寒武", "武纪");
+    a single CJK character stays a unigram.
+    """
+    terms = []
+    for match in _TERM_RE.finditer(text.lower()):
+        term = match.group()
+        if match.lastgroup == "cjk" and len(term) > 1:
+            terms.extend(term[i : i + 2] for i in range(len(term) - 1))
+        else:
+            terms.append(term)
+    return terms
+
+
+def _count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        return int(len(text) / 2.5)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _continues_log(f, st: os.stat_result, inode: int | None, indexed_size: int) -> bool:
+    """Whether an index covering indexed_size bytes of a log with this inode is a prefix of f."""
+    if st.st_ino != inode or st.st_size < indexed_size:
+        return False
+    if not indexed_size:
+        return True
+    # A deleted and recreated file can reuse the inode number
+    f.seek(indexed_size - 1)
+    return f.read(1) == b"\n"
+
+
+class NoteStore:
+    """Append-only JSON Lines note log shared by SessionNoteTool and RecallNoteTool.
+
+    Each note is one line appended under an exclusive file lock, so agents sharing a
+    workspace never overwrite each other's notes. An in-memory index maps every
+    category to the byte spans of its notes; it is refreshed incrementally from the
+    last indexed offset and only decodes the category field of new lines, so recalling
+    one category reads and parses just that category's records.
+
+    Recording a note identical to an earlier one (same category and content)
+    supersedes the earlier line. Once superseded and unreadable lines make up half of
+    the log it is compacted by rewriting the live lines atomically. A legacy
+    JSON-array memory file is converted on first use.
+    """
+
+    _stores: dict[Path, "NoteStore"] = {}
+    _stores_lock = threading.Lock()
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._search_index: NoteSearchIndex | None = None
+        self._reset(None)
+
+    @classmethod
+    def for_file(cls, memory_file: str | Path) -> "NoteStore":
+        """Return the store for memory_file, shared by all tools in this process."""
+        path = Path(memory_file).expanduser().resolve()
+        with cls._stores_lock:
+            store = cls._stores.get(path)
+            if store is None:
+                store = cls._stores[path] = cls(path)
+            return store
+
+    def _reset(self, inode: int | None):
+        self._inode = inode
+        self._indexed_size = 0
+        self._garbage = 0
+        # note key -> (offset, length, category), in file order
+        self._spans: dict[bytes, tuple[int, int, str]] = {}
+        # category -> note key -> (offset, length), in file order
+        self._categories: dict[str, dict[bytes, tuple[int, int]]] = {}
+        # Offsets of notes that are not superseded
+        self._live_offsets: set[int] = set()
+
+    @staticmethod
+    def _encode(note: dict) -> bytes:
+        record = {
+            "category": note.get("category", "general"),
+            "content": note.get("content", ""),
+            "timestamp": note.get("timestamp"),
+        }
+        return json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+
+    @contextmanager
+    def _open_locked(self, exclusive: bool):
+        """Open and lock the log, retrying if compaction replaced it while we waited."""
+        while True:
+            f = open(self.path, "a+b" if exclusive else "rb")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                if os.fstat(f.fileno()).st_ino == os.stat(self.path).st_ino:
+                    break
+            except BaseException:
+                f.close()
+                raise
+            f.close()
+        try:
+            yield f
+        finally:
+            f.close()
+
+    def _migrate_legacy(self):
+        """Convert a JSON-array memory file written by older versions to JSON Lines."""
+        if self._inode is not None or not self.path.exists():
+            return
+        with open(self.path, "rb") as f:
+            if not f.read(64).lstrip().startswith(b"["):
+                return
+        with self._open_locked(exclusive=True) as f:
+            f.seek(0)
+            data = f.read()
+            if data.lstrip().startswith(b"["):
+                try:
+                    notes = [note for note in json.loads(data) if isinstance(note, dict)]
+                except ValueError as e:
+                    # Keep the unreadable file for inspection and start a fresh log
+                    corrupt = self.path.with_name(f"{self.path.name}.corrupt-{datetime.now():%Y%m%d%H%M%S}")
+                    os.replace(self.path, corrupt)
+                    print(f"⚠️  Unreadable note file moved to {corrupt}, starting a new log: {e}")
+                    return
+                atomic_write_bytes(self.path, b"".join(self._encode(note) for note in notes))
+
+    def _refresh(self, f):
+        """Index lines appended since the last refresh (or everything if the file was replaced)."""
+        st = os.fstat(f.fileno())
+        if not _continues_log(f, st, self._inode, self._indexed_size):
+            self._reset(st.st_ino)
+        if st.st_size == self._indexed_size:
+            return
+        base = self._indexed_size
+        f.seek(base)
+        data = f.read(st.st_size - base)
+        # Only complete lines; a torn tail from a crashed writer is terminated by the next append
+        end = data.rfind(b"\n") + 1
+        pos = 0
+        while pos < end:
+            newline = data.index(b"\n", pos)
+            self._index_line(data[pos:newline], base + pos)
+            pos = newline + 1
+        self._indexed_size = base + end
+
+    def _index_line(self, line: bytes, offset: int):
+        category = self._line_category(line)
+        if category is None:
+            self._garbage += 1
+            return
+        cut = line.rfind(_TIMESTAMP_KEY)
+        # The encoded text before the timestamp itself, so distinct notes never share a key
+        key = line[:cut] if cut > 0 else line
+        previous = self._spans.pop(key, None)
+        if previous is not None:
+            del self._categories[previous[2]][key]
+            self._live_offsets.discard(previous[0])
+            self._garbage += 1
+        self._spans[key] = (offset, len(line), category)
+        self._live_offsets.add(offset)
+        self._categories.setdefault(category, {})[key] = (offset, len(line))
+
+    @staticmethod
+    def _line_category(line: bytes) -> str | None:
+        if line.startswith(_CATEGORY_PREFIX) and line.endswith(b"}"):
+            try:
+                category, _ = _DECODER.raw_decode(line.decode("utf-8"), len(_CATEGORY_PREFIX))
+            except ValueError:
+                return None
+            return category if isinstance(category, str) else None
+        try:
+            note = json.loads(line)
+        except ValueError:
+            return None
+        return str(note.get("category", "general")) if isinstance(note, dict) else None
+
+    def append(self, note: dict):
+        """Append one note to the log."""
+        line = self._encode(note)
+        with self._lock:
+            self._migrate_legacy()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._open_locked(exclusive=True) as f:
+                self._refresh(f)
+                if os.fstat(f.fileno()).st_size > self._indexed_size:
+                    line = b"\n" + line
+                os.write(f.fileno(), line)
+                self._refresh(f)
+                if self._garbage >= COMPACT_MIN_GARBAGE and self._garbage >= len(self._spans):
+                    self._compact_locked(f)
+
+    def compact(self):
+        """Rewrite the log keeping only the latest copy of each readable note."""
+        with self._lock:
+            self._migrate_legacy()
+            if not self.path.exists():
+                return
+            with self._open_locked(exclusive=True) as f:
+                self._refresh(f)
+                self._compact_locked(f)
+
+    def _compact_locked(self, f):
+        f.seek(0)
+        data = f.read(self._indexed_size)
+        lines = []
+        for offset, length, _ in self._spans.values():
+            line = data[offset : offset + length]
+            try:
+                json.loads(line)
+            except ValueError:
+                continue
+            lines.append(line + b"\n")
+        atomic_write_bytes(self.path, b"".join(lines))
+        self._reset(None)
+
+    def count(self) -> int:
+        """Return the number of notes without parsing them."""
+        with self._lock:
+            self._migrate_legacy()
+            if not self.path.exists():
+                return 0
+            with self._open_locked(exclusive=False) as f:
+                self._refresh(f)
+                return len(self._spans)
+
+    def read(self, category: str | None = None) -> list[dict]:
+        """Return notes in recording order, optionally only those in one category."""
+        with self._lock:
+            self._migrate_legacy()
+            if not self.path.exists():
+                return []
+            with self._open_locked(exclusive=False) as f:
+                self._refresh(f)
+                if category is None:
+                    f.seek(0)
+                    data = f.read(self._indexed_size)
+                    lines = [data[offset : offset + length] for offset, length, _ in self._spans.values()]
+                else:
+                    lines = []
+                    for offset, length in self._categories.get(category, {}).values():
+                        f.seek(offset)
+                        lines.append(f.read(length))
+
+        notes = []
+        for line in lines:
+            try:
+                notes.append(json.loads(line))
+            except ValueError:
+                continue
+        return notes
+
+    def search(self, query: str, category: str | None = None, top_k: int = RECALL_DEFAULT_TOP_K) -> list[tuple[float, dict]]:
+        """Return up to top_k (score, note) pairs ranked by BM25 relevance to query."""
+        terms = tokenize(query)
+        with self._lock:
+            self._migrate_legacy()
+            if not terms or not self.path.exists():
+                return []
+            with self._open_locked(exclusive=False) as f:
+                self._refresh(f)
+                if self._search_index is None:
+                    self._search_index = NoteSearchIndex(self.path.with_name(self.path.name + ".bm25.json"))
+                self._search_index.update(f, self._inode, self._indexed_size)
+                if category is None:
+                    allowed = self._live_offsets
+                else:
+                    allowed = {offset for offset, _ in self._categories.get(category, {}).values()}
+                hits = []
+                for score, offset, length in self._search_index.search(terms, allowed, top_k):
+                    f.seek(offset)
+                    hits.append((score, f.read(length)))
+
+        results = []
+        for score, line in hits:
+            try:
+                results.append((score, json.loads(line)))
+            except ValueError:
+                continue
+        return results
+
+
+class NoteSearchIndex:
+    """BM25 index over note content, persisted next to the note log.
+
+    The index file records the log's inode and how many bytes of it are indexed, so it
+    is extended with just the newly appended lines and rebuilt after compaction
+    replaces the log. Superseded notes stay in the index until then and are filtered
+    out at query time.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._saved_stat: tuple[int, int] | None = None
+        self._reset(None)
+
+    def _reset(self, inode: int | None):
+        self.inode = inode
+        self.indexed_size = 0
+        self.total_terms = 0
+        # doc id -> [offset, length, term count]
+        self.docs: list[list[int]] = []
+        # term -> [[doc id, term frequency], ...]
+        self.postings: dict[str, list[list[int]]] = {}
+
+    def _load_saved(self, inode: int):
+        """Adopt the index file if it is for this log and covers more of it than memory."""
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return
+        if (st.st_mtime_ns, st.st_size) == self._saved_stat:
+            return
+        self._saved_stat = (st.st_mtime_ns, st.st_size)
+        try:
+            saved = json.loads(self.path.read_bytes())
+        except ValueError:
+            return
+        if saved.get("version") != self.VERSION or saved.get("inode") != inode:
+            return
+        if self.inode == inode and saved["indexed_size"] <= self.indexed_size:
+            return
+        self.inode = inode
+        self.indexed_size = saved["indexed_size"]
+        self.total_terms = saved["total_terms"]
+        self.docs = saved["docs"]
+        self.postings = saved["postings"]
+
+    def update(self, f, inode: int, size: int):
+        """Index the lines of f between the indexed size and size, then save if anything changed."""
+        if self.inode != inode or self.indexed_size != size:
+            self._load_saved(inode)
+        st = os.fstat(f.fileno())
+        if not _continues_log(f, st, self.inode, self.indexed_size) or self.indexed_size > size:
+            self._reset(inode)
+        if self.indexed_size == size:
+            return
+
+        f.seek(self.indexed_size)
+        data = f.read(size - self.indexed_size)
+        pos = 0
+        while pos < len(data):
+            newline = data.find(b"\n", pos)
+            if newline < 0:
+                break
+            self._add(data[pos:newline], self.indexed_size + pos)
+            pos = newline + 1
+        self.indexed_size += pos
+        self._save()
+
+    def _add(self, line: bytes, offset: int):
+        try:
+            note = json.loads(line)
+        except ValueError:
+            return
+        if not isinstance(note, dict):
+            return
+        terms = tokenize(f"{note.get('category', '')} {note.get('content', '')}")
+        doc = len(self.docs)
+        self.docs.append([offset, len(line), len(terms)])
+        self.total_terms += len(terms)
+        for term, frequency in Counter(terms).items():
+            self.postings.setdefault(term, []).append([doc, frequency])
+
+    def _save(self):
+        data = {
+            "version": self.VERSION,
+            "inode": self.inode,
+            "indexed_size": self.indexed_size,
+            "total_terms": self.total_terms,
+            "docs": self.docs,
+            "postings": self.postings,
+        }
+        atomic_write_bytes(self.path, json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        st = self.path.stat()
+        self._saved_stat = (st.st_mtime_ns, st.st_size)
+
+    def search(self, terms: list[str], allowed_offsets: set[int], top_k: int) -> list[tuple[float, int, int]]:
+        """Return up to top_k (score, offset, length) for matching docs whose offset is allowed."""
+        if not self.docs:
+            return []
+        doc_count = len(self.docs)
+        avg_terms = self.total_terms / doc_count or 1.0
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, frequency in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.docs[doc][2] / avg_terms)
+                scores[doc] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+        # Highest score first; newer notes win ties
+        hits = []
+        for doc in sorted(scores, key=lambda doc: (scores[doc], doc), reverse=True):
+            offset, length, _ = self.docs[doc]
+            if offset in allowed_offsets:
+                hits.append((scores[doc], offset, length))
+                if len(hits) >= top_k:
+                    break
+        return hits
 
 
 class SessionNoteTool(Tool):
@@ -36,6 +486,7 @@ class SessionNoteTool(Tool):
         """
         self.memory_file = Path(memory_file)
         # Lazy loading: file and directory are only created when first note is recorded
+        self.store = NoteStore.for_file(memory_file)
 
     @property
     def name(self) -> str:
@@ -66,28 +517,6 @@ class SessionNoteTool(Tool):
             "required": ["content"],
         }
 
-    def _load_from_file(self) -> list:
-        """Load notes from file.
-        
-        Returns empty list if file doesn't exist (lazy loading).
-        """
-        if not self.memory_file.exists():
-            return []
-        
-        try:
-            return json.loads(self.memory_file.read_text())
-        except Exception:
-            return []
-
-    def _save_to_file(self, notes: list):
-        """Save notes to file.
-        
-        Creates parent directory and file if they don't exist (lazy initialization).
-        """
-        # Ensure parent directory exists when actually saving
-        self.memory_file.parent.mkdir(parents=True, exist_ok=True)
-        self.memory_file.write_text(json.dumps(notes, indent=2, ensure_ascii=False))
-
     async def execute(self, content: str, category: str = "general") -> ToolResult:
         """Record a session note.
 
@@ -99,19 +528,14 @@ class SessionNoteTool(Tool):
             ToolResult with success status
         """
         try:
-            # Load existing notes
-            notes = self._load_from_file()
-
-            # Add new note with timestamp
-            note = {
-                "timestamp": datetime.now().isoformat(),
-                "category": category,
-                "content": content,
-            }
-            notes.append(note)
-
-            # Save back to file
-            self._save_to_file(notes)
+            # Append new note with timestamp
+            self.store.append(
+                {
+                    "timestamp": datetime.now().isoformat(),
+                    "category": category,
+                    "content": content,
+                }
+            )
 
             return ToolResult(
                 success=True,
@@ -135,6 +559,7 @@ class RecallNoteTool(Tool):
             memory_file: Path to the note storage file
         """
         self.memory_file = Path(memory_file)
+        self.store = NoteStore.for_file(memory_file)
 
     @property
     def name(self) -> str:
@@ -145,7 +570,9 @@ class RecallNoteTool(Tool):
         return (
             "Recall all previously recorded session notes. "
             "Use this to retrieve important information, context, or decisions "
-            "from earlier in the session or previous agent execution chains."
+            "from earlier in the session or previous agent execution chains. "
+            "Pass a query to get only the most relevant notes (ranked by keyword match, "
+            "limited to top_k notes and max_tokens) instead of every note."
         )
 
     @property
@@ -157,41 +584,56 @@ class RecallNoteTool(Tool):
                     "type": "string",
                     "description": "Optional: filter notes by category",
                 },
+                "query": {
+                    "type": "string",
+                    "description": "Optional: keywords to rank notes by relevance (Chinese and English supported)",
+                },
+                "top_k": {
+                    "type": "integer",
+                    "description": f"Maximum number of notes returned for a query (default: {RECALL_DEFAULT_TOP_K})",
+                },
+                "max_tokens": {
+                    "type": "integer",
+                    "description": f"Token budget for notes returned for a query (default: {RECALL_DEFAULT_MAX_TOKENS})",
+                },
             },
         }
 
-    async def execute(self, category: str = None) -> ToolResult:
+    async def execute(
+        self,
+        category: str = None,
+        query: str = None,
+        top_k: int = RECALL_DEFAULT_TOP_K,
+        max_tokens: int = RECALL_DEFAULT_MAX_TOKENS,
+    ) -> ToolResult:
         """Recall session notes.
 
         Args:
             category: Optional category filter
+            query: Optional query; returns only the best-matching notes
+            top_k: Maximum number of notes returned for a query
+            max_tokens: Token budget for notes returned for a query
 
         Returns:
             ToolResult with notes content
         """
         try:
-            if not self.memory_file.exists():
-                return ToolResult(
-                    success=True,
-                    content="No notes recorded yet.",
-                )
+            if query:
+                return self._recall_ranked(query, category, top_k, max_tokens)
 
-            notes = json.loads(self.memory_file.read_text())
+            # Filter by category if specified (only that category's records are read)
+            notes = self.store.read(category or None)
 
             if not notes:
-                return ToolResult(
-                    success=True,
-                    content="No notes recorded yet.",
-                )
-
-            # Filter by category if specified
-            if category:
-                notes = [n for n in notes if n.get("category") == category]
-                if not notes:
+                if not category or not self.store.count():
                     return ToolResult(
                         success=True,
-                        content=f"No notes found in category: {category}",
+                        content="No notes recorded yet.",
                     )
+                return ToolResult(
+                    success=True,
+                    content=f"No notes found in category: {category}",
+                )
 
             # Format notes for display
             formatted = []
@@ -211,3 +653,41 @@ class RecallNoteTool(Tool):
                 content="",
                 error=f"Failed to recall notes: {str(e)}",
             )
+
+    def _recall_ranked(self, query: str, category: str | None, top_k: int, max_tokens: int) -> ToolResult:
+        """Format the top_k notes most relevant to query, stopping at max_tokens."""
+        hits = self.store.search(query, category or None, max(1, top_k))
+        if not hits:
+            scope = f" in category: {category}" if category else ""
+            return ToolResult(success=True, content=f"No notes matching query: {query}{scope}")
+
+        header = f"Relevant Notes (query: {query}):"
+        formatted = []
+        remaining = max_tokens - _count_tokens(header)
+        for idx, (score, note) in enumerate(hits, 1):
+            entry = (
+                f"{idx}. [{note.get('category', 'general')}] {note.get('content', '')}\n"
+                f"   (recorded at {note.get('timestamp', 'unknown time')}, relevance {score:.2f})"
+            )
+            tokens = _count_tokens(entry)
+            if tokens > remaining:
+                if not formatted:
+                    if remaining < RECALL_MIN_ENTRY_TOKENS:
+                        # Too little room to show any note text next to the truncation marker
+                        return ToolResult(
+                            success=True,
+                            content=(
+                                f"{header}\n({len(hits)} matching notes found, but max_tokens={max_tokens} "
+                                f"is too small to show one; retry with a larger max_tokens)"
+                            ),
+                        )
+                    # Always return the best match, truncated to the budget
+                    formatted.append(truncate_text_by_tokens(entry, remaining))
+                omitted = len(hits) - len(formatted)
+                if omitted:
+                    formatted.append(f"({omitted} more matching notes omitted to stay within {max_tokens} tokens)")
+                break
+            formatted.append(entry)
+            remaining -= tokens
+
+        return ToolResult(success=True, content=header + "\n" + "\n".join(formatted))
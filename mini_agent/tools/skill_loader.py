@@ -1,16 +1,222 @@
 """
 Skill Loader - Load Claude Skills
 
-Supports loading skills from SKILL.md files and providing them to Agent
+Supports loading skills from SKILL.md files and providing them to Agent.
+Discovery can be backed by a persisted manifest so unchanged skills are not re-parsed
+on every start; full skill content is loaded when a skill is first requested.
 """
 
+import hashlib
+import json
+import os
 import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 import yaml
 
+from .file_tools import atomic_write_bytes
+
+# Discovery manifests are cached here, one per skills directory
+SKILL_MANIFEST_DIR = Path.home() / ".mini-agent" / "cache"
+SKILL_MANIFEST_VERSION = 1
+
+
+def default_manifest_path(skills_dir: str | Path) -> Path:
+    """Manifest file for a skills directory, keyed by its resolved path."""
+    resolved = str(Path(skills_dir).expanduser().resolve())
+    return SKILL_MANIFEST_DIR / f"skills-{hashlib.sha1(resolved.encode('utf-8')).hexdigest()[:12]}.json"
+
+
+# Relative path references rewritten to absolute paths in skill content.
+# 1. Directory-based paths (scripts/, references/, assets/) after "python " or a backtick
+#    See https://agentskills.io/specification#optional-directories
+_SCRIPT_PATH_PATTERN = re.compile(r"(python\s+|`)((?:scripts|references|assets)/[^\s`\)]+)")
+# 2. Direct document references such as "see reference.md" or "read forms.md"
+_DOC_REF_PATTERN = re.compile(
+    r"(see|read|refer to|check)\s+([a-zA-Z0-9_-]+\.(?:md|txt|json|yaml))([.,;\s])", re.IGNORECASE
+)
+# 3. Markdown links with an optional prefix word, e.g. "Read [`docx-js.md`](docx-js.md)"
+#    or "Load [Guide](./reference/guide.md)"
+_MARKDOWN_LINK_PATTERN = re.compile(
+    r"(?:(Read|See|Check|Refer to|Load|View)\s+)?\[(`?[^`\]]+`?)\]\(((?:\./)?[^)]+\.(?:md|txt|json|yaml|js|py|html))\)",
+    re.IGNORECASE,
+)
+# All three in one scan. No two of them can match at the same position, so alternation
+# order does not matter; the lookahead cheaply skips positions where none can start.
+_SKILL_PATH_PATTERN = re.compile(
+    r"(?=(?i:[\[`prsclv]))(?:"
+    rf"(?P<link>(?i:{_MARKDOWN_LINK_PATTERN.pattern}))"
+    rf"|(?P<script>{_SCRIPT_PATH_PATTERN.pattern})"
+    rf"|(?P<doc>(?i:{_DOC_REF_PATTERN.pattern}))"
+    r")"
+)
+# Bracket content a markdown link accepts
+_LINK_TEXT_PATTERN = re.compile(r"`?[^`\]]+`?")
+# Characters in a skill directory path that the rewrite patterns could match once the
+# path is spliced into the content
+_UNSAFE_DIR_CHARS = re.compile(r"[\s\[\]()`]")
+
+
+class _SkillPathRewriter:
+    """Rewrites relative path references in skill content for one skill directory.
+
+    rewrite() scans the content once with the combined pattern. The original
+    implementation ran the three rewrites one after another, each over the previous
+    one's output; the single scan gives the same result except where rewrites overlap
+    (a path inside a link's text is rewritten first, anything else falls back to the
+    sequential passes). Path existence is answered from a listing of the skill
+    directory, falling back to a filesystem check for paths the listing cannot decide.
+    """
+
+    def __init__(self, skill_dir: Path):
+        self.skill_dir = skill_dir
+        self._files: Optional[set[str]] = None
+        # Directory symlinks: their contents are not listed
+        self._links: List[str] = []
+        self._case_insensitive = False
+
+    def _scan(self):
+        files: set[str] = set()
+        stack = [("", str(self.skill_dir))]
+        while stack:
+            prefix, directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                rel_path = prefix + entry.name
+                try:
+                    is_dir = entry.is_dir()
+                    exists = is_dir or entry.is_file() or os.path.exists(entry.path)
+                except OSError:
+                    continue
+                if not exists:
+                    continue  # broken symlink
+                files.add(rel_path)
+                if is_dir:
+                    if entry.is_symlink():
+                        self._links.append(rel_path + "/")
+                    else:
+                        stack.append((rel_path + "/", entry.path))
+
+        # On a case-insensitive filesystem a listing miss is not conclusive
+        for name in files:
+            if "/" not in name and name.swapcase() != name and name.swapcase() not in files:
+                self._case_insensitive = os.path.exists(self.skill_dir / name.swapcase())
+                break
+        self._files = files
+
+    def exists(self, rel_path: str) -> bool:
+        """Equivalent of (skill_dir / rel_path).exists()."""
+        # pathlib drops empty and "." components; ".." and absolute paths need the filesystem
+        parts = [part for part in rel_path.split("/") if part not in ("", ".")]
+        if (
+            not parts
+            or rel_path.startswith("/")
+            or any(part == ".." or len(part.encode("utf-8", "surrogatepass")) > 255 for part in parts)
+            or "\\" in rel_path
+            or ":" in rel_path
+            or "\x00" in rel_path
+        ):
+            return (self.skill_dir / rel_path).exists()
+        if self._files is None:
+            self._scan()
+        key = "/".join(parts)
+        if key in self._files:
+            return True
+        if self._case_insensitive or any(key.startswith(link) for link in self._links):
+            return (self.skill_dir / rel_path).exists()
+        return False
+
+    def _replace_script_path(self, match: re.Match) -> str:
+        prefix = match.group(1)  # e.g., "python " or "`"
+        rel_path = match.group(2)  # e.g., "scripts/with_server.py"
+        if self.exists(rel_path):
+            return f"{prefix}{self.skill_dir / rel_path}"
+        return match.group(0)
+
+    def _replace_doc_ref(self, match: re.Match) -> str:
+        prefix = match.group(1)  # e.g., "see ", "read "
+        filename = match.group(2)  # e.g., "reference.md"
+        suffix = match.group(3)  # e.g., punctuation
+        if self.exists(filename):
+            # Add helpful instruction for Agent
+            return f"{prefix}`{self.skill_dir / filename}` (use read_file to access){suffix}"
+        return match.group(0)
+
+    def _replace_markdown_link(self, match: re.Match, link_text: Optional[str] = None) -> str:
+        prefix = match.group(1) if match.group(1) else ""  # e.g., "Read ", "Load ", or empty
+        if link_text is None:
+            link_text = match.group(2)  # e.g., "`docx-js.md`" or "Guide"
+        filepath = match.group(3)  # e.g., "docx-js.md", "./reference/file.md", "scripts/file.js"
+
+        # Remove leading ./ if present
+        clean_path = filepath[2:] if filepath.startswith("./") else filepath
+        if self.exists(clean_path):
+            # Preserve the link text style (with or without backticks)
+            return f"{prefix}[{link_text}](`{self.skill_dir / clean_path}`) (use read_file to access)"
+        text_start, text_end = match.span(2)
+        return match.string[match.start() : text_start] + link_text + match.string[text_end : match.end()]
+
+    def rewrite_sequential(self, content: str) -> str:
+        """Apply the three rewrites one after another (the original algorithm)."""
+        content = _SCRIPT_PATH_PATTERN.sub(self._replace_script_path, content)
+        content = _DOC_REF_PATTERN.sub(self._replace_doc_ref, content)
+        return _MARKDOWN_LINK_PATTERN.sub(self._replace_markdown_link, content)
+
+    def rewrite(self, content: str) -> str:
+        """Apply all rewrites in a single scan, with the same result as rewrite_sequential."""
+        if _UNSAFE_DIR_CHARS.search(str(self.skill_dir)):
+            return self.rewrite_sequential(content)
+
+        parts = []
+        last = 0
+        for found in _SKILL_PATH_PATTERN.finditer(content):
+            start, end = found.span()
+            if found.lastgroup == "script":
+                # The later passes would still see a link or document reference that
+                # starts inside this path
+                if "[" in found.group() or any(
+                    _DOC_REF_PATTERN.match(content, i) or _MARKDOWN_LINK_PATTERN.match(content, i)
+                    for i in range(start + 1, end)
+                ):
+                    return self.rewrite_sequential(content)
+                replacement = self._replace_script_path(_SCRIPT_PATH_PATTERN.match(content, start))
+            elif found.lastgroup == "doc":
+                replacement = self._replace_doc_ref(_DOC_REF_PATTERN.match(content, start))
+            else:
+                replacement = self._rewrite_link(_MARKDOWN_LINK_PATTERN.match(content, start))
+                if replacement is None:
+                    return self.rewrite_sequential(content)
+            parts.append(content[last:start])
+            parts.append(replacement)
+            last = end
+        parts.append(content[last:])
+        return "".join(parts)
+
+    def _rewrite_link(self, match: re.Match) -> Optional[str]:
+        """Rewrite a markdown link after the path rewrites inside its text, or None if they interact."""
+        content = match.string
+        text_start, text_end = match.span(2)
+        link_text = match.group(2)
+        target_start, target_end = match.span(3)
+        if "[" in link_text:
+            return None
+        if _SCRIPT_PATH_PATTERN.search(content, target_start, target_end) or _DOC_REF_PATTERN.search(
+            content, target_start, target_end
+        ):
+            return None
+        for inner in _SCRIPT_PATH_PATTERN.finditer(content, text_start, text_end):
+            if _SCRIPT_PATH_PATTERN.match(content, inner.start()).end() != inner.end():
+                return None  # the path runs past the closing bracket
+        new_text = _DOC_REF_PATTERN.sub(self._replace_doc_ref, _SCRIPT_PATH_PATTERN.sub(self._replace_script_path, link_text))
+        if new_text != link_text and not _LINK_TEXT_PATTERN.fullmatch(new_text):
+            return None
+        return self._replace_markdown_link(match, new_text)
+
 
 @dataclass
 class Skill:
@@ -18,7 +224,7 @@ class Skill:
 
     name: str
     description: str
-    content: str
+    content: Optional[str]  # None until the skill is requested via SkillLoader.get_skill
     license: Optional[str] = None
     allowed_tools: Optional[List[str]] = None
     metadata: Optional[Dict[str, str]] = None
@@ -40,22 +246,28 @@ All files and references in this skill are relative to this directory.
 
 ---
 
-{self.content}
+{self.content or ""}
 """
 
 
 class SkillLoader:
     """Skill loader"""
 
-    def __init__(self, skills_dir: str = "./skills"):
+    def __init__(self, skills_dir: str = "./skills", manifest_path: Optional[str | Path] = None):
         """
         Initialize Skill Loader
 
         Args:
             skills_dir: Skills directory path
+            manifest_path: Optional discovery manifest file. When set, discover_skills
+                reuses the metadata of unchanged SKILL.md files and only walks the
+                skills tree when a directory's mtime changed.
         """
         self.skills_dir = Path(skills_dir)
+        self.manifest_path = Path(manifest_path) if manifest_path else None
         self.loaded_skills: Dict[str, Skill] = {}
+        self._path_rewriters: Dict[str, _SkillPathRewriter] = {}
+        self._processed_content: Dict[tuple[str, str], str] = {}
 
     def load_skill(self, skill_path: Path) -> Optional[Skill]:
         """
@@ -68,29 +280,10 @@ class SkillLoader:
             Skill object, or None if loading fails
         """
         try:
-            content = skill_path.read_text(encoding="utf-8")
-
-            # Parse YAML frontmatter
-            frontmatter_match = re.match(r"^---\n(.*?)\n---\n(.*)$", content, re.DOTALL)
-
-            if not frontmatter_match:
-                print(f"⚠️  {skill_path} missing YAML frontmatter")
-                return None
-
-            frontmatter_text = frontmatter_match.group(1)
-            skill_content = frontmatter_match.group(2).strip()
-
-            # Parse YAML
-            try:
-                frontmatter = yaml.safe_load(frontmatter_text)
-            except yaml.YAMLError as e:
-                print(f"❌ Failed to parse YAML frontmatter: {e}")
-                return None
-
-            # Required fields
-            if "name" not in frontmatter or "description" not in frontmatter:
-                print(f"⚠️  {skill_path} missing required fields (name or description)")
+            parsed = self._parse_skill_file(skill_path, skill_path.read_text(encoding="utf-8"))
+            if parsed is None:
                 return None
+            frontmatter, skill_content = parsed
 
             # Get skill directory (parent of SKILL.md)
             skill_dir = skill_path.parent
@@ -116,6 +309,32 @@ class SkillLoader:
             print(f"❌ Failed to load skill ({skill_path}): {e}")
             return None
 
+    def _parse_skill_file(self, skill_path: Path, content: str) -> Optional[tuple[dict, str]]:
+        """Split SKILL.md into its validated YAML frontmatter and body, or None if invalid."""
+        # Parse YAML frontmatter
+        frontmatter_match = re.match(r"^---\n(.*?)\n---\n(.*)$", content, re.DOTALL)
+
+        if not frontmatter_match:
+            print(f"⚠️  {skill_path} missing YAML frontmatter")
+            return None
+
+        frontmatter_text = frontmatter_match.group(1)
+        skill_content = frontmatter_match.group(2).strip()
+
+        # Parse YAML
+        try:
+            frontmatter = yaml.safe_load(frontmatter_text)
+        except yaml.YAMLError as e:
+            print(f"❌ Failed to parse YAML frontmatter: {e}")
+            return None
+
+        # Required fields
+        if "name" not in frontmatter or "description" not in frontmatter:
+            print(f"⚠️  {skill_path} missing required fields (name or description)")
+            return None
+
+        return frontmatter, skill_content
+
     def _process_skill_paths(self, content: str, skill_dir: Path) -> str:
         """
         Process skill content to replace relative paths with absolute paths.
@@ -123,6 +342,11 @@ class SkillLoader:
         Supports Progressive Disclosure Level 3+: converts relative file references
         to absolute paths so Agent can easily read nested resources.
 
+        Rewrites script/resource paths, document references ("see reference.md") and
+        markdown links whose target exists in the skill directory. Existence is checked
+        against the directory's file list, built once per loader; results are memoized
+        per (skill_dir, content).
+
         Args:
             content: Original skill content
             skill_dir: Skill directory path
@@ -130,66 +354,14 @@ class SkillLoader:
         Returns:
             Processed content with absolute paths
         """
-        import re
-
-        # Pattern 1: Directory-based paths (scripts/, references/, assets/)
-        # See https://agentskills.io/specification#optional-directories
-        def replace_dir_path(match):
-            prefix = match.group(1)  # e.g., "python " or "`"
-            rel_path = match.group(2)  # e.g., "scripts/with_server.py"
-
-            abs_path = skill_dir / rel_path
-            if abs_path.exists():
-                return f"{prefix}{abs_path}"
-            return match.group(0)
-
-        pattern_dirs = r"(python\s+|`)((?:scripts|references|assets)/[^\s`\)]+)"
-        content = re.sub(pattern_dirs, replace_dir_path, content)
-
-        # Pattern 2: Direct markdown/document references (forms.md, reference.md, etc.)
-        # Matches phrases like "see reference.md" or "read forms.md"
-        def replace_doc_path(match):
-            prefix = match.group(1)  # e.g., "see ", "read "
-            filename = match.group(2)  # e.g., "reference.md"
-            suffix = match.group(3)  # e.g., punctuation
-
-            abs_path = skill_dir / filename
-            if abs_path.exists():
-                # Add helpful instruction for Agent
-                return f"{prefix}`{abs_path}` (use read_file to access){suffix}"
-            return match.group(0)
-
-        # Match patterns like: "see reference.md" or "read forms.md"
-        pattern_docs = r"(see|read|refer to|check)\s+([a-zA-Z0-9_-]+\.(?:md|txt|json|yaml))([.,;\s])"
-        content = re.sub(pattern_docs, replace_doc_path, content, flags=re.IGNORECASE)
-
-        # Pattern 3: Markdown links - supports multiple formats:
-        # - [`filename.md`](filename.md) - simple filename
-        # - [text](./reference/file.md) - relative path with ./
-        # - [text](scripts/file.js) - directory-based path
-        # Matches patterns like: "Read [`docx-js.md`](docx-js.md)" or "Load [Guide](./reference/guide.md)"
-        def replace_markdown_link(match):
-            prefix = match.group(1) if match.group(1) else ""  # e.g., "Read ", "Load ", or empty
-            link_text = match.group(2)  # e.g., "`docx-js.md`" or "Guide"
-            filepath = match.group(3)  # e.g., "docx-js.md", "./reference/file.md", "scripts/file.js"
-
-            # Remove leading ./ if present
-            clean_path = filepath[2:] if filepath.startswith("./") else filepath
-
-            abs_path = skill_dir / clean_path
-            if abs_path.exists():
-                # Preserve the link text style (with or without backticks)
-                return f"{prefix}[{link_text}](`{abs_path}`) (use read_file to access)"
-            return match.group(0)
-
-        # Match markdown link patterns with optional prefix words
-        # Captures: (optional prefix word) [link text] (complete file path including ./)
-        pattern_markdown = (
-            r"(?:(Read|See|Check|Refer to|Load|View)\s+)?\[(`?[^`\]]+`?)\]\(((?:\./)?[^)]+\.(?:md|txt|json|yaml|js|py|html))\)"
-        )
-        content = re.sub(pattern_markdown, replace_markdown_link, content, flags=re.IGNORECASE)
-
-        return content
+        key = (str(skill_dir), content)
+        processed = self._processed_content.get(key)
+        if processed is None:
+            rewriter = self._path_rewriters.get(key[0])
+            if rewriter is None:
+                rewriter = self._path_rewriters[key[0]] = _SkillPathRewriter(skill_dir)
+            processed = self._processed_content[key] = rewriter.rewrite(content)
+        return processed
 
     def discover_skills(self) -> List[Skill]:
         """
@@ -204,6 +376,9 @@ class SkillLoader:
             print(f"⚠️  Skills directory does not exist: {self.skills_dir}")
             return skills
 
+        if self.manifest_path is not None:
+            return self._discover_with_manifest()
+
         # Recursively find all SKILL.md files
         for skill_file in self.skills_dir.rglob("SKILL.md"):
             skill = self.load_skill(skill_file)
@@ -213,9 +388,133 @@ class SkillLoader:
 
         return skills
 
+    def _discover_with_manifest(self) -> List[Skill]:
+        """
+        Discover skills using the manifest at self.manifest_path.
+
+        The skills tree is only walked when a recorded directory mtime changed (adding,
+        removing or renaming an entry updates its directory's mtime). A SKILL.md whose
+        mtime and size match the manifest reuses its recorded metadata; otherwise it is
+        hashed and only re-parsed if the hash changed. Discovered skills carry metadata
+        only; their content is loaded by get_skill.
+
+        Returns:
+            List of Skills (content not yet loaded)
+        """
+        manifest = self._load_manifest()
+        dirs = self._unchanged_dirs(manifest)
+        changed = dirs is None
+        if changed:
+            dirs, skill_files = self._walk_skills_tree()
+        else:
+            skill_files = list(manifest["skills"])
+
+        entries: Dict[str, Dict[str, Any]] = {}
+        for rel_path in skill_files:
+            skill_file = self.skills_dir / rel_path
+            try:
+                st = skill_file.stat()
+            except FileNotFoundError:
+                changed = True
+                continue
+            entry = manifest["skills"].get(rel_path)
+            if entry is None or entry["mtime_ns"] != st.st_mtime_ns or entry["size"] != st.st_size:
+                entry = self._scan_skill_file(skill_file, st, entry)
+                changed = True
+            entries[rel_path] = entry
+
+        if changed:
+            self._save_manifest({"version": SKILL_MANIFEST_VERSION, "dirs": dirs, "skills": entries})
+
+        skills = []
+        for rel_path, entry in entries.items():
+            meta = entry["skill"]
+            if meta is None:
+                continue
+            skill = Skill(
+                name=meta["name"],
+                description=meta["description"],
+                content=None,
+                license=meta.get("license"),
+                allowed_tools=meta.get("allowed_tools"),
+                metadata=meta.get("metadata"),
+                skill_path=self.skills_dir / rel_path,
+            )
+            skills.append(skill)
+            self.loaded_skills[skill.name] = skill
+
+        return skills
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        empty = {"version": SKILL_MANIFEST_VERSION, "dirs": {}, "skills": {}}
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return empty
+        if not isinstance(manifest, dict) or manifest.get("version") != SKILL_MANIFEST_VERSION:
+            return empty
+        return manifest
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        try:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            data = json.dumps(manifest, ensure_ascii=False, default=str)
+            atomic_write_bytes(self.manifest_path, data.encode("utf-8"))
+        except OSError as e:
+            print(f"⚠️  Failed to save skill manifest ({self.manifest_path}): {e}")
+
+    def _unchanged_dirs(self, manifest: Dict[str, Any]) -> Optional[Dict[str, int]]:
+        """Return the manifest's directory mtimes if none changed, else None."""
+        dirs = manifest["dirs"]
+        if not dirs:
+            return None
+        for rel_dir, mtime_ns in dirs.items():
+            try:
+                if os.stat(self.skills_dir / rel_dir).st_mtime_ns != mtime_ns:
+                    return None
+            except OSError:
+                return None
+        return dirs
+
+    def _walk_skills_tree(self) -> tuple[Dict[str, int], List[str]]:
+        """Walk the skills tree, returning every directory's mtime and all SKILL.md paths."""
+        dirs: Dict[str, int] = {}
+        skill_files: List[str] = []
+        for dirpath, _, filenames in os.walk(self.skills_dir, followlinks=True):
+            rel_dir = os.path.relpath(dirpath, self.skills_dir)
+            dirs[rel_dir] = os.stat(dirpath).st_mtime_ns
+            if "SKILL.md" in filenames:
+                skill_files.append(os.path.normpath(os.path.join(rel_dir, "SKILL.md")))
+        return dirs, skill_files
+
+    def _scan_skill_file(self, skill_file: Path, st: os.stat_result, previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the manifest entry for skill_file, parsing frontmatter only if its hash changed."""
+        data = skill_file.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        entry = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": digest, "skill": None}
+        if previous is not None and previous.get("sha256") == digest:
+            entry["skill"] = previous["skill"]
+            return entry
+
+        try:
+            parsed = self._parse_skill_file(skill_file, data.decode("utf-8"))
+        except Exception as e:
+            print(f"❌ Failed to load skill ({skill_file}): {e}")
+            parsed = None
+        if parsed is not None:
+            frontmatter = parsed[0]
+            entry["skill"] = {
+                "name": frontmatter["name"],
+                "description": frontmatter["description"],
+                "license": frontmatter.get("license"),
+                "allowed_tools": frontmatter.get("allowed-tools"),
+                "metadata": frontmatter.get("metadata"),
+            }
+        return entry
+
     def get_skill(self, name: str) -> Optional[Skill]:
         """
-        Get loaded skill
+        Get loaded skill, loading its full content on first request
 
         Args:
             name: Skill name
@@ -223,7 +522,13 @@ class SkillLoader:
         Returns:
             Skill object, or None if not found
         """
-        return self.loaded_skills.get(name)
+        skill = self.loaded_skills.get(name)
+        if skill is not None and skill.content is None:
+            loaded = self.load_skill(skill.skill_path)
+            if loaded is None:
+                return None
+            self.loaded_skills[name] = skill = loaded
+        return skill
 
     def list_skills(self) -> List[str]:
         """
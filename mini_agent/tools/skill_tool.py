@@ -7,7 +7,7 @@ Implements Progressive Disclosure (Level 2): Load full skill content when needed
 from typing import Any, Dict, List, Optional
 
 from .base import Tool, ToolResult
-from .skill_loader import SkillLoader
+from .skill_loader import SkillLoader, default_manifest_path
 
 
 class GetSkillTool(Tool):
@@ -56,6 +56,7 @@ class GetSkillTool(Tool):
 
 def create_skill_tools(
     skills_dir: str = "./skills",
+    manifest_path: Optional[str] = None,
 ) -> tuple[List[Tool], Optional[SkillLoader]]:
     """
     Create skill tool for Progressive Disclosure
@@ -65,12 +66,14 @@ def create_skill_tools(
 
     Args:
         skills_dir: Skills directory path
+        manifest_path: Discovery manifest file (default: per-directory file under
+            ~/.mini-agent/cache)
 
     Returns:
         Tuple of (list of tools, skill loader)
     """
     # Create skill loader
-    loader = SkillLoader(skills_dir)
+    loader = SkillLoader(skills_dir, manifest_path=manifest_path or default_manifest_path(skills_dir))
 
     # Discover and load skills
     skills = loader.discover_skills()
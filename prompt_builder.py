@@ -9,21 +9,199 @@ Prompt 构建器 - 基于正交分离的设计
 两个维度可以自由组合，形成 2×2 = 4 种报告类型
 """
 
+import functools
+import re
 import yaml
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from jinja2 import Template
 
 
+# 组件之间的分隔符
+COMPONENT_SEPARATOR = "\n\n---\n\n"
+
+# 预算控制：未在配置中列出的组件的默认设置
+DEFAULT_COMPONENT_POLICY = {"priority": 5, "required": False, "compressible": True}
+# 截断后不足该 token 数的组件直接删除
+MIN_TRUNCATED_TOKENS = 200
+TRUNCATION_NOTE = "<!-- 因篇幅限制，以下内容已省略 -->"
+
+_FENCED_CODE_PATTERN = re.compile(r"(```.*?```)", re.DOTALL)
+_HTML_COMMENT_PATTERN = re.compile(r"<!--.*?-->", re.DOTALL)
+_RULE_LINE_PATTERN = re.compile(r"^[ \t]*([-*_])([ \t]*\1){2,}[ \t]*$", re.MULTILINE)
+_BOLD_PATTERN = re.compile(r"\*\*(\S(?:.*?\S)?)\*\*")
+_TRAILING_SPACE_PATTERN = re.compile(r"[ \t]+$", re.MULTILINE)
+_BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding():
+    """tiktoken 编码器（进程内只初始化一次；不可用时返回 None，同样只尝试一次）"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """计算文本的 token 数；tiktoken 不可用时按 2.5 字符 ≈ 1 token 估算"""
+    encoding = _get_encoding()
+    if encoding is None:
+        return int(len(text) / 2.5)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def compact_markdown(text: str) -> str:
+    """
+    压缩 Markdown 组件：去掉 HTML 注释、分隔线、粗体标记、行尾空白和多余空行
+
+    代码块内容保持不变。
+    """
+    parts = _FENCED_CODE_PATTERN.split(text)
+    for i in range(0, len(parts), 2):  # 偶数下标为代码块之外的文本
+        part = _HTML_COMMENT_PATTERN.sub("", parts[i])
+        part = _RULE_LINE_PATTERN.sub("", part)
+        part = _BOLD_PATTERN.sub(r"\1", part)
+        part = _TRAILING_SPACE_PATTERN.sub("", part)
+        parts[i] = _BLANK_LINES_PATTERN.sub("\n\n", part)
+    return "".join(parts).strip()
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """按段落截断到 max_tokens 以内（保留开头的段落），不足一段时返回空字符串"""
+    budget = max_tokens - count_tokens(TRUNCATION_NOTE)
+    kept = []
+    for paragraph in text.split("\n\n"):
+        cost = count_tokens(paragraph) + (2 if kept else 0)
+        if cost > budget:
+            break
+        kept.append(paragraph)
+        budget -= cost
+    if not kept:
+        return ""
+    truncated = "\n\n".join(kept)
+    if truncated.count("```") % 2:
+        truncated += "\n```"  # 截断处在代码块内时补上结束标记
+    return f"{truncated}\n\n{TRUNCATION_NOTE}"
+
+
+@dataclass
+class PromptAssembly:
+    """按 token 预算组装的系统提示词"""
+
+    prompt: str
+    tokens: int                      # 最终系统提示词的 token 数
+    budget: Optional[int]            # token 预算，None 表示不限制
+    # 每个组件的处理结果: {"path", "priority", "tokens", "action"}
+    # action: full（完整）/ compressed（压缩）/ truncated（截断）/ dropped（删除）
+    components: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def dropped(self) -> List[str]:
+        return [c["path"] for c in self.components if c["action"] == "dropped"]
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.tokens > self.budget
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_template(source: str) -> Template:
+    """编译 Jinja 模板，相同源码只编译一次"""
+    return Template(source)
+
+
+class _TemplateEntry:
+    """一个组件文件的缓存：内容、编译后的模板和 token 数（后两者按需计算）"""
+
+    __slots__ = ("version", "text", "_template", "_tokens")
+
+    def __init__(self, version: Optional[tuple], text: str):
+        self.version = version
+        self.text = text
+        self._template = None
+        self._tokens = None
+
+    @property
+    def template(self) -> Template:
+        if self._template is None:
+            self._template = Template(self.text)
+        return self._template
+
+    @property
+    def tokens(self) -> int:
+        if self._tokens is None:
+            self._tokens = count_tokens(self.text)
+        return self._tokens
+
+
+class PromptTemplateRegistry:
+    """Prompt 组件文件的注册表
+
+    按 (相对路径, mtime, 大小) 缓存文件内容、编译后的 Jinja 模板和 token 数，
+    每次访问只做一次 stat，文件变化后自动重新加载。
+    """
+
+    def __init__(self, prompts_dir):
+        """
+        Args:
+            prompts_dir: prompts 目录路径
+        """
+        self.prompts_dir = Path(prompts_dir)
+        self._entries: Dict[str, _TemplateEntry] = {}
+
+    def version(self, relative_path: str) -> Optional[tuple]:
+        """文件当前版本 (mtime_ns, size)，文件不存在时为 None"""
+        return self._entry(relative_path).version
+
+    def get_text(self, relative_path: str) -> str:
+        """文件内容（去除首尾空白）；文件不存在时返回占位符"""
+        return self._entry(relative_path).text
+
+    def get_template(self, relative_path: str) -> Template:
+        """编译后的 Jinja 模板"""
+        return self._entry(relative_path).template
+
+    def token_count(self, relative_path: str) -> int:
+        """文件内容的 token 数"""
+        return self._entry(relative_path).tokens
+
+    def _entry(self, relative_path: str) -> _TemplateEntry:
+        file_path = self.prompts_dir / relative_path
+        try:
+            stat = file_path.stat()
+            version = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            version = None
+
+        entry = self._entries.get(relative_path)
+        if entry is not None and entry.version == version:
+            return entry
+
+        if version is None:
+            # 如果文件不存在，返回占位符
+            text = f"<!-- TODO: Create {relative_path} -->"
+        else:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                text = f.read().strip()
+
+        entry = _TemplateEntry(version, text)
+        self._entries[relative_path] = entry
+        return entry
+
+
 class PromptBuilder:
     """基于正交分离的 Prompt 构建器"""
     
-    def __init__(self, prompts_dir: str = "./prompts"):
+    def __init__(self, prompts_dir: str = "./prompts", max_tokens: Optional[int] = None):
         """
         初始化 Prompt 构建器
         
         Args:
             prompts_dir: prompts 目录路径
+            max_tokens: 系统提示词的 token 预算，默认取配置中的 prompt_budget.max_tokens
         """
         self.prompts_dir = Path(prompts_dir)
         
@@ -31,6 +209,17 @@ class PromptBuilder:
         config_path = self.prompts_dir / "configs" / "report_configs.yaml"
         with open(config_path, 'r', encoding='utf-8') as f:
             self.configs = yaml.safe_load(f)
+        
+        # token 预算与组件优先级
+        budget_config = self.configs.get('prompt_budget') or {}
+        self.max_tokens = max_tokens if max_tokens is not None else budget_config.get('max_tokens')
+        self.component_policies = budget_config.get('components') or {}
+        
+        # 组件文件缓存（内容 / 编译后的模板 / token 数）
+        self.templates = PromptTemplateRegistry(self.prompts_dir)
+        # 预组合的系统提示词: (perspective, format) -> (各组件版本, PromptAssembly)
+        self._system_prompts: Dict[tuple, tuple] = {}
+        self.precompose()
     
     def build_prompt(
         self,
@@ -67,7 +256,7 @@ class PromptBuilder:
             parts.append(content)
         
         # 组装完整 Prompt
-        prompt = "\n\n---\n\n".join(parts)
+        prompt = COMPONENT_SEPARATOR.join(parts)
         
         # 替换模板变量
         return self._render_template(prompt, context)
@@ -85,26 +274,156 @@ class PromptBuilder:
             format: 写作形式（可选，用于加载写作格式指南）
         
         Returns:
-            系统提示词
+            系统提示词（超出 token 预算时已压缩或删减低优先级组件）
         """
-        parts = []
+        return self.assemble_system_prompt(perspective, format).prompt
+    
+    def assemble_system_prompt(
+        self,
+        perspective: str,
+        format: str = None
+    ) -> PromptAssembly:
+        """
+        按 token 预算组装系统提示词
+        
+        超出预算时按优先级从低到高依次处理非必需组件：先压缩，仍超出再截断或删除，
+        直到总量不超过预算；必需组件始终完整保留。
+        
+        Args:
+            perspective: 分析视角
+            format: 写作形式（可选）
+        
+        Returns:
+            PromptAssembly（最终提示词、token 数及各组件的处理结果）
+        """
+        components = self._system_prompt_components(perspective, format)
+        versions = tuple(self.templates.version(path) for path in components)
+        
+        # 组件文件都没有变化时直接返回预组合的结果
+        cached = self._system_prompts.get((perspective, format))
+        if cached is not None and cached[0] == versions:
+            return cached[1]
+        
+        assembly = self._assemble(components)
+        self._system_prompts[(perspective, format)] = (versions, assembly)
+        return assembly
+    
+    def _assemble(self, components: List[str]) -> PromptAssembly:
+        texts = {path: self.templates.get_text(path) for path in components}
+        items = {
+            path: {"path": path, "priority": self._policy(path)["priority"],
+                   "tokens": self.templates.token_count(path), "action": "full"}
+            for path in components
+        }
+        
+        if self.max_tokens is not None:
+            self._fit_to_budget(components, texts, items)
+        
+        prompt = COMPONENT_SEPARATOR.join(
+            texts[path] for path in components if items[path]["action"] != "dropped"
+        )
+        assembly = PromptAssembly(
+            prompt=prompt,
+            tokens=count_tokens(prompt),
+            budget=self.max_tokens,
+            components=[items[path] for path in components]
+        )
+        if assembly.over_budget:
+            print(f"⚠️  系统提示词必需组件已超出 token 预算: {assembly.tokens} > {self.max_tokens}")
+        return assembly
+    
+    def _fit_to_budget(self, components: List[str], texts: Dict[str, str], items: Dict[str, dict]):
+        """原地压缩 / 截断 / 删除非必需组件，使总 token 数不超过预算"""
+        separator_tokens = count_tokens(COMPONENT_SEPARATOR)
+        
+        def total():
+            kept = [item for item in items.values() if item["action"] != "dropped"]
+            return sum(item["tokens"] for item in kept) + separator_tokens * max(0, len(kept) - 1)
+        
+        # 可删减的组件，优先级数值越大越先处理（同优先级时靠后的先处理）
+        optional = sorted(
+            (path for path in components if not self._policy(path)["required"]),
+            key=lambda path: (self._policy(path)["priority"], components.index(path)),
+            reverse=True
+        )
+        
+        # 1. 压缩
+        for path in optional:
+            if total() <= self.max_tokens:
+                return
+            if self._policy(path)["compressible"]:
+                texts[path] = compact_markdown(texts[path])
+                items[path].update(tokens=count_tokens(texts[path]), action="compressed")
+                if not texts[path]:
+                    items[path].update(tokens=0, action="dropped")
+        
+        # 2. 截断或删除
+        for path in optional:
+            overflow = total() - self.max_tokens
+            if overflow <= 0:
+                return
+            item = items[path]
+            if item["action"] == "dropped":
+                continue
+            allowed = item["tokens"] - overflow
+            if self._policy(path)["compressible"] and allowed >= MIN_TRUNCATED_TOKENS:
+                texts[path] = truncate_to_tokens(texts[path], allowed)
+                if texts[path]:
+                    item.update(tokens=count_tokens(texts[path]), action="truncated")
+                    continue
+            item.update(tokens=0, action="dropped")
+    
+    def _policy(self, relative_path: str) -> Dict[str, Any]:
+        """组件的预算策略：先按完整路径匹配，再按所在目录匹配"""
+        policy = self.component_policies.get(relative_path)
+        if policy is None:
+            policy = self.component_policies.get(relative_path.split("/", 1)[0])
+        return {**DEFAULT_COMPONENT_POLICY, **(policy or {})}
+    
+    def precompose(self):
+        """预先组合所有 分析视角 × 写作形式 的系统提示词"""
+        dimensions = self.configs.get('dimensions', {})
+        formats = [None, *dimensions.get('writing_formats', {})]
+        for perspective in dimensions.get('analysis_perspectives', {}):
+            for format in formats:
+                self.build_system_prompt(perspective, format)
+    
+    def component_token_counts(self, perspective: str, format: str = None) -> Dict[str, int]:
+        """
+        系统提示词各组件的 token 数（用于预算控制）
+        
+        Args:
+            perspective: 分析视角
+            format: 写作形式（可选）
         
+        Returns:
+            {组件相对路径: token 数}，顺序与系统提示词中的顺序一致
+        """
+        return {
+            path: self.templates.token_count(path)
+            for path in self._system_prompt_components(perspective, format)
+        }
+    
+    @staticmethod
+    def _system_prompt_components(perspective: str, format: str = None) -> List[str]:
+        """系统提示词由哪些组件文件组成（按拼接顺序）"""
         # 1. 基础系统提示
-        parts.append(self._load_file("base/system_prompt.md"))
+        components = ["base/system_prompt.md"]
         
         # 2. 分析视角
-        parts.append(self._load_file(f"analysis_perspectives/{perspective}.md"))
+        components.append(f"analysis_perspectives/{perspective}.md")
         
         # 3. 写作形式指南（如果需要）
         if format:
-            parts.append(self._load_file(f"writing_formats/{format}.md"))
+            components.append(f"writing_formats/{format}.md")
         
         # 4. 通用组件
-        parts.append(self._load_file("components/data_requirements.md"))
-        parts.append(self._load_file("components/chart_specifications.md"))
-        parts.append(self._load_file("components/compliance_rules.md"))
-        
-        return "\n\n---\n\n".join(parts)
+        components.extend([
+            "components/data_requirements.md",
+            "components/chart_specifications.md",
+            "components/compliance_rules.md",
+        ])
+        return components
     
     def build_task(
         self,
@@ -126,18 +445,15 @@ class PromptBuilder:
         if context is None:
             context = {}
         
-        # 加载报告结构模板
+        # 报告结构模板（已编译）
         structure_path = f"report_structures/{perspective}_{format}.md"
-        structure = self._load_file(structure_path)
+        structure = self.templates.get_template(structure_path)
         
         # 构建任务头部
         header = self._build_task_header(perspective, format, context)
         
-        # 组装
-        task = f"{header}\n\n{structure}"
-        
-        # 替换变量
-        return self._render_template(task, context)
+        # 组装（头部已填入变量，只需渲染结构模板）
+        return f"{header}\n\n{structure.render(**context)}"
     
     def get_output_specs(
         self,
@@ -150,20 +466,12 @@ class PromptBuilder:
         return config.get('output_specs', {})
     
     def _load_file(self, relative_path: str) -> str:
-        """加载文件内容"""
-        file_path = self.prompts_dir / relative_path
-        
-        if not file_path.exists():
-            # 如果文件不存在，返回占位符
-            return f"<!-- TODO: Create {relative_path} -->"
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read().strip()
+        """加载文件内容（经注册表缓存）"""
+        return self.templates.get_text(relative_path)
     
     def _render_template(self, content: str, context: Dict[str, Any]) -> str:
         """渲染模板变量"""
-        template = Template(content)
-        return template.render(**context)
+        return _compile_template(content).render(**context)
     
     def _build_task_header(
         self,
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+报告目录 - 常驻内存的报告索引
+Report Catalog
+启动时扫描一次 reports/metadata，之后由轮询线程增量更新，
+按股票 / 版本维护有序列表，查询开销只与结果大小相关
+"""
+
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+# 报告文件名格式: {stock_code}_{version}_{date}.md
+# 例如: 688388_professional_20260122.md 或 688388_normal_20260122.md
+REPORT_FILENAME_PATTERN = re.compile(r'^(\d+)_(professional|normal)_(\d{8})\.md$')
+
+VERSIONS = ('professional', 'normal')
+
+# 分页查询的默认 / 最大页大小
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# 目录 mtime 距今不足该时长时不记录，避免同一时间片内的新文件被漏掉
+MTIME_SETTLE_NS = 1_000_000_000
+
+
+def _record_key(item):
+    """全部报告按 (timestamp, 元数据文件名) 升序排列"""
+    return (item[1].get('timestamp', ''), item[0])
+
+
+def _timestamp_key(item):
+    return item[1].get('timestamp', '')
+
+
+def _entry_key(item):
+    """单只股票的报告按 (日期, 元数据文件名) 升序排列"""
+    return (item[1]['date_str'], item[0])
+
+
+class ReportCatalog:
+    """常驻内存的报告目录
+
+    - 每个元数据文件只解析一次，之后按 mtime 判断是否需要重新读取
+    - 全部报告、按股票分组的报告都以有序列表维护，插入/删除为增量操作
+    - 读取方法返回副本，可在 Flask 多线程中安全使用
+    """
+
+    def __init__(self, metadata_dir):
+        """
+        初始化报告目录
+
+        Args:
+            metadata_dir: 元数据目录（reports/metadata）
+        """
+        self.metadata_dir = Path(metadata_dir)
+        # 元数据文件名 -> (mtime_ns, metadata)
+        self._files: Dict[str, tuple] = {}
+        # [(元数据文件名, metadata)]，按 _record_key 升序
+        self._records: List[tuple] = []
+        # 股票代码 -> [(元数据文件名, metadata)]，按 _record_key 升序（含失败记录）
+        self._records_by_stock: Dict[str, List[tuple]] = {}
+        # 股票代码 -> 版本 -> [(元数据文件名, entry)]，按 _entry_key 升序
+        self._by_stock: Dict[str, Dict[str, List[tuple]]] = {}
+        self._dir_mtime_ns: Optional[int] = None
+        self._lock = threading.RLock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        # 每次内容变化递增，可作为缓存键
+        self.version = 0
+
+        self.refresh(force=True)
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def all_reports(self) -> list:
+        """全部报告元数据（最新的在前面），与 FinancialReporter.get_all_reports 一致"""
+        with self._lock:
+            return [metadata for _, metadata in reversed(self._records)]
+
+    def reports_by_stock(self) -> dict:
+        """按股票代码分组的成功报告（每个版本内最新的在前面）"""
+        with self._lock:
+            return {
+                stock_code: self._versions_snapshot(versions)
+                for stock_code, versions in self._by_stock.items()
+            }
+
+    def stock_versions(self, stock_code: str) -> Optional[dict]:
+        """指定股票的各版本报告列表，股票不存在时返回 None"""
+        with self._lock:
+            versions = self._by_stock.get(stock_code)
+            if versions is None:
+                return None
+            return self._versions_snapshot(versions)
+
+    def query(
+        self,
+        stock_code: str = None,
+        version: str = None,
+        status: str = None,
+        date_from: str = None,
+        date_to: str = None,
+        after: tuple = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> tuple:
+        """
+        按条件分页查询报告元数据（最新的在前面）
+
+        使用 (timestamp, 元数据文件名) 作为键集游标，每页只扫描本页附近的记录。
+
+        Args:
+            stock_code: 股票代码
+            version: 报告版本
+            status: 报告状态（success / failed）
+            date_from: 起始日期（含），格式 YYYY-MM-DD
+            date_to: 结束日期（含），格式 YYYY-MM-DD
+            after: 上一页返回的游标键，从其之后继续
+            limit: 页大小
+
+        Returns:
+            (本页元数据列表, 下一页游标键或 None)
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        with self._lock:
+            records = self._records if stock_code is None else self._records_by_stock.get(stock_code, [])
+
+            # 报告时间戳以报告日期开头，日期范围可以直接换算为有序列表上的区间
+            start = 0
+            if date_from:
+                start = bisect.bisect_left(records, date_from, key=_timestamp_key)
+            end = len(records)
+            if after is not None:
+                end = bisect.bisect_left(records, tuple(after), key=_record_key)
+            if date_to:
+                end = min(end, bisect.bisect_right(records, date_to + '\uffff', key=_timestamp_key))
+
+            page = []
+            for index in range(end - 1, start - 1, -1):
+                metadata = records[index][1]
+                if version is not None and metadata.get('version') != version:
+                    continue
+                if status is not None and metadata.get('status') != status:
+                    continue
+                if date_from and metadata.get('date', '') < date_from:
+                    continue
+                if date_to and metadata.get('date', '') > date_to:
+                    continue
+                if len(page) == limit:
+                    # 后面还有记录，以本页最后一条作为下一页的游标
+                    return [m for _, m in page], _record_key(page[-1])
+                page.append(records[index])
+
+            return [m for _, m in page], None
+
+    @staticmethod
+    def _versions_snapshot(versions: dict) -> dict:
+        return {
+            version: [dict(entry) for _, entry in reversed(entries)]
+            for version, entries in versions.items()
+        }
+
+    # ------------------------------------------------------------------
+    # 增量更新
+    # ------------------------------------------------------------------
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        同步元数据目录的变化
+
+        目录 mtime 未变时直接返回（元数据文件只新建、不原地修改）。
+
+        Args:
+            force: 忽略目录 mtime，强制扫描
+
+        Returns:
+            是否有变化
+        """
+        try:
+            dir_mtime_ns = self.metadata_dir.stat().st_mtime_ns
+        except OSError:
+            return False
+
+        if not force and dir_mtime_ns == self._dir_mtime_ns:
+            return False
+
+        current = {}
+        try:
+            with os.scandir(self.metadata_dir) as it:
+                for dir_entry in it:
+                    name = dir_entry.name
+                    if name.startswith('report_') and name.endswith('.json') and dir_entry.is_file():
+                        current[name] = dir_entry.stat().st_mtime_ns
+        except OSError as e:
+            print(f"扫描元数据目录失败 {self.metadata_dir}: {e}")
+            return False
+
+        changed = False
+        with self._lock:
+            for name in list(self._files):
+                if name not in current:
+                    self._remove(name)
+                    changed = True
+
+            for name, mtime_ns in current.items():
+                known = self._files.get(name)
+                if known is not None and known[0] == mtime_ns:
+                    continue
+                metadata = self._read_metadata(name)
+                if metadata is None:
+                    continue
+                if known is not None:
+                    self._remove(name)
+                self._add(name, mtime_ns, metadata)
+                changed = True
+
+            settled = time.time_ns() - dir_mtime_ns > MTIME_SETTLE_NS
+            self._dir_mtime_ns = dir_mtime_ns if settled else None
+            if changed:
+                self.version += 1
+
+        return changed
+
+    def _read_metadata(self, name: str) -> Optional[dict]:
+        try:
+            with open(self.metadata_dir / name, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"读取元数据文件失败 {name}: {e}")
+            return None
+
+    def _add(self, name: str, mtime_ns: int, metadata: dict):
+        self._files[name] = (mtime_ns, metadata)
+        bisect.insort(self._records, (name, metadata), key=_record_key)
+        stock_records = self._records_by_stock.setdefault(metadata.get('stock_code'), [])
+        bisect.insort(stock_records, (name, metadata), key=_record_key)
+
+        entry = self._make_entry(metadata)
+        if entry is not None:
+            stock_code, version = entry.pop('stock_code'), entry.pop('version')
+            versions = self._by_stock.setdefault(stock_code, {v: [] for v in VERSIONS})
+            bisect.insort(versions[version], (name, entry), key=_entry_key)
+
+    def _remove(self, name: str):
+        _, metadata = self._files.pop(name)
+        _remove_sorted(self._records, (name, metadata), _record_key)
+        stock_records = self._records_by_stock.get(metadata.get('stock_code'))
+        if stock_records is not None:
+            _remove_sorted(stock_records, (name, metadata), _record_key)
+            if not stock_records:
+                del self._records_by_stock[metadata.get('stock_code')]
+
+        entry = self._make_entry(metadata)
+        if entry is not None:
+            stock_code, version = entry.pop('stock_code'), entry.pop('version')
+            versions = self._by_stock.get(stock_code)
+            if versions is not None:
+                _remove_sorted(versions[version], (name, entry), _entry_key)
+                if not any(versions.values()):
+                    del self._by_stock[stock_code]
+
+    @staticmethod
+    def _make_entry(metadata: dict) -> Optional[dict]:
+        """把成功报告的元数据转换为首页 / 版本接口使用的条目"""
+        if metadata.get('status') != 'success':
+            return None
+
+        filename = metadata.get('filename', '')
+        match = REPORT_FILENAME_PATTERN.match(filename)
+        if not match:
+            return None
+
+        stock_code, version, date_str = match.groups()
+        return {
+            'stock_code': stock_code,
+            'version': version,
+            'filename': filename,
+            # 格式化日期: 20260122 -> 2026-01-22
+            'date': f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}",
+            'date_str': date_str,
+            'timestamp': metadata.get('timestamp', ''),
+        }
+
+    # ------------------------------------------------------------------
+    # 后台监听
+    # ------------------------------------------------------------------
+
+    def start_watching(self, interval: float = 2.0):
+        """启动后台轮询线程，定期同步元数据目录的变化"""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+
+        self._stop_event.clear()
+
+        def watch():
+            while not self._stop_event.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"报告目录刷新失败: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="report-catalog-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        """停止后台轮询线程"""
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+
+def _remove_sorted(items: list, item: tuple, key):
+    """从有序列表中删除指定元素（按元数据文件名精确匹配）"""
+    target = key(item)
+    index = bisect.bisect_left(items, target, key=key)
+    while index < len(items) and key(items[index]) == target:
+        if items[index][0] == item[0]:
+            del items[index]
+            return
+        index += 1
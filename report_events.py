@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+报告事件流
+Report Events
+调度器和报告生成器把任务进度追加写入 reports/events.jsonl，
+Web 服务器跟踪该文件，通过 SSE 把新事件推送给页面
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows 下轮转不做跨进程互斥
+    fcntl = None
+
+EVENTS_FILENAME = "events.jsonl"
+
+# 事件类型
+TASK_STARTED = "task_started"            # 调度任务开始
+REPORT_STARTED = "report_started"        # 单篇报告开始生成
+STEP_PROGRESS = "step_progress"          # Agent 完成一步
+REPORT_COMPLETED = "report_completed"    # 报告生成成功
+REPORT_FAILED = "report_failed"          # 报告生成失败
+TASK_FINISHED = "task_finished"          # 调度任务结束
+
+MAX_LOG_BYTES = 4 * 1024 * 1024   # 日志超过该大小时轮转为 events.jsonl.1
+BACKLOG_SIZE = 500                # 内存中保留的最近事件数，用于断线重连补发
+TAIL_BYTES = 256 * 1024           # 启动时只读取日志末尾这么多字节
+
+
+class ReportEventLog:
+    """事件日志的写入端
+
+    每个事件是一行 JSON，以 O_APPEND 单次 write 写入，
+    调度器、报告生成器等多个进程可以同时追加而不会交错。
+
+    追加时持有日志的共享锁，轮转时持有排他锁（flock）：
+    轮转只会发生在没有进行中的追加时，且多个进程不会重复轮转。
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: 事件日志路径（reports/events.jsonl）
+        """
+        self.path = Path(path)
+
+    def publish(self, event_type: str, **data) -> dict:
+        """
+        追加一个事件，写入失败只打印警告，不影响报告生成
+
+        Args:
+            event_type: 事件类型
+            **data: 事件内容（需可 JSON 序列化）
+
+        Returns:
+            写入的事件
+        """
+        event = {"type": event_type, "time": datetime.now().isoformat(timespec="seconds"), **data}
+        line = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+        try:
+            self._rotate_if_needed()
+            self._append(line)
+        except OSError as e:
+            print(f"⚠️  写入事件日志失败 {self.path}: {e}")
+        return event
+
+    def _append(self, line: bytes):
+        while True:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_SH)
+                    # 加锁前日志可能已被轮转，此时重新打开新文件
+                    try:
+                        if os.fstat(fd).st_ino != os.stat(self.path).st_ino:
+                            continue
+                    except FileNotFoundError:
+                        continue
+                os.write(fd, line)
+                return
+            finally:
+                os.close(fd)
+
+    def _rotate_if_needed(self):
+        try:
+            if self.path.stat().st_size < MAX_LOG_BYTES:
+                return
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                # 加锁后重新检查：其他进程可能已经完成轮转
+                try:
+                    if os.fstat(fd).st_ino != os.stat(self.path).st_ino:
+                        return
+                except FileNotFoundError:
+                    return
+                if os.fstat(fd).st_size < MAX_LOG_BYTES:
+                    return
+            os.replace(self.path, self.path.with_name(self.path.name + ".1"))
+        finally:
+            os.close(fd)
+
+
+class EventFeed:
+    """事件日志的读取端
+
+    后台线程跟踪日志文件的新增内容，最近的事件保存在内存环形缓冲中，
+    SSE 连接通过 wait_for_events() 阻塞等待新事件。
+
+    事件 ID 为 "{inode:x}-{行尾偏移}"，由文件位置决定，
+    同一份日志在不同 worker 进程中得到相同的 ID，客户端重连到任意 worker 都能续传。
+    """
+
+    def __init__(self, path, backlog_size: int = BACKLOG_SIZE):
+        """
+        Args:
+            path: 事件日志路径
+            backlog_size: 内存中保留的最近事件数
+        """
+        self.path = Path(path)
+        self._events = deque(maxlen=backlog_size)   # [(event_id, (inode, offset), event)]
+        self._cond = threading.Condition()
+        self._inode: Optional[int] = None
+        self._offset = 0
+        self._partial = b""
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        self.poll(initial=True)
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def resume_from(self, last_event_id: Optional[str] = None) -> tuple:
+        """
+        根据客户端的 Last-Event-ID 确定从哪里开始推送
+
+        Args:
+            last_event_id: 客户端收到的最后一个事件 ID；缺失或无法解析时从当前位置开始
+
+        Returns:
+            读取位置 (inode, offset)，传给 wait_for_events
+        """
+        position = self._parse_id(last_event_id)
+        return position if position is not None else self.position()
+
+    def wait_for_events(self, after: tuple, timeout: float) -> tuple:
+        """
+        阻塞等待 after 之后的新事件
+
+        Args:
+            after: 读取位置 (inode, offset)
+            timeout: 最长等待秒数
+
+        Returns:
+            ([(event_id, event)], 新的读取位置)，超时时事件列表为空
+        """
+        with self._cond:
+            events = self._events_after(after)
+            if not events:
+                self._cond.wait(timeout)
+                events = self._events_after(after)
+            if not events:
+                return [], after
+            return [(event_id, event) for event_id, _, event in events], events[-1][1]
+
+    def position(self) -> tuple:
+        """当前读取位置"""
+        with self._cond:
+            return (self._inode, self._offset)
+
+    @staticmethod
+    def _parse_id(event_id: Optional[str]) -> Optional[tuple]:
+        if not event_id:
+            return None
+        try:
+            inode, offset = event_id.split("-", 1)
+            return (int(inode, 16), int(offset))
+        except ValueError:
+            return None
+
+    def _events_after(self, after: tuple) -> List[tuple]:
+        inode, offset = after
+        # 客户端的位置属于已轮转的旧日志时，补发缓冲中当前日志的全部事件
+        return [item for item in self._events if item[1][0] != inode or item[1][1] > offset]
+
+    # ------------------------------------------------------------------
+    # 跟踪日志文件
+    # ------------------------------------------------------------------
+
+    def poll(self, initial: bool = False) -> int:
+        """
+        读取日志的新增内容
+
+        Args:
+            initial: 首次读取，只加载文件末尾的一段作为补发缓冲
+
+        Returns:
+            新读取的事件数
+        """
+        count = 0
+        try:
+            with open(self.path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                if stat.st_ino != self._inode or stat.st_size < self._offset:
+                    if self._inode is not None and stat.st_ino != self._inode:
+                        # 日志被轮转：先读完旧日志在上次轮询之后追加的事件
+                        count += self._drain_rotated()
+                    # 从头读取新文件
+                    self._inode, self._offset, self._partial = stat.st_ino, 0, b""
+                    if initial and stat.st_size > TAIL_BYTES:
+                        f.seek(stat.st_size - TAIL_BYTES)
+                        f.readline()  # 丢弃不完整的第一行
+                        self._offset = f.tell()
+                if stat.st_size == self._offset:
+                    return count
+                f.seek(self._offset)
+                data = f.read(stat.st_size - self._offset)
+        except FileNotFoundError:
+            return count
+        except OSError as e:
+            print(f"读取事件日志失败 {self.path}: {e}")
+            return count
+
+        return count + self._consume(data)
+
+    def _drain_rotated(self) -> int:
+        """读取已轮转为 events.jsonl.1 的旧日志中尚未读取的部分"""
+        try:
+            with open(self.path.with_name(self.path.name + ".1"), "rb") as f:
+                if os.fstat(f.fileno()).st_ino != self._inode:
+                    return 0
+                f.seek(self._offset)
+                data = f.read()
+        except OSError:
+            return 0
+        return self._consume(data)
+
+    def _consume(self, data: bytes) -> int:
+        """解析从当前偏移开始读到的数据，把完整的事件加入缓冲"""
+        start_offset = self._offset - len(self._partial)
+        new_offset = self._offset + len(data)
+        data = self._partial + data
+
+        new_events = []
+        position = start_offset
+        lines = data.split(b"\n")
+        self._partial = lines.pop()  # 最后一段可能是尚未写完的行
+        for line in lines:
+            position += len(line) + 1
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            event_id = f"{self._inode:x}-{position}"
+            new_events.append((event_id, (self._inode, position), event))
+
+        # 偏移与事件同时更新，等待方不会在两者之间取到位置而漏掉事件
+        with self._cond:
+            self._offset = new_offset
+            if new_events:
+                self._events.extend(new_events)
+                self._cond.notify_all()
+        return len(new_events)
+
+    def start_watching(self, interval: float = 0.5):
+        """启动后台轮询线程"""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+
+        self._stop_event.clear()
+
+        def watch():
+            while not self._stop_event.wait(interval):
+                try:
+                    self.poll()
+                except Exception as e:
+                    print(f"事件日志轮询失败: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="report-event-feed", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        """停止后台轮询线程"""
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+
+def format_sse(event_id: str, event: dict) -> str:
+    """把事件编码为一条 SSE 消息"""
+    data = json.dumps(event, ensure_ascii=False)
+    return f"id: {event_id}\nevent: {event.get('type', 'message')}\ndata: {data}\n\n"
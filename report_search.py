@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+报告全文检索
+Full-text Search over Reports
+基于倒排索引 + BM25 排序，中文按二元组（bigram）切分，
+报告保存时增量更新，索引以压缩形式保存在磁盘上
+"""
+
+import gzip
+import heapq
+import html
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from report_catalog import REPORT_FILENAME_PATTERN
+
+try:
+    import fcntl
+except ImportError:  # Windows 下不做跨进程互斥
+    fcntl = None
+
+
+INDEX_FILENAME = "search_index.jsonl.gz"
+
+# 失效记录超过该数量且多于有效记录时压缩索引文件
+COMPACT_MIN_DEAD = 50
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SNIPPET_CHARS = 80  # 摘要窗口长度（字符）
+
+# 连续的中日韩字符，或连续的字母数字
+_TOKEN_RUN_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[a-z0-9]+")
+
+
+def _runs(text: str) -> List[str]:
+    return _TOKEN_RUN_PATTERN.findall(text.lower())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    切分文本为检索词
+
+    - 中文连续片段切为相邻二元组，例如 "寒武纪" -> ["寒武", "武纪"]；单字片段保留单字
+    - 字母数字片段整体作为一个词（统一小写）
+    """
+    tokens = []
+    for run in _runs(text):
+        if run[0].isascii():
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class ReportSearchIndex:
+    """报告倒排索引
+
+    磁盘格式为追加写的 JSON Lines，每次写入是一个独立的 gzip 成员
+    （多个 gzip 成员首尾相接仍是合法的 gzip 文件）:
+        {"f": 文件名, "n": 词数, "t": {词: 词频}}   添加/替换报告
+        {"f": 文件名, "d": 1}                      删除报告
+
+    保存一篇报告只追加一条记录；读取方记录已读取的字节偏移，
+    其他进程追加记录后只解析新增部分。替换或删除的报告在内存中标记失效，
+    失效记录过多时由写入方重写整个文件。
+
+    追加与整体重写（compact / rebuild）都持有索引旁的锁文件（flock），
+    重写期间其他进程追加的记录不会丢失。
+
+    内存中的倒排表为 词 -> (文档号数组, 词频数组)，文档号单调递增。
+    """
+
+    def __init__(self, index_path, reports_dir=None):
+        """
+        初始化检索索引
+
+        Args:
+            index_path: 索引文件路径
+            reports_dir: 报告目录（生成摘要时读取原文），默认为索引文件所在目录
+        """
+        self.index_path = Path(index_path)
+        self.reports_dir = Path(reports_dir) if reports_dir else self.index_path.parent
+        self._lock = threading.RLock()
+        self._lock_path = self.index_path.with_name(f".{self.index_path.name}.lock")
+        # 当前线程持有文件锁的层数（compact 可能在 _append 持锁期间调用）
+        self._file_lock_depth = 0
+        # 索引在第一次查询或写入时才加载
+        self._reset()
+
+    def _reset(self):
+        self.postings: Dict[str, tuple] = {}
+        # 文档号 -> 文档信息，失效文档为 None
+        self.docs: List[Optional[dict]] = []
+        self._doc_ids: Dict[str, int] = {}
+        self._total_length = 0
+        # 已加载文件的 (st_dev, st_ino) 与已解析的字节偏移
+        self._file_id: Optional[tuple] = None
+        self._offset = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sync()
+            return len(self._doc_ids)
+
+    # ------------------------------------------------------------------
+    # 建立索引
+    # ------------------------------------------------------------------
+
+    def add_report(self, filename: str, content: str):
+        """
+        添加或替换一篇报告
+
+        Args:
+            filename: 报告文件名
+            content: 报告 Markdown 内容
+        """
+        self._append([self._make_record(filename, content)])
+
+    def add_report_file(self, filename: str) -> bool:
+        """从报告目录读取并索引一篇报告，文件不存在时返回 False"""
+        report_path = self.reports_dir / filename
+        if not report_path.is_file():
+            return False
+        self.add_report(filename, report_path.read_text(encoding="utf-8"))
+        return True
+
+    def remove_report(self, filename: str):
+        """从索引中删除一篇报告"""
+        with self._lock:
+            self._sync()
+            if filename in self._doc_ids:
+                self._append([{"f": filename, "d": 1}])
+
+    def rebuild(self, filenames) -> int:
+        """按给定报告文件名重建整个索引文件，返回成功索引的篇数"""
+        # 在锁内读取报告：重建期间其他进程追加的记录要么等待重建完成，要么已被读到
+        with self._lock, self._file_lock():
+            records = []
+            for filename in filenames:
+                report_path = self.reports_dir / filename
+                if report_path.is_file():
+                    records.append(self._make_record(filename, report_path.read_text(encoding="utf-8")))
+            self._rewrite(records)
+        return len(records)
+
+    def compact(self):
+        """丢弃失效记录，重写索引文件"""
+        with self._lock, self._file_lock():
+            self._sync()
+            term_freqs: Dict[int, dict] = {doc_id: {} for doc_id in self._doc_ids.values()}
+            for term, (doc_ids, freqs) in self.postings.items():
+                for doc_id, freq in zip(doc_ids, freqs):
+                    if doc_id in term_freqs:
+                        term_freqs[doc_id][term] = freq
+            records = [
+                {"f": self.docs[doc_id]["filename"], "n": self.docs[doc_id]["length"], "t": term_freqs[doc_id]}
+                for doc_id in sorted(term_freqs)
+            ]
+            self._rewrite(records)
+
+    @staticmethod
+    def _make_record(filename: str, content: str) -> dict:
+        tokens = tokenize(content)
+        term_freqs: Dict[str, int] = {}
+        for token in tokens:
+            term_freqs[token] = term_freqs.get(token, 0) + 1
+        return {"f": filename, "n": len(tokens), "t": term_freqs}
+
+    def _apply(self, record: dict):
+        """把一条日志记录应用到内存索引"""
+        filename = record["f"]
+        old_doc_id = self._doc_ids.pop(filename, None)
+        if old_doc_id is not None:
+            self._total_length -= self.docs[old_doc_id]["length"]
+            self.docs[old_doc_id] = None
+
+        if record.get("d"):
+            return
+
+        match = REPORT_FILENAME_PATTERN.match(filename)
+        if match:
+            stock_code, version, date_str = match.groups()
+            date = f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
+        else:
+            stock_code = version = date = None
+
+        doc_id = len(self.docs)
+        self.docs.append({
+            "filename": filename,
+            "length": record["n"],
+            "stock_code": stock_code,
+            "version": version,
+            "date": date,
+        })
+        self._doc_ids[filename] = doc_id
+        self._total_length += record["n"]
+
+        for term, freq in record["t"].items():
+            entry = self.postings.get(term)
+            if entry is None:
+                entry = self.postings[term] = (array("I"), array("I"))
+            entry[0].append(doc_id)
+            entry[1].append(freq)
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        stock_code: str = None,
+        version: str = None,
+        with_snippets: bool = True,
+    ) -> List[dict]:
+        """
+        检索报告
+
+        Args:
+            query: 查询文本
+            limit: 返回结果数
+            stock_code: 只检索指定股票
+            version: 只检索指定版本
+            with_snippets: 是否生成高亮摘要
+
+        Returns:
+            按相关度降序排列的结果列表
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            self._sync()
+            doc_count = len(self._doc_ids)
+            if doc_count == 0:
+                return []
+            avg_length = self._total_length / doc_count or 1
+            docs = self.docs
+
+            scores: Dict[int, float] = {}
+            for term in terms:
+                entry = self.postings.get(term)
+                if entry is None:
+                    continue
+                doc_ids, freqs = entry
+                idf = math.log(1 + (doc_count - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+                for doc_id, freq in zip(doc_ids, freqs):
+                    doc = docs[doc_id]
+                    if doc is None:
+                        continue
+                    if (stock_code and doc["stock_code"] != stock_code) or (version and doc["version"] != version):
+                        continue
+                    length_norm = 1 - BM25_B + BM25_B * doc["length"] / avg_length
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (BM25_K1 + 1) / (freq + BM25_K1 * length_norm)
+
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+            results = []
+            for doc_id, score in top:
+                doc = docs[doc_id]
+                results.append({
+                    "filename": doc["filename"],
+                    "stock_code": doc["stock_code"],
+                    "version": doc["version"],
+                    "date": doc["date"],
+                    "score": round(score, 4),
+                })
+
+        if with_snippets:
+            for result in results:
+                result["snippet"] = self._snippet(result["filename"], query)
+        return results
+
+    def _snippet(self, filename: str, query: str) -> str:
+        """截取报告中命中位置附近的一段文本，命中词用 <mark> 包裹（已做 HTML 转义）"""
+        try:
+            content = (self.reports_dir / filename).read_text(encoding="utf-8")
+        except OSError:
+            return ""
+        text = re.sub(r"\s+", " ", content)
+
+        pieces = sorted(set(_runs(query)), key=len, reverse=True)
+        # 中文查询片段较长时未必整体出现，退化为按二元组匹配
+        pieces += [t for t in tokenize(query) if t not in pieces]
+        if not pieces:
+            return html.escape(text[:SNIPPET_CHARS])
+        pattern = re.compile("|".join(re.escape(p) for p in pieces), re.IGNORECASE)
+
+        match = pattern.search(text)
+        start = max(0, match.start() - SNIPPET_CHARS // 3) if match else 0
+        window = text[start:start + SNIPPET_CHARS]
+
+        parts = []
+        last = 0
+        for hit in pattern.finditer(window):
+            parts.append(html.escape(window[last:hit.start()]))
+            parts.append(f"<mark>{html.escape(hit.group(0))}</mark>")
+            last = hit.end()
+        parts.append(html.escape(window[last:]))
+
+        prefix = "…" if start > 0 else ""
+        suffix = "…" if start + SNIPPET_CHARS < len(text) else ""
+        return prefix + "".join(parts) + suffix
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _encode(records: List[dict]) -> bytes:
+        lines = "".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in records)
+        return gzip.compress(lines.encode("utf-8"), compresslevel=6, mtime=0)
+
+    @contextmanager
+    def _file_lock(self):
+        """跨进程互斥锁（索引旁的锁文件），同一实例内可重入；调用方需持有 self._lock"""
+        if fcntl is None or self._file_lock_depth:
+            self._file_lock_depth += 1
+            try:
+                yield
+            finally:
+                self._file_lock_depth -= 1
+            return
+
+        self._lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._lock_path, "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            self._file_lock_depth += 1
+            try:
+                yield
+            finally:
+                self._file_lock_depth -= 1
+
+    def _append(self, records: List[dict]):
+        """追加记录（单次 write 写入一个完整的 gzip 成员），随后同步到内存，失效记录过多时压缩"""
+        data = self._encode(records)
+        with self._lock, self._file_lock():
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.index_path, "ab") as f:
+                f.write(data)
+            # 持锁同步：期间文件不会被其他进程替换，失效记录统计准确
+            self._sync()
+
+            dead = len(self.docs) - len(self._doc_ids)
+            if dead > COMPACT_MIN_DEAD and dead > len(self._doc_ids):
+                self.compact()
+
+    def _rewrite(self, records: List[dict]):
+        """用给定记录整体替换索引文件（临时文件 + 原子替换），调用方需持有文件锁"""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(f".{self.index_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(self._encode(records))
+        os.replace(tmp_path, self.index_path)
+        self._reset()
+        self._sync()
+
+    def _sync(self):
+        """解析索引文件中尚未读取的记录；文件被整体替换时重新加载"""
+        try:
+            stat = self.index_path.stat()
+        except FileNotFoundError:
+            return
+
+        file_id = (stat.st_dev, stat.st_ino)
+        if file_id != self._file_id or stat.st_size < self._offset:
+            self._reset()
+            self._file_id = file_id
+        if stat.st_size == self._offset:
+            return
+
+        try:
+            with open(self.index_path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except OSError as e:
+            print(f"⚠️  读取检索索引失败 {self.index_path}: {e}")
+            return
+
+        while data:
+            decompressor = zlib.decompressobj(wbits=31)
+            try:
+                payload = decompressor.decompress(data)
+            except zlib.error as e:
+                print(f"⚠️  检索索引已损坏，请使用 --rebuild 重建: {e}")
+                return
+            if not decompressor.eof:
+                # 其他进程正在写入的成员，下次再读
+                return
+            for line in payload.splitlines():
+                if line:
+                    self._apply(json.loads(line))
+            self._offset += len(data) - len(decompressor.unused_data)
+            data = decompressor.unused_data
+
+
+def main():
+    """命令行 - 重建索引或执行查询"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="报告全文检索")
+    parser.add_argument("--reports-dir", help="报告存储目录", default="./reports")
+    parser.add_argument("--rebuild", action="store_true", help="根据报告目录重建索引")
+    parser.add_argument("query", nargs="?", help="查询文本")
+    args = parser.parse_args()
+
+    reports_dir = Path(args.reports_dir)
+    index = ReportSearchIndex(reports_dir / INDEX_FILENAME, reports_dir)
+
+    if args.rebuild:
+        filenames = sorted(p.name for p in reports_dir.glob("*.md") if REPORT_FILENAME_PATTERN.match(p.name))
+        count = index.rebuild(filenames)
+        print(f"✅ 已索引 {count} 篇报告 -> {index.index_path}")
+
+    if args.query:
+        for result in index.search(args.query):
+            print(f"{result['score']:8.3f}  {result['filename']}")
+            print(f"          {result['snippet']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ from datetime import datetime
 from pathlib import Path
 
 from financial_reporter import FinancialReporter
+from report_events import TASK_FINISHED, TASK_STARTED
 
 
 class ReportScheduler:
@@ -67,6 +68,10 @@ class ReportScheduler:
         failed_count = 0
         start_time = datetime.now()
         
+        self.reporter.events.publish(
+            TASK_STARTED, total=total_count, stocks=[stock['code'] for stock in self.stocks]
+        )
+        
         # 串行处理每只股票
         for idx, stock in enumerate(self.stocks, 1):
             stock_code = stock['code']
@@ -114,6 +119,11 @@ class ReportScheduler:
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
         
+        self.reporter.events.publish(
+            TASK_FINISHED, total=total_count, success=success_count,
+            failed=failed_count, duration_seconds=round(duration, 1)
+        )
+        
         # 汇总统计
         print(f"\n{'='*60}")
         print(f"📊 报告生成完成")
@@ -1,10 +1,15 @@
 """Test cases for Bash Tool."""
 
 import asyncio
+import os
+import re
 
 import pytest
 
-from mini_agent.tools.bash_tool import BackgroundShellManager, BashKillTool, BashOutputTool, BashTool
+from mini_agent.tools.bash_tool import (
+    BackgroundShell, BackgroundShellManager, BashKillTool, BashOutputTool, BashSessionPool, BashTool, LineDecoder,
+    get_spill_dir,
+)
 
 
 @pytest.mark.asyncio
@@ -270,3 +275,209 @@ async def test_timeout_validation():
     result = await bash_tool.execute(command="echo 'test'", timeout=0)
     assert result.success
     print("Timeout < 1 handled correctly")
+
+
+def test_background_shell_ring_buffer(tmp_path, monkeypatch):
+    """Output is capped by bytes; unread evicted lines are counted and spilled to disk."""
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    shell = BackgroundShell(bash_id="ring", command="noop", process=None, start_time=0, max_buffer_bytes=100)
+
+    for i in range(5):
+        shell.add_output(f"line {i:02d}")  # 7 chars + newline = 8 bytes
+    assert shell.get_new_output() == [f"line {i:02d}" for i in range(5)]
+    assert shell.consume_dropped() == 0
+
+    for i in range(5, 40):
+        shell.add_output(f"line {i:02d}")
+    assert shell.buffered_bytes <= 100
+    assert shell.first_line_index == 28 and len(shell.output_lines) == 12
+
+    # Lines 5..27 were evicted unread; 0..4 had already been read
+    assert shell.get_new_output() == [f"line {i:02d}" for i in range(28, 40)]
+    assert shell.consume_dropped() == 23 and shell.dropped_lines == 23
+    assert shell.get_new_output() == []
+
+    shell.close_spill()
+    spilled = open(shell.spill_path, encoding="utf-8").read().splitlines()
+    assert spilled == [f"line {i:02d}" for i in range(28)]
+
+
+@pytest.mark.asyncio
+async def test_bash_output_reports_dropped_lines(monkeypatch):
+    """bash_output flags skipped output and the final result reports the drop count."""
+    monkeypatch.setattr("mini_agent.tools.bash_tool.MAX_BUFFERED_OUTPUT_BYTES", 1000)
+    result = await BashTool().execute(command="seq 1 2000; sleep 0.5", run_in_background=True)
+
+    shell = BackgroundShellManager.get(result.bash_id)
+    for _ in range(100):
+        if shell.status != "running":
+            break
+        await asyncio.sleep(0.05)
+    assert shell.total_lines == 2000
+
+    output = await BashOutputTool().execute(bash_id=result.bash_id)
+    lines = output.stdout.splitlines()
+    assert lines[0].startswith(f"[{shell.dropped_lines} earlier line(s) dropped")
+    assert shell.spill_path in lines[0]
+    assert lines[-1] == "2000"
+    assert output.dropped_lines == shell.dropped_lines > 1500
+    assert f"[dropped_lines]:\n{shell.dropped_lines}" in output.content
+
+    await BashKillTool().execute(bash_id=result.bash_id)
+
+
+@pytest.mark.asyncio
+async def test_spill_files_are_removed_on_kill_and_shutdown(monkeypatch):
+    """Spill files live in a per-process directory and are deleted when their shell goes away."""
+    monkeypatch.setattr("mini_agent.tools.bash_tool.MAX_BUFFERED_OUTPUT_BYTES", 1000)
+    shells = []
+    for _ in range(2):
+        result = await BashTool().execute(command="seq 1 2000; exec sleep 30", run_in_background=True)
+        shell = BackgroundShellManager.get(result.bash_id)
+        for _ in range(100):
+            if shell.total_lines == 2000:
+                break
+            await asyncio.sleep(0.05)
+        assert shell.spill_path and os.path.dirname(shell.spill_path) == get_spill_dir()
+        shells.append((shell, shell.spill_path))
+
+    (first, first_path), (second, second_path) = shells
+    output = await BashKillTool().execute(bash_id=first.bash_id)
+    assert output.success and output.stdout.startswith("[")
+    assert first_path not in output.stdout
+    assert not os.path.exists(first_path) and os.path.exists(second_path)
+
+    await BackgroundShellManager.terminate_all()
+    assert not os.path.exists(second_path)
+    assert BackgroundShellManager.get_available_ids() == []
+
+
+def test_line_decoder_handles_split_characters():
+    """Multi-byte characters and lines split across chunks are reassembled."""
+    decoder = LineDecoder()
+    data = "行情 1\n行情 2\n尾".encode("utf-8")
+
+    lines = []
+    for i in range(len(data)):
+        lines.extend(decoder.feed(data[i : i + 1]))
+    assert lines == ["行情 1", "行情 2"]
+    assert decoder.flush() == ["尾"]
+    assert decoder.feed(b"\xff\n") == ["�"]
+
+
+@pytest.mark.asyncio
+async def test_background_output_is_complete_and_prompt():
+    """Fast output is captured in full, and the shell finishes even if a child keeps the pipe open."""
+    result = await BashTool().execute(command="seq 1 20000; (sleep 30 &)", run_in_background=True)
+    shell = BackgroundShellManager.get(result.bash_id)
+
+    for _ in range(100):
+        if shell.status != "running":
+            break
+        await asyncio.sleep(0.05)
+    assert shell.status == "completed"
+    assert shell.total_lines == 20000 and shell.output_lines[-1] == "20000"
+
+    # A line written by a running shell shows up without polling delay
+    result = await BashTool().execute(command="sleep 0.2; echo ready; sleep 0.5", run_in_background=True)
+    shell = BackgroundShellManager.get(result.bash_id)
+    start = asyncio.get_running_loop().time()
+    while not shell.output_lines and asyncio.get_running_loop().time() - start < 2:
+        await asyncio.sleep(0.01)
+    assert shell.output_lines == ["ready"]
+    assert asyncio.get_running_loop().time() - start < 0.35
+
+    await BashKillTool().execute(bash_id=result.bash_id)
+
+
+@pytest.mark.asyncio
+async def test_foreground_output_is_capped_and_spilled():
+    """Large output keeps head and tail; the full output is saved to a file."""
+    bash_tool = BashTool(max_output_bytes=1000)
+    result = await bash_tool.execute(command="seq 1 100000")
+
+    assert result.success
+    assert result.stdout.startswith("1\n2\n3\n")
+    assert result.stdout.endswith("99999\n100000\n")
+    assert len(result.stdout) < 1200
+
+    match = re.search(r"full output \((\d+) bytes\) saved to (\S+) \.\.\.\]", result.stdout)
+    assert match is not None
+    assert os.path.dirname(match.group(2)) == get_spill_dir()  # removed at process exit
+    with open(match.group(2), encoding="utf-8") as f:
+        full = f.read()
+    assert int(match.group(1)) == len(full) and full.splitlines()[-1] == "100000"
+    os.remove(match.group(2))
+
+    # Small output is returned unchanged
+    result = await bash_tool.execute(command="printf 'a\\nb\\n'")
+    assert result.stdout == "a\nb\n"
+
+
+@pytest.mark.asyncio
+async def test_foreground_runaway_output_is_stopped():
+    """A command that keeps writing is killed once the total output limit is reached."""
+    bash_tool = BashTool(max_output_bytes=1000, max_total_output_bytes=200_000)
+    start = asyncio.get_running_loop().time()
+    result = await bash_tool.execute(command="yes | cat", timeout=30)
+
+    assert asyncio.get_running_loop().time() - start < 5
+    assert not result.success and result.exit_code == -1
+    assert "Command stopped after producing more than 200000 bytes" in result.error
+    assert result.stdout.startswith("y\ny\n")
+
+
+@pytest.mark.asyncio
+async def test_persistent_session_keeps_state_and_exit_codes(tmp_path):
+    """cd and exports persist; exit codes and stderr are framed per command."""
+    bash_tool = BashTool(persistent_session=True)
+    try:
+        await bash_tool.execute(command=f"cd {tmp_path} && export SESSION_VAR=kept")
+        result = await bash_tool.execute(command="pwd; echo $SESSION_VAR; printf 'no newline'")
+        assert result.stdout == f"{tmp_path}\nkept\nno newline"
+
+        result = await bash_tool.execute(command="echo oops >&2; (exit 7)")
+        assert not result.success and result.exit_code == 7 and result.stderr == "oops\n"
+
+        # A syntax error stays inside the command; `exit` ends the session, which is
+        # replaced in the same working directory
+        result = await bash_tool.execute(command="echo 'unclosed")
+        assert result.exit_code == 2
+        result = await bash_tool.execute(command="exit 3")
+        assert result.exit_code == 3
+        result = await bash_tool.execute(command="pwd; echo x$SESSION_VAR")
+        assert result.success
+        assert result.stdout.startswith("[shell session restarted")
+        assert result.stdout.endswith(f"{tmp_path}\nx\n")
+    finally:
+        await bash_tool.close_session()
+
+
+@pytest.mark.asyncio
+async def test_persistent_session_timeout_interrupts_only_the_command():
+    """A timed-out command is interrupted; the rest of it is skipped and the session survives."""
+    bash_tool = BashTool(persistent_session=True)
+    try:
+        shell_pid = (await bash_tool.execute(command="echo $$")).stdout
+        result = await bash_tool.execute(command="sleep 10; echo after", timeout=1)
+        assert not result.success and "timed out" in result.error
+        assert "after" not in result.stdout
+
+        result = await bash_tool.execute(command="echo $$")
+        assert result.success and result.stdout == shell_pid
+    finally:
+        await bash_tool.close_session()
+
+
+@pytest.mark.asyncio
+async def test_persistent_session_is_recycled(tmp_path):
+    """The session shell is replaced after max commands, keeping the working directory."""
+    bash_tool = BashTool(persistent_session=True, session_max_commands=2)
+    try:
+        first = (await bash_tool.execute(command=f"cd {tmp_path}; echo $$")).stdout
+        assert (await bash_tool.execute(command="echo $$")).stdout == first
+        result = await bash_tool.execute(command="echo $$; pwd")
+        assert first not in result.stdout and result.stdout.endswith(f"{tmp_path}\n")
+        assert BashSessionPool.get(bash_tool.session_key).restarts == 1
+    finally:
+        await bash_tool.close_session()
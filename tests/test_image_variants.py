@@ -0,0 +1,78 @@
+"""Test cases for responsive report image variants."""
+
+import pytest
+
+pytest.importorskip("PIL")
+from PIL import Image  # noqa: E402
+
+from image_variants import (  # noqa: E402
+    VARIANTS_DIRNAME, ImageVariantPipeline, load_report_manifest, responsive_images,
+)
+
+
+def _make_report(tmp_path):
+    images_dir = tmp_path / "images"
+    (images_dir / "688256").mkdir(parents=True)
+    Image.new("RGB", (1200, 600), (234, 88, 12)).save(images_dir / "688256" / "kline.png")
+    (tmp_path / "secret.png").write_bytes(b"not an image")
+
+    report_path = tmp_path / "688256_normal_20260120.md"
+    report_path.write_text(
+        "# 寒武纪\n\n![K线图](/images/688256/kline.png)\n\n"
+        "![缺失](/images/688256/missing.png) ![越界](/images/../secret.png)\n",
+        encoding="utf-8",
+    )
+    return images_dir, report_path
+
+
+def test_pipeline_builds_content_addressed_variants(tmp_path):
+    """Variants are generated once per image content and recorded in the report manifest."""
+    images_dir, report_path = _make_report(tmp_path)
+    pipeline = ImageVariantPipeline(images_dir, max_workers=1)
+    if not pipeline.enabled:
+        pytest.skip("Pillow built without WebP/AVIF support")
+
+    try:
+        manifest = pipeline.process_report(report_path)
+    finally:
+        pipeline.shutdown()
+
+    assert list(manifest) == ["/images/688256/kline.png"]
+    entry = manifest["/images/688256/kline.png"]
+    assert (entry["width"], entry["height"]) == (1200, 600)
+    # Never upscaled: 1800 is capped to the source width
+    assert sorted({v["width"] for v in entry["variants"]}) == [480, 960, 1200]
+    for variant in entry["variants"]:
+        assert (images_dir / VARIANTS_DIRNAME / entry["hash"] / variant["file"]).stat().st_size == variant["bytes"]
+    assert load_report_manifest(images_dir, report_path.name) == manifest
+
+    # Same content again: served from the content-addressed cache without starting the pool
+    second = ImageVariantPipeline(images_dir)
+    assert second.process_report(report_path) == manifest
+    assert second._executor is None
+
+
+def test_responsive_images_rewrites_img_tags():
+    """Images with variants become <picture> elements; others are left alone."""
+    manifest = {
+        "/images/688256/kline.png": {
+            "hash": "abc123",
+            "width": 1200,
+            "height": 600,
+            "variants": [
+                {"format": "webp", "width": 480, "file": "480w.webp", "bytes": 1},
+                {"format": "webp", "width": 1200, "file": "1200w.webp", "bytes": 1},
+            ],
+        }
+    }
+    html = '<p><img alt="K线图" src="/images/688256/kline.png" /> <img alt="x" src="/images/other.png" /></p>'
+
+    result = responsive_images(html, manifest)
+
+    assert result.startswith(
+        '<p><picture><source type="image/webp" '
+        'srcset="/images/_variants/abc123/480w.webp 480w, /images/_variants/abc123/1200w.webp 1200w"'
+    )
+    assert 'src="/images/688256/kline.png" loading="lazy" decoding="async" width="1200" height="600"></picture>' in result
+    assert '<img alt="x" src="/images/other.png" />' in result
+    assert "image/avif" not in result
@@ -1,7 +1,6 @@
 """Integration test cases - Full agent demos."""
 
 import asyncio
-import json
 import tempfile
 from pathlib import Path
 
@@ -12,7 +11,7 @@ from mini_agent.agent import Agent
 from mini_agent.config import Config
 from mini_agent.tools import BashTool, EditTool, ReadTool, WriteTool
 from mini_agent.tools.mcp_loader import load_mcp_tools_async
-from mini_agent.tools.note_tool import RecallNoteTool, SessionNoteTool
+from mini_agent.tools.note_tool import NoteStore, RecallNoteTool, SessionNoteTool
 
 
 @pytest.mark.asyncio
@@ -199,7 +198,7 @@ You have record_note and recall_notes tools:
 
         # Check if notes were recorded
         if memory_file.exists():
-            notes = json.loads(memory_file.read_text())
+            notes = NoteStore.for_file(memory_file).read()
             print(f"\n✅ Agent recorded {len(notes)} notes:")
             for note in notes:
                 print(f"  - [{note['category']}] {note['content']}")
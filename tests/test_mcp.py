@@ -2,11 +2,14 @@
 
 import asyncio
 import json
+import os
+import re
 import tempfile
 from pathlib import Path
 
 import pytest
 
+from mini_agent.tools import mcp_loader
 from mini_agent.tools.mcp_loader import (
     MCPServerConnection,
     MCPTimeoutConfig,
@@ -558,6 +561,241 @@ async def test_per_server_timeout_override_in_config():
             Path(f.name).unlink()
 
 
+
+# =============================================================================
+# Concurrent Connection Tests (local stdio server, no Node.js required)
+# =============================================================================
+
+LOCAL_SERVER_SCRIPT = """
+import os
+import sys
+import time
+
+from mcp.server.fastmcp import FastMCP
+
+if os.environ.get("SPAWN_LOG"):
+    with open(os.environ["SPAWN_LOG"], "a") as log:
+        log.write(os.environ["SERVER_NAME"] + "\\n")
+time.sleep(float(os.environ.get("STARTUP_DELAY", "0")))
+server = FastMCP(os.environ["SERVER_NAME"])
+
+
+@server.tool()
+def whoami() -> str:
+    \"\"\"Return the server name.\"\"\"
+    return os.environ["SERVER_NAME"]
+
+
+server.run()
+"""
+
+
+def _local_server_config(script: Path, name: str, delay: float, spawn_log: Path | None = None, **overrides) -> dict:
+    import sys
+
+    env = {"SERVER_NAME": name, "STARTUP_DELAY": str(delay), "PATH": os.environ.get("PATH", "")}
+    if spawn_log is not None:
+        env["SPAWN_LOG"] = str(spawn_log)
+    return {"command": sys.executable, "args": [str(script)], "env": env, **overrides}
+
+
+@pytest.fixture(autouse=True)
+def isolated_tool_cache(tmp_path, monkeypatch):
+    """Keep the MCP tool-list cache out of the user's home directory."""
+    cache_path = tmp_path / "mcp-tools.json"
+    monkeypatch.setattr(mcp_loader, "MCP_TOOL_CACHE_PATH", cache_path)
+    return cache_path
+
+
+@pytest.mark.asyncio
+async def test_servers_connect_concurrently_in_config_order(tmp_path, capsys):
+    """Slow servers connect in parallel and tools keep config order, not completion order."""
+    import time
+
+    script = tmp_path / "server.py"
+    script.write_text(LOCAL_SERVER_SCRIPT, encoding="utf-8")
+    delay = 2.0
+    config_file = tmp_path / "mcp.json"
+    config_file.write_text(
+        json.dumps(
+            {
+                "mcpServers": {
+                    "slow": _local_server_config(script, "slow", delay + 0.5),
+                    "medium": _local_server_config(script, "medium", delay),
+                    "fast": _local_server_config(script, "fast", 0),
+                }
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    try:
+        start = time.perf_counter()
+        tools = await load_mcp_tools_async(str(config_file))
+        elapsed = time.perf_counter() - start
+
+        assert len(tools) == 3
+        results = [await tool.execute() for tool in tools]
+        assert [result.content for result in results] == ["slow", "medium", "fast"]
+
+        output = capsys.readouterr().out
+        assert "from 3/3 servers" in output
+        latencies = [float(re.search(rf"✓ {name}: (\d+\.\d+)s", output).group(1)) for name in ("slow", "medium", "fast")]
+        # Sequential connects would take the sum of the per-server latencies
+        assert elapsed < sum(latencies) - delay, f"Servers were connected sequentially ({elapsed:.1f}s, {latencies})"
+    finally:
+        await cleanup_mcp_connections()
+
+
+@pytest.mark.asyncio
+async def test_slow_server_timeout_does_not_block_others(tmp_path, capsys):
+    """A server exceeding its own connect_timeout is dropped without delaying the rest."""
+    import time
+
+    script = tmp_path / "server.py"
+    script.write_text(LOCAL_SERVER_SCRIPT, encoding="utf-8")
+    config_file = tmp_path / "mcp.json"
+    config_file.write_text(
+        json.dumps(
+            {
+                "mcpServers": {
+                    "hanging": _local_server_config(script, "hanging", 30, connect_timeout=1.0),
+                    "broken": {"command": str(tmp_path / "missing-binary")},
+                    "ok": _local_server_config(script, "ok", 0),
+                }
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    try:
+        start = time.perf_counter()
+        tools = await load_mcp_tools_async(str(config_file))
+        elapsed = time.perf_counter() - start
+
+        assert [tool.name for tool in tools] == ["whoami"]
+        assert (await tools[0].execute()).content == "ok"
+        assert elapsed < 5.0, f"Hanging server delayed startup ({elapsed:.1f}s)"
+
+        output = capsys.readouterr().out
+        assert "timed out after 1.0s" in output
+        assert "from 1/3 servers" in output
+    finally:
+        await cleanup_mcp_connections()
+
+
+@pytest.mark.asyncio
+async def test_disconnect_from_another_task(tmp_path):
+    """A connection opened in one task can be closed from another."""
+    script = tmp_path / "server.py"
+    script.write_text(LOCAL_SERVER_SCRIPT, encoding="utf-8")
+    config = _local_server_config(script, "solo", 0)
+    conn = MCPServerConnection(name="solo", command=config["command"], args=config["args"], env=config["env"])
+
+    assert await asyncio.create_task(conn.connect())
+    assert conn.session is not None
+    assert conn.connect_latency is not None
+
+    await asyncio.create_task(conn.disconnect())
+    assert conn.session is None
+    assert conn.exit_stack is None
+
+
+
+@pytest.mark.asyncio
+async def test_cached_tools_connect_lazily(tmp_path, isolated_tool_cache):
+    """Second startup builds tools from the cache; only servers actually used get spawned."""
+    script = tmp_path / "server.py"
+    script.write_text(LOCAL_SERVER_SCRIPT, encoding="utf-8")
+    spawn_log = tmp_path / "spawns.log"
+    config_file = tmp_path / "mcp.json"
+    config_file.write_text(
+        json.dumps(
+            {
+                "mcpServers": {
+                    "alpha": _local_server_config(script, "alpha", 0, spawn_log),
+                    "beta": _local_server_config(script, "beta", 0, spawn_log),
+                }
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    try:
+        first = await load_mcp_tools_async(str(config_file))
+    finally:
+        await cleanup_mcp_connections()
+    assert sorted(spawn_log.read_text().split()) == ["alpha", "beta"]
+    assert isolated_tool_cache.exists()
+    spawn_log.unlink()
+
+    try:
+        second = await load_mcp_tools_async(str(config_file))
+        assert not spawn_log.exists(), "Cached servers must not be spawned at startup"
+        assert [tool.to_schema() for tool in second] == [tool.to_schema() for tool in first]
+
+        result = await second[1].execute()
+        assert result.success and result.content == "beta"
+        # Concurrent first calls share one session
+        results = await asyncio.gather(*(second[1].execute() for _ in range(3)))
+        assert [r.content for r in results] == ["beta"] * 3
+        assert spawn_log.read_text().split() == ["beta"]
+    finally:
+        await cleanup_mcp_connections()
+
+
+@pytest.mark.asyncio
+async def test_tool_cache_keyed_by_server_config(tmp_path, isolated_tool_cache):
+    """Changing a server's config misses the cache; disabling the cache always connects."""
+    script = tmp_path / "server.py"
+    script.write_text(LOCAL_SERVER_SCRIPT, encoding="utf-8")
+    spawn_log = tmp_path / "spawns.log"
+    config_file = tmp_path / "mcp.json"
+
+    async def load(name: str, use_cache: bool = True):
+        config = {"mcpServers": {"srv": _local_server_config(script, name, 0, spawn_log)}}
+        config_file.write_text(json.dumps(config), encoding="utf-8")
+        try:
+            tools = await load_mcp_tools_async(str(config_file), use_cache=use_cache)
+            return (await tools[0].execute()).content
+        finally:
+            await cleanup_mcp_connections()
+
+    assert await load("one") == "one"
+    assert await load("two") == "two"  # env changed -> new cache key, fresh tool list
+    assert await load("one") == "one"  # cached, connected lazily on execute
+    assert await load("one", use_cache=False) == "one"
+    assert spawn_log.read_text().split() == ["one", "two", "one", "one"]
+
+    saved = json.loads(isolated_tool_cache.read_text(encoding="utf-8"))
+    assert len(saved["servers"]) == 2
+    assert all(entry["tools"][0]["name"] == "whoami" for entry in saved["servers"].values())
+
+
+@pytest.mark.asyncio
+async def test_lazy_connect_failure_returns_tool_error(tmp_path, isolated_tool_cache):
+    """A cached server that can no longer start fails the tool call, not startup."""
+    server_config = {"command": str(tmp_path / "missing-binary")}
+    cache = mcp_loader.MCPToolCache(isolated_tool_cache)
+    cache.put(
+        mcp_loader.MCPToolCache.config_key(server_config),
+        "gone",
+        [{"name": "lookup", "description": "Look something up", "parameters": {"type": "object", "properties": {}}}],
+    )
+    config_file = tmp_path / "mcp.json"
+    config_file.write_text(json.dumps({"mcpServers": {"gone": server_config}}), encoding="utf-8")
+
+    try:
+        tools = await load_mcp_tools_async(str(config_file))
+        assert [tool.name for tool in tools] == ["lookup"]
+
+        result = await tools[0].execute()
+        assert result.success is False
+        assert "could not connect to MCP server 'gone'" in result.error
+    finally:
+        await cleanup_mcp_connections()
+
+
 async def main():
     """Run all MCP tests."""
     print("=" * 80)
@@ -0,0 +1,49 @@
+"""Test cases for the benchmark mock LLM server."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from mock_llm_server import MockLLMServer, MockReply, has_tools  # noqa: E402
+
+from mini_agent.llm import LLMClient  # noqa: E402
+from mini_agent.retry import RetryConfig  # noqa: E402
+from mini_agent.schema import LLMProvider, Message  # noqa: E402
+from mini_agent.tools.base import Tool  # noqa: E402
+
+
+class LookupTool(Tool):
+    name = "lookup"
+    description = "Look up a stock quote."
+    parameters = {"type": "object", "properties": {"code": {"type": "string"}}, "required": ["code"]}
+
+
+def _script(request, protocol):
+    if has_tools(request):
+        return MockReply(text=f"via {protocol}", tool_calls=[("lookup", {"code": "688256"})])
+    return MockReply(text="summary")
+
+
+@pytest.mark.parametrize("provider", [LLMProvider.ANTHROPIC, LLMProvider.OPENAI])
+async def test_real_clients_round_trip(provider):
+    """Both SDK clients parse the mock's tool-call and plain-text replies."""
+    with MockLLMServer(_script, latency=0.01) as server:
+        client = LLMClient(
+            api_key="test",
+            provider=provider,
+            api_base=server.api_base(provider.value),
+            model="mock-model",
+            retry_config=RetryConfig(enabled=False),
+        )
+        messages = [Message(role="system", content="sys"), Message(role="user", content="hi")]
+
+        response = await client.generate(messages=messages, tools=[LookupTool()])
+        assert response.content == f"via {provider.value}"
+        assert [(c.function.name, c.function.arguments) for c in response.tool_calls] == [("lookup", {"code": "688256"})]
+
+        response = await client.generate(messages=messages)
+        assert response.content == "summary" and not response.tool_calls
+        assert server.requests == 2
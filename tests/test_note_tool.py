@@ -1,11 +1,20 @@
 """Test cases for Session Note Tool."""
 
+import json
 import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
-from mini_agent.tools.note_tool import RecallNoteTool, SessionNoteTool
+from mini_agent.tools.note_tool import (
+    COMPACT_MIN_GARBAGE,
+    NoteSearchIndex,
+    NoteStore,
+    RecallNoteTool,
+    SessionNoteTool,
+)
 
 
 @pytest.mark.asyncio
@@ -113,6 +122,190 @@ async def test_note_persistence():
         Path(note_file).unlink(missing_ok=True)
 
 
+@pytest.mark.asyncio
+async def test_notes_are_appended_as_json_lines(tmp_path):
+    """Test that each note is one appended line and category recall reads only its records."""
+    note_file = tmp_path / ".agent_memory.json"
+    record_tool = SessionNoteTool(memory_file=str(note_file))
+    recall_tool = RecallNoteTool(memory_file=str(note_file))
+
+    for i in range(50):
+        await record_tool.execute(content=f"price note {i}", category="price")
+    await record_tool.execute(content="User prefers tables", category="user_preference")
+
+    lines = note_file.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 51
+    assert json.loads(lines[-1])["content"] == "User prefers tables"
+
+    loads = []
+    original_loads = json.loads
+
+    def counting_loads(data, *args, **kwargs):
+        loads.append(data)
+        return original_loads(data, *args, **kwargs)
+
+    with patch("mini_agent.tools.note_tool.json.loads", counting_loads):
+        result = await recall_tool.execute(category="user_preference")
+    assert "User prefers tables" in result.content
+    assert "price note" not in result.content
+    assert len(loads) == 1
+
+    # A note appended by another process is picked up incrementally
+    with open(note_file, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"category": "price", "content": "external", "timestamp": None}) + "\n")
+    result = await recall_tool.execute(category="price")
+    assert "51. [price] external" in result.content
+
+
+@pytest.mark.asyncio
+async def test_legacy_memory_file_is_migrated(tmp_path):
+    """Test that a JSON-array memory file from older versions is converted on first use."""
+    note_file = tmp_path / ".agent_memory.json"
+    legacy = [
+        {"timestamp": "2024-06-28T09:00:00", "category": "project_info", "content": "Uses Python 3.12"},
+        {"timestamp": "2024-06-28T09:01:00", "category": "general", "content": "多行\n中文笔记"},
+    ]
+    note_file.write_text(json.dumps(legacy, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    record_tool = SessionNoteTool(memory_file=str(note_file))
+    await record_tool.execute(content="New note", category="general")
+
+    notes = NoteStore.for_file(note_file).read()
+    assert [note["content"] for note in notes] == ["Uses Python 3.12", "多行\n中文笔记", "New note"]
+    assert len(note_file.read_text(encoding="utf-8").splitlines()) == 3
+
+
+@pytest.mark.asyncio
+async def test_truncated_legacy_memory_file_is_moved_aside(tmp_path):
+    """Test that an unreadable JSON-array memory file is kept aside instead of breaking every call."""
+    note_file = tmp_path / ".agent_memory.json"
+    truncated = '[{"timestamp": "2024-06-28T09:00:00", "category": "general", "content": "Uses Pyth'
+    note_file.write_text(truncated, encoding="utf-8")
+
+    record_tool = SessionNoteTool(memory_file=str(note_file))
+    recall_tool = RecallNoteTool(memory_file=str(note_file))
+
+    result = await record_tool.execute(content="Fresh note", category="general")
+    assert result.success
+    result = await recall_tool.execute()
+    assert result.success
+    assert "Fresh note" in result.content
+
+    corrupt_files = list(tmp_path.glob(".agent_memory.json.corrupt-*"))
+    assert len(corrupt_files) == 1
+    assert corrupt_files[0].read_text(encoding="utf-8") == truncated
+
+
+def test_rerecorded_note_replaces_old_line(tmp_path):
+    """Test that recording an identical note again supersedes the old line and moves it last."""
+    note_file = tmp_path / ".agent_memory.json"
+    store = NoteStore(note_file)
+    store.append({"category": "general", "content": "first", "timestamp": "2024-06-28T09:00:00"})
+    store.append({"category": "general", "content": "second", "timestamp": "2024-06-28T09:01:00"})
+    store.append({"category": "general", "content": "first", "timestamp": "2024-06-28T09:02:00"})
+
+    notes = store.read()
+    assert [note["content"] for note in notes] == ["second", "first"]
+    assert notes[-1]["timestamp"] == "2024-06-28T09:02:00"
+    assert store.count() == 2
+
+    store.compact()
+    lines = note_file.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["content"] for line in lines] == ["second", "first"]
+
+
+def _append_notes(note_file: str, worker: int, count: int):
+    store = NoteStore(Path(note_file))
+    for i in range(count):
+        store.append({"category": f"worker{worker}", "content": f"note {i}", "timestamp": None})
+
+
+def test_concurrent_appends_and_compaction(tmp_path):
+    """Test that concurrent processes never lose notes and duplicates are compacted away."""
+    note_file = tmp_path / ".agent_memory.json"
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(_append_notes, [str(note_file)] * 4, range(4), [100] * 4))
+
+    store = NoteStore(note_file)
+    assert store.count() == 400
+    for worker in range(4):
+        assert len(store.read(f"worker{worker}")) == 100
+
+    # Re-recording identical notes supersedes the old lines until compaction rewrites the log
+    rounds = max(COMPACT_MIN_GARBAGE, 400) // 100 + 1
+    for _ in range(rounds):
+        _append_notes(str(note_file), 0, 100)
+    assert store.count() == 400
+    assert len(note_file.read_text(encoding="utf-8").splitlines()) < 400 + rounds * 100
+    assert [note["content"] for note in store.read("worker0")] == [f"note {i}" for i in range(100)]
+
+
+@pytest.mark.asyncio
+async def test_ranked_recall_with_budget(tmp_path):
+    """Test that a query returns the most relevant notes within top_k and the token budget."""
+    note_file = tmp_path / ".agent_memory.json"
+    record_tool = SessionNoteTool(memory_file=str(note_file))
+    recall_tool = RecallNoteTool(memory_file=str(note_file))
+
+    for day in range(200):
+        await record_tool.execute(content=f"贵州茅台 第{day}天 收盘价 {1500 + day} 元", category="price")
+    await record_tool.execute(content="用户偏好：估值数据用表格展示", category="user_preference")
+    await record_tool.execute(content="Report must cite the data source for every valuation", category="user_preference")
+
+    result = await recall_tool.execute(query="估值 表格")
+    assert result.success
+    assert result.content.splitlines()[1] == "1. [user_preference] 用户偏好：估值数据用表格展示"
+    assert "贵州茅台" not in result.content
+
+    result = await recall_tool.execute(query="valuation source", category="price")
+    assert "No notes matching query" in result.content
+
+    result = await recall_tool.execute(query="贵州茅台 收盘价", top_k=50, max_tokens=200)
+    assert "more matching notes omitted to stay within 200 tokens" in result.content
+    assert result.content.count("[price]") < 50
+
+
+@pytest.mark.asyncio
+async def test_ranked_recall_with_tiny_budget(tmp_path):
+    """Test that a budget too small for any note text says so instead of returning only a marker."""
+    note_file = tmp_path / ".agent_memory.json"
+    record_tool = SessionNoteTool(memory_file=str(note_file))
+    recall_tool = RecallNoteTool(memory_file=str(note_file))
+    long_note = "贵州茅台 估值分析 " + "市盈率与历史分位对比，" * 100
+    await record_tool.execute(content=long_note, category="analysis")
+
+    result = await recall_tool.execute(query="估值", max_tokens=10)
+    assert result.success
+    assert "too small to show one" in result.content
+    assert "Content truncated" not in result.content
+
+    result = await recall_tool.execute(query="估值", max_tokens=120)
+    assert "Content truncated" in result.content
+    assert "1. [analysis] 贵州茅台 估值分析" in result.content
+
+
+@pytest.mark.asyncio
+async def test_search_index_is_persisted_and_extended(tmp_path):
+    """Test that the on-disk BM25 index is reused by new instances and only indexes new notes."""
+    note_file = tmp_path / ".agent_memory.json"
+    store = NoteStore(note_file)
+    for i in range(20):
+        store.append({"category": "general", "content": f"note {i} about margin", "timestamp": None})
+    assert len(store.search("margin", top_k=100)) == 20
+    assert note_file.with_name(note_file.name + ".bm25.json").exists()
+
+    fresh = NoteStore(note_file)
+    fresh.append({"category": "general", "content": "宁德时代 毛利率 提升", "timestamp": None})
+    with patch.object(NoteSearchIndex, "_add", autospec=True, side_effect=NoteSearchIndex._add) as add:
+        hits = fresh.search("毛利率")
+    assert add.call_count == 1
+    assert [note["content"] for _, note in hits] == ["宁德时代 毛利率 提升"]
+
+    # Compaction replaces the log, so the index is rebuilt against the new file
+    fresh.compact()
+    assert len(fresh.search("margin", top_k=100)) == 20
+
+
 async def main():
     """Run all session note tool tests."""
     print("=" * 80)
@@ -0,0 +1,128 @@
+"""Test cases for PromptBuilder and its template registry."""
+
+import os
+
+import prompt_builder
+from prompt_builder import PromptBuilder
+
+CONFIG = """
+report_types:
+  stock_report: {}
+dimensions:
+  analysis_perspectives:
+    professional: {}
+    normal: {}
+  writing_formats:
+    first: {}
+    incremental: {}
+"""
+
+
+def _write(prompts_dir, relative_path, content):
+    path = prompts_dir / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+    return path
+
+
+def _make_prompts(tmp_path):
+    _write(tmp_path, "configs/report_configs.yaml", CONFIG)
+    _write(tmp_path, "base/system_prompt.md", "你是金融分析师。\n")
+    _write(tmp_path, "analysis_perspectives/professional.md", "专业视角")
+    _write(tmp_path, "writing_formats/first.md", "首次报告")
+    _write(tmp_path, "report_structures/professional_first.md", "# {{ stock_code }} 报告（{{ date }}）")
+    return tmp_path
+
+
+def test_system_prompts_are_precomposed_and_reloaded(tmp_path, monkeypatch):
+    """System prompts are composed once and rebuilt only when a component file changes."""
+    prompts_dir = _make_prompts(tmp_path)
+    builder = PromptBuilder(str(prompts_dir))
+
+    # 2 perspectives x (no format + 2 formats)
+    assert len(builder._system_prompts) == 6
+
+    opened = []
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda *a, **kw: opened.append(a[0]) or real_open(*a, **kw))
+
+    prompt = builder.build_system_prompt("professional", "first")
+    assert prompt.split("\n\n---\n\n")[:3] == ["你是金融分析师。", "专业视角", "首次报告"]
+    assert "<!-- TODO: Create components/compliance_rules.md -->" in prompt
+    assert builder.build_system_prompt("professional", "first") is prompt
+    assert opened == []
+
+    path = _write(prompts_dir, "analysis_perspectives/professional.md", "专业视角（修订）")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert "专业视角（修订）" in builder.build_system_prompt("professional", "first")
+    assert opened == [prompts_dir / "analysis_perspectives/professional.md"]
+
+
+def test_build_task_and_token_counts(tmp_path, monkeypatch):
+    """Tasks render the compiled structure template; token counts are reported per component."""
+    monkeypatch.setattr(prompt_builder, "_get_encoding", lambda: None)
+    builder = PromptBuilder(str(_make_prompts(tmp_path)))
+
+    task = builder.build_task("professional", "first", {
+        "stock_code": "688388",
+        "date": "2026-01-27",
+        "report_filename": "688388_professional_20260127.md",
+    })
+    assert task.startswith("# 任务：生成股票分析报告（专业版 - 首次完整报告）")
+    assert task.endswith("# 688388 报告（2026-01-27）")
+
+    counts = builder.component_token_counts("professional", "first")
+    assert list(counts)[:3] == ["base/system_prompt.md", "analysis_perspectives/professional.md",
+                                "writing_formats/first.md"]
+    assert counts["analysis_perspectives/professional.md"] == int(len("专业视角") / 2.5)
+    assert all(count > 0 for count in counts.values())
+
+
+def test_budget_compresses_then_drops_low_priority_components(tmp_path, monkeypatch):
+    """Over budget, optional components are compressed, then truncated or dropped by priority."""
+    monkeypatch.setattr(prompt_builder, "_get_encoding", lambda: None)
+    prompts_dir = _make_prompts(tmp_path)
+    _write(prompts_dir, "configs/report_configs.yaml", CONFIG + """
+prompt_budget:
+  max_tokens: 100
+  components:
+    base/system_prompt.md: {priority: 0, required: true}
+    analysis_perspectives: {priority: 1, required: true}
+    components/compliance_rules.md: {priority: 1, required: true}
+    components/data_requirements.md: {priority: 3}
+    components/chart_specifications.md: {priority: 4}
+""")
+    _write(prompts_dir, "components/compliance_rules.md", "不构成投资建议。")
+    _write(prompts_dir, "components/data_requirements.md",
+           "## 数据要求\n\n<!-- 内部备注 -->\n\n**必须**引用数据来源。\n\n\n\n---\n\n" + "补充说明。" * 20)
+    _write(prompts_dir, "components/chart_specifications.md", "## 图表规格\n\n" + "```python\nplt.plot(**kw)\n```\n" * 10)
+
+    unlimited = PromptBuilder(str(prompts_dir), max_tokens=10_000).assemble_system_prompt("professional")
+    assert {c["action"] for c in unlimited.components} == {"full"}
+
+    assembly = PromptBuilder(str(prompts_dir)).assemble_system_prompt("professional")
+    actions = {c["path"]: c["action"] for c in assembly.components}
+
+    assert assembly.budget == 100 and assembly.tokens <= 100
+    assert actions["components/chart_specifications.md"] == "dropped"
+    assert actions["components/data_requirements.md"] == "compressed"
+    assert actions["components/compliance_rules.md"] == "full"
+    assert assembly.dropped == ["components/chart_specifications.md"]
+    assert "不构成投资建议。" in assembly.prompt
+    assert "<!-- 内部备注 -->" not in assembly.prompt and "**必须**" not in assembly.prompt
+
+    # With room for a partial component, it is cut at a paragraph boundary instead of dropped
+    monkeypatch.setattr(prompt_builder, "MIN_TRUNCATED_TOKENS", 5)
+    assembly = PromptBuilder(str(prompts_dir)).assemble_system_prompt("professional")
+    assert assembly.components[-2]["action"] == "truncated"
+    assert assembly.tokens <= 100
+    assert prompt_builder.TRUNCATION_NOTE in assembly.prompt
+    assert assembly.prompt.count("```") % 2 == 0
+
+
+def test_compact_markdown_keeps_code_blocks():
+    """Compression strips decoration outside fenced code only."""
+    text = "**标题**\n\n\n\n---\n<!-- x -->\n```python\nf(**kw)\n\n\n```\n"
+    assert prompt_builder.compact_markdown(text) == "标题\n\n```python\nf(**kw)\n\n\n```"
@@ -0,0 +1,88 @@
+"""Test cases for ReportCatalog."""
+
+import json
+import os
+import time
+
+from report_catalog import ReportCatalog
+
+
+def _write_metadata(metadata_dir, name, stock_code, version, date_str, status="success"):
+    metadata = {
+        "date": f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}",
+        "timestamp": f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}T09:00:00",
+        "stock_code": stock_code,
+        "version": version,
+        "status": status,
+    }
+    if status == "success":
+        metadata["filename"] = f"{stock_code}_{version}_{date_str}.md"
+    (metadata_dir / name).write_text(json.dumps(metadata), encoding="utf-8")
+
+
+def test_catalog_groups_and_sorts(tmp_path):
+    """Successful reports are grouped by stock and version, newest first."""
+    _write_metadata(tmp_path, "report_a.json", "688388", "normal", "20260120")
+    _write_metadata(tmp_path, "report_b.json", "688388", "normal", "20260122")
+    _write_metadata(tmp_path, "report_c.json", "688388", "professional", "20260121")
+    _write_metadata(tmp_path, "report_d.json", "688256", "normal", "20260121", status="failed")
+
+    catalog = ReportCatalog(tmp_path)
+
+    grouped = catalog.reports_by_stock()
+    assert list(grouped) == ["688388"]
+    assert [r["date"] for r in grouped["688388"]["normal"]] == ["2026-01-22", "2026-01-20"]
+    assert [r["filename"] for r in grouped["688388"]["professional"]] == ["688388_professional_20260121.md"]
+
+    all_reports = catalog.all_reports()
+    assert len(all_reports) == 4
+    assert all_reports[0]["timestamp"] >= all_reports[-1]["timestamp"]
+    assert catalog.stock_versions("000000") is None
+
+
+def test_catalog_incremental_refresh(tmp_path):
+    """refresh() picks up added and removed metadata files."""
+    _write_metadata(tmp_path, "report_a.json", "688388", "normal", "20260120")
+    catalog = ReportCatalog(tmp_path)
+    version = catalog.version
+
+    assert catalog.refresh() is False
+
+    _write_metadata(tmp_path, "report_b.json", "688256", "professional", "20260122")
+    os.remove(tmp_path / "report_a.json")
+    # Make sure the directory mtime moves even on coarse-grained filesystems
+    future = time.time() + 5
+    os.utime(tmp_path, (future, future))
+
+    assert catalog.refresh() is True
+    assert catalog.version > version
+    assert catalog.stock_versions("688388") is None
+    assert catalog.stock_versions("688256")["professional"][0]["date_str"] == "20260122"
+    assert len(catalog.all_reports()) == 1
+
+
+def test_catalog_query_pages_with_keyset_cursor(tmp_path):
+    """query() filters records and pages through them without gaps or repeats."""
+    for day in range(10, 30):
+        _write_metadata(tmp_path, f"report_n_{day}.json", "688388", "normal", f"202601{day}")
+        _write_metadata(tmp_path, f"report_p_{day}.json", "688388", "professional", f"202601{day}")
+        _write_metadata(tmp_path, f"report_f_{day}.json", "688256", "normal", f"202601{day}", status="failed")
+
+    catalog = ReportCatalog(tmp_path)
+
+    pages = []
+    after = None
+    while True:
+        page, after = catalog.query(stock_code="688388", version="normal", date_from="2026-01-12",
+                                    date_to="2026-01-25", after=after, limit=4)
+        pages.append(page)
+        if after is None:
+            break
+
+    dates = [r["date"] for page in pages for r in page]
+    assert dates == [f"2026-01-{day}" for day in range(25, 11, -1)]
+    assert all(len(page) == 4 for page in pages[:-1])
+
+    failed, _ = catalog.query(status="failed", limit=100)
+    assert len(failed) == 20
+    assert {r["stock_code"] for r in failed} == {"688256"}
@@ -0,0 +1,115 @@
+"""Test cases for the report progress event log."""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import report_events
+from report_events import EventFeed, ReportEventLog, format_sse
+
+
+def test_feed_delivers_new_events_and_resumes(tmp_path):
+    """Events published after the feed starts are delivered in order and can be resumed by id."""
+    path = tmp_path / "events.jsonl"
+    log = ReportEventLog(path)
+    log.publish("task_started", total=2)
+
+    feed = EventFeed(path)
+    position = feed.resume_from(None)
+
+    # Nothing new yet
+    events, same_position = feed.wait_for_events(position, timeout=0.01)
+    assert events == [] and same_position == position
+
+    log.publish("report_started", stock_code="688256", version="normal")
+    log.publish("step_progress", stock_code="688256", version="normal", step=1, max_steps=50)
+    assert feed.poll() == 2
+
+    events, position = feed.wait_for_events(position, timeout=0.01)
+    assert [event["type"] for _, event in events] == ["report_started", "step_progress"]
+    first_id = events[0][0]
+
+    # A client reconnecting with the first id only gets what came after it
+    replay, _ = feed.wait_for_events(feed.resume_from(first_id), timeout=0.01)
+    assert [event["type"] for _, event in replay] == ["step_progress"]
+
+    # A second reader of the same file assigns the same ids
+    other_events, _ = EventFeed(path).wait_for_events((None, 0), timeout=0.01)
+    assert [event_id for event_id, _ in other_events[1:]] == [event_id for event_id, _ in events]
+
+    message = format_sse(*events[1])
+    assert message.startswith(f"id: {events[1][0]}\nevent: step_progress\ndata: ")
+    assert message.endswith("\n\n")
+
+
+def test_feed_handles_partial_lines_and_rotation(tmp_path, monkeypatch):
+    """Half-written lines wait for their newline; a rotated log is read from the start."""
+    path = tmp_path / "events.jsonl"
+    feed = EventFeed(path)
+    position = feed.resume_from(None)
+
+    with open(path, "ab") as f:
+        f.write(b'{"type": "report_completed", "filename": "688388_nor')
+    assert feed.poll() == 0
+    with open(path, "ab") as f:
+        f.write(b'mal_20260120.md"}\n')
+    assert feed.poll() == 1
+
+    events, position = feed.wait_for_events(position, timeout=0.01)
+    assert events[0][1]["filename"] == "688388_normal_20260120.md"
+
+    monkeypatch.setattr(report_events, "MAX_LOG_BYTES", 1)
+    ReportEventLog(path).publish("task_finished", success=1, failed=0)
+    assert (tmp_path / "events.jsonl.1").exists()
+    assert feed.poll() == 1
+
+    events, _ = feed.wait_for_events(position, timeout=0.01)
+    assert [event["type"] for _, event in events] == ["task_finished"]
+
+
+def test_feed_drains_rotated_log_before_switching(tmp_path, monkeypatch):
+    """Events appended to the old log after the last poll are delivered before the new log's."""
+    path = tmp_path / "events.jsonl"
+    log = ReportEventLog(path)
+    log.publish("task_started", total=2)
+    feed = EventFeed(path)
+    position = feed.resume_from(None)
+
+    log.publish("report_started", filename="688388_normal_20260120.md")
+    monkeypatch.setattr(report_events, "MAX_LOG_BYTES", 1)
+    log.publish("task_finished", success=1, failed=0)
+    assert (tmp_path / "events.jsonl.1").exists()
+
+    assert feed.poll() == 2
+    events, _ = feed.wait_for_events(position, timeout=0.01)
+    assert [event["type"] for _, event in events] == ["report_started", "task_finished"]
+
+
+@pytest.mark.skipif(report_events.fcntl is None, reason="flock is not available")
+def test_concurrent_rotation_keeps_previous_generation(tmp_path, monkeypatch):
+    """Two publishers that both see an oversized log rotate it only once."""
+    path = tmp_path / "events.jsonl"
+    old_generation = b"".join(b'{"type": "step_progress", "step": %d}\n' % i for i in range(20))
+    path.write_bytes(old_generation)
+    monkeypatch.setattr(report_events, "MAX_LOG_BYTES", 200)
+
+    # Hold the rotation lock so both publishers pass the size check and wait for it
+    fd = os.open(path, os.O_RDONLY)
+    report_events.fcntl.flock(fd, report_events.fcntl.LOCK_EX)
+    threads = [
+        threading.Thread(target=ReportEventLog(path).publish, args=("report_completed",), kwargs={"n": n})
+        for n in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.3)
+    os.close(fd)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert (tmp_path / "events.jsonl.1").read_bytes() == old_generation
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert sorted(event["n"] for event in lines) == [0, 1]
@@ -0,0 +1,92 @@
+"""Test cases for report full-text search."""
+
+import gzip
+from concurrent.futures import ProcessPoolExecutor
+
+from report_search import COMPACT_MIN_DEAD, ReportSearchIndex, tokenize
+
+
+def test_tokenize_cjk_bigrams():
+    """Chinese runs become overlapping bigrams, ASCII runs stay whole words."""
+    assert tokenize("寒武纪 AI芯片 营收") == ["寒武", "武纪", "ai", "芯片", "营收"]
+    assert tokenize("涨") == ["涨"]
+
+
+def test_search_ranks_and_highlights(tmp_path):
+    """Reports are ranked by relevance and snippets mark the matched text."""
+    (tmp_path / "688256_normal_20260120.md").write_text("寒武纪发布新一代AI芯片，芯片出货量大增。", encoding="utf-8")
+    (tmp_path / "688388_normal_20260120.md").write_text("嘉元科技铜箔产能扩张，芯片业务暂无。", encoding="utf-8")
+    (tmp_path / "688388_professional_20260121.md").write_text("锂电铜箔价格回落<script>", encoding="utf-8")
+
+    index = ReportSearchIndex(tmp_path / "index.jsonl.gz", tmp_path)
+    assert index.rebuild(["688256_normal_20260120.md", "688388_normal_20260120.md", "missing.md"]) == 2
+
+    results = index.search("芯片")
+    assert [r["filename"] for r in results] == ["688256_normal_20260120.md", "688388_normal_20260120.md"]
+    assert "<mark>芯片</mark>" in results[0]["snippet"]
+    assert results[0]["stock_code"] == "688256"
+    assert results[0]["date"] == "2026-01-20"
+
+    assert index.search("芯片", stock_code="688388")[0]["filename"] == "688388_normal_20260120.md"
+    assert index.search("不存在的词") == []
+
+    # Incremental add; snippet text is HTML-escaped
+    index.add_report_file("688388_professional_20260121.md")
+    hit = index.search("铜箔价格")[0]
+    assert hit["filename"] == "688388_professional_20260121.md"
+    assert "&lt;script&gt;" in hit["snippet"]
+
+
+def test_index_is_shared_across_instances(tmp_path):
+    """A reader picks up records appended by another writer, including replacements."""
+    writer = ReportSearchIndex(tmp_path / "index.jsonl.gz", tmp_path)
+    reader = ReportSearchIndex(tmp_path / "index.jsonl.gz", tmp_path)
+
+    writer.add_report("688256_normal_20260120.md", "半导体 行业 景气")
+    assert [r["filename"] for r in reader.search("半导体", with_snippets=False)] == ["688256_normal_20260120.md"]
+
+    writer.add_report("688256_normal_20260120.md", "消费电子 复苏")
+    assert reader.search("半导体", with_snippets=False) == []
+    assert len(reader.search("消费电子", with_snippets=False)) == 1
+    assert len(reader) == 1
+
+    reader.remove_report("688256_normal_20260120.md")
+    assert len(writer) == 0
+
+
+def test_append_only_writers_compact_the_log(tmp_path):
+    """Short-lived writers that never search still compact away replaced records."""
+    index_path = tmp_path / "index.jsonl.gz"
+    rounds = 2 * COMPACT_MIN_DEAD + 10
+    for i in range(rounds):
+        ReportSearchIndex(index_path, tmp_path).add_report("688256_normal_20260120.md", f"版本 v{i} 寒武纪")
+
+    lines = gzip.decompress(index_path.read_bytes()).splitlines()
+    assert len(lines) < rounds
+    reader = ReportSearchIndex(index_path, tmp_path)
+    assert len(reader) == 1
+    assert len(reader.search(f"v{rounds - 1}", with_snippets=False)) == 1
+    assert reader.search("v0", with_snippets=False) == []
+
+
+def _add_reports(index_path: str, worker: int, count: int):
+    index = ReportSearchIndex(index_path)
+    for i in range(count):
+        index.add_report(f"6880{worker:02d}_normal_2026{i + 1:04d}.md", f"worker{worker} 芯片")
+
+
+def test_appends_survive_concurrent_rewrites(tmp_path):
+    """Records appended by other processes while the index is being rewritten are never dropped."""
+    index_path = tmp_path / "index.jsonl.gz"
+    rewriter = ReportSearchIndex(index_path, tmp_path)
+    with ProcessPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(_add_reports, str(index_path), worker, 40) for worker in range(3)]
+        while not all(future.done() for future in futures):
+            rewriter.compact()
+        for future in futures:
+            future.result()
+
+    reader = ReportSearchIndex(index_path, tmp_path)
+    assert len(reader) == 120
+    for worker in range(3):
+        assert len(reader.search(f"worker{worker}", limit=100, with_snippets=False)) == 40
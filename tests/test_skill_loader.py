@@ -2,12 +2,18 @@
 Test Skill Loader
 """
 
+import os
+import random
+import re
 import tempfile
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
-from mini_agent.tools.skill_loader import Skill, SkillLoader
+from mini_agent.tools.skill_loader import Skill, SkillLoader, _SkillPathRewriter
+
+BUNDLED_SKILLS_DIR = Path(__file__).resolve().parent.parent / "mini_agent" / "skills"
 
 
 def create_test_skill(skill_dir: Path, name: str, description: str, content: str):
@@ -272,3 +278,177 @@ Skill content here.
         assert "Skill Root Directory" in prompt
         assert str(skill_dir) in prompt
         assert "All files and references in this skill are relative to this directory" in prompt
+
+
+def test_discover_skills_with_manifest():
+    """Test that the discovery manifest skips parsing unchanged skills and picks up changes"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        skills_dir = Path(tmpdir) / "skills"
+        for i in range(3):
+            skill_dir = skills_dir / f"skill-{i}"
+            skill_dir.mkdir(parents=True)
+            create_test_skill(skill_dir, f"skill-{i}", f"Test skill {i}", f"Content {i}")
+        manifest = Path(tmpdir) / "manifest.json"
+
+        first = SkillLoader(str(skills_dir), manifest_path=manifest)
+        assert sorted(skill.name for skill in first.discover_skills()) == ["skill-0", "skill-1", "skill-2"]
+        assert manifest.exists()
+
+        # Unchanged tree: no walk, no parsing
+        second = SkillLoader(str(skills_dir), manifest_path=manifest)
+        with patch.object(SkillLoader, "_parse_skill_file") as parse, patch.object(SkillLoader, "_walk_skills_tree") as walk:
+            skills = second.discover_skills()
+        assert len(skills) == 3
+        assert parse.call_count == 0 and walk.call_count == 0
+        assert second.get_skill("skill-1").description == "Test skill 1"
+
+        # One edited skill and one new skill are the only files parsed
+        create_test_skill(skills_dir / "skill-0", "skill-0", "Edited description", "New content")
+        os.utime(skills_dir / "skill-0" / "SKILL.md", ns=(1, 1))
+        (skills_dir / "nested" / "skill-3").mkdir(parents=True)
+        create_test_skill(skills_dir / "nested" / "skill-3", "skill-3", "Nested skill", "Content 3")
+
+        third = SkillLoader(str(skills_dir), manifest_path=manifest)
+        with patch.object(SkillLoader, "_parse_skill_file", autospec=True, side_effect=SkillLoader._parse_skill_file) as parse:
+            skills = third.discover_skills()
+        assert parse.call_count == 2
+        assert len(skills) == 4
+        assert third.get_skill("skill-0").description == "Edited description"
+
+
+def test_skill_content_loads_lazily():
+    """Test that discovered skills carry metadata only until get_skill is called"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        skill_dir = Path(tmpdir) / "skills" / "test-skill"
+        (skill_dir / "scripts").mkdir(parents=True)
+        (skill_dir / "scripts" / "run.py").write_text("# Python script", encoding="utf-8")
+        create_test_skill(skill_dir, "test-skill", "A test skill", "Run: python scripts/run.py")
+
+        loader = SkillLoader(str(skill_dir.parent), manifest_path=Path(tmpdir) / "manifest.json")
+        with patch.object(SkillLoader, "_process_skill_paths") as process:
+            loader.discover_skills()
+        assert process.call_count == 0
+        assert loader.loaded_skills["test-skill"].content is None
+        assert "`test-skill`: A test skill" in loader.get_skills_metadata_prompt()
+
+        skill = loader.get_skill("test-skill")
+        assert str(skill_dir / "scripts" / "run.py") in skill.content
+        assert loader.get_skill("test-skill") is skill
+
+
+def _reference_process_skill_paths(content: str, skill_dir: Path) -> str:
+    """The original three-pass path rewrite with a stat per match, kept as the test oracle"""
+
+    def replace_dir_path(match):
+        abs_path = skill_dir / match.group(2)
+        if abs_path.exists():
+            return f"{match.group(1)}{abs_path}"
+        return match.group(0)
+
+    content = re.sub(r"(python\s+|`)((?:scripts|references|assets)/[^\s`\)]+)", replace_dir_path, content)
+
+    def replace_doc_path(match):
+        abs_path = skill_dir / match.group(2)
+        if abs_path.exists():
+            return f"{match.group(1)}`{abs_path}` (use read_file to access){match.group(3)}"
+        return match.group(0)
+
+    pattern_docs = r"(see|read|refer to|check)\s+([a-zA-Z0-9_-]+\.(?:md|txt|json|yaml))([.,;\s])"
+    content = re.sub(pattern_docs, replace_doc_path, content, flags=re.IGNORECASE)
+
+    def replace_markdown_link(match):
+        prefix = match.group(1) if match.group(1) else ""
+        filepath = match.group(3)
+        abs_path = skill_dir / (filepath[2:] if filepath.startswith("./") else filepath)
+        if abs_path.exists():
+            return f"{prefix}[{match.group(2)}](`{abs_path}`) (use read_file to access)"
+        return match.group(0)
+
+    pattern_markdown = (
+        r"(?:(Read|See|Check|Refer to|Load|View)\s+)?\[(`?[^`\]]+`?)\]\(((?:\./)?[^)]+\.(?:md|txt|json|yaml|js|py|html))\)"
+    )
+    return re.sub(pattern_markdown, replace_markdown_link, content, flags=re.IGNORECASE)
+
+
+REWRITE_PATHS = [
+    "scripts/a.py", "scripts/missing.py", "scripts/sub/b.py", "references/guide.md", "references/none.md",
+    "assets/x.json", "reference.md", "forms.md", "nothing.md", "notes.txt", "./reference.md",
+    "./references/guide.md", "references/../forms.md", "scripts/sub/", "http://example.com/a.md",
+]
+REWRITE_VERBS = ["see", "read", "refer to", "check", "Read", "SEE", "Check", "Load", "View", "foresee", "ſee", "look at"]
+REWRITE_WORDS = ["the", "guide", "python", "run", "表格", "数据", "`", "[", "]", "(", ")", ".", ",", ";", "\n", "  "]
+
+
+def random_skill_text(rng: random.Random) -> str:
+    """Random skill body mixing path references, document references and markdown links"""
+
+    def fragment():
+        path, target, verb = rng.choice(REWRITE_PATHS), rng.choice(REWRITE_PATHS), rng.choice(REWRITE_VERBS)
+        filename = path.rsplit("/", 1)[-1]
+        link_text = rng.choice([f"`{filename}`", "Guide", f"run python {path}", f"`{path}`", filename])
+        overlapping = [
+            f"[{verb} {filename} now]({target})",
+            f"python {path}[x]({target})",
+            f"[a [b]({target})",
+            f"[x]({verb} {filename})",
+            f"`scripts/see {filename} ",
+            f"`{path}]",
+        ]
+        return rng.choice(
+            [
+                f"python {path}",
+                f"`{path}`",
+                f"{verb} {filename}{rng.choice('.,; ')}",
+                f"{verb} [{link_text}]({target})",
+                f"[{link_text}]({target})",
+                rng.choice(REWRITE_WORDS),
+                rng.choice(overlapping) if rng.random() < 0.3 else rng.choice(REWRITE_WORDS),
+            ]
+        )
+
+    return "".join(fragment() + rng.choice(["", " ", "\n", ". "]) for _ in range(rng.randrange(1, 20)))
+
+
+def test_path_rewrite_matches_reference():
+    """Property test: the single-pass rewriter produces the same content as the original passes"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        skill_dir = Path(tmpdir) / "skill"
+        for rel_path in ["scripts/a.py", "scripts/sub/b.py", "references/guide.md", "assets/x.json",
+                         "reference.md", "forms.md", "notes.txt", "scripts/see"]:
+            (skill_dir / rel_path).parent.mkdir(parents=True, exist_ok=True)
+            (skill_dir / rel_path).write_text("x", encoding="utf-8")
+
+        rewriter = _SkillPathRewriter(skill_dir)
+        with patch.object(_SkillPathRewriter, "rewrite_sequential", autospec=True, side_effect=_SkillPathRewriter.rewrite_sequential) as sequential:
+            for seed in range(3000):
+                content = random_skill_text(random.Random(seed))
+                assert rewriter.rewrite(content) == _reference_process_skill_paths(content, skill_dir), f"seed {seed}"
+        # Most documents must take the single-pass path for the comparison to mean anything
+        assert sequential.call_count < 1500
+
+
+@pytest.mark.skipif(not (BUNDLED_SKILLS_DIR / "README.md").exists(), reason="skills submodule not checked out")
+def test_path_rewrite_matches_reference_on_bundled_skills():
+    """Test the bundled skills rewrite identically, without per-match stat calls"""
+    for skill_file in BUNDLED_SKILLS_DIR.rglob("SKILL.md"):
+        content = skill_file.read_text(encoding="utf-8")
+        expected = _reference_process_skill_paths(content, skill_file.parent)
+        with patch.object(Path, "exists", side_effect=AssertionError("unexpected stat")):
+            assert _SkillPathRewriter(skill_file.parent).rewrite(content) == expected, skill_file
+
+
+def test_processed_skill_content_is_memoized():
+    """Test that path processing runs once per skill content and directory"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        skill_dir = Path(tmpdir) / "test-skill"
+        (skill_dir / "scripts").mkdir(parents=True)
+        (skill_dir / "scripts" / "run.py").write_text("# Python script", encoding="utf-8")
+        create_test_skill(skill_dir, "test-skill", "A test skill", "Run: python scripts/run.py")
+
+        loader = SkillLoader(tmpdir)
+        with patch.object(_SkillPathRewriter, "rewrite", autospec=True, side_effect=_SkillPathRewriter.rewrite) as rewrite:
+            first = loader.load_skill(skill_dir / "SKILL.md")
+            second = loader.load_skill(skill_dir / "SKILL.md")
+        assert rewrite.call_count == 1
+        assert first.content == second.content
+        assert str(skill_dir / "scripts" / "run.py") in first.content
@@ -1,12 +1,17 @@
 """Test cases for tools."""
 
 import asyncio
+import hashlib
+import os
 import tempfile
 from pathlib import Path
 
 import pytest
+import tiktoken
 
 from mini_agent.tools import BashTool, EditTool, ReadTool, WriteTool
+from mini_agent.tools import file_tools
+from mini_agent.tools.file_tools import LineIndex, read_lines, truncate_text_by_tokens
 
 
 @pytest.mark.asyncio
@@ -32,6 +37,130 @@ async def test_read_tool():
         Path(temp_path).unlink()
 
 
+def test_read_lines_pages_through_line_index(tmp_path, monkeypatch):
+    """Paged reads via the sparse line index match a full read, across checkpoints."""
+    monkeypatch.setattr(file_tools, "LINE_INDEX_STRIDE", 16)
+    lines = [f"{i},688256,{i * 1.5}" if i % 7 else "" for i in range(200)] + ["中文行", "last"]
+    path = tmp_path / "quotes.csv"
+    path.write_bytes(("\r\n".join(lines[:50]) + "\r\n" + "\n".join(lines[50:])).encode("utf-8"))
+
+    assert read_lines(path) == (0, lines)
+    for offset in (1, 17, 50, 51, 199, 202):
+        for limit in (1, 5, 40):
+            assert read_lines(path, offset, limit) == (offset - 1, lines[offset - 1 : offset - 1 + limit])
+    assert read_lines(path, 500, 10) == (499, [])
+
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    assert read_lines(empty) == (0, [])
+
+
+def test_read_lines_matches_text_mode_for_mixed_line_endings(tmp_path, monkeypatch):
+    """Lone "\\r" (classic Mac) line endings split lines like text-mode readlines() did."""
+    import random
+
+    monkeypatch.setattr(file_tools, "LINE_INDEX_STRIDE", 8)
+    rng = random.Random(0)
+    path = tmp_path / "mixed.txt"
+    for case in range(300):
+        pieces = [rng.choice(["ab", "中", "", "x" * rng.randint(1, 12)]) + rng.choice(["\n", "\r", "\r\n", ""])
+                  for _ in range(rng.randint(0, 12))]
+        data = "".join(pieces)
+        path.write_bytes(data.encode("utf-8"))
+        os.utime(path, ns=(case, case))  # defeat the (mtime, size) index cache between cases
+        with open(path, encoding="utf-8") as f:
+            expected = [line.rstrip("\n") for line in f.readlines()]
+        for offset, limit in ((None, None), (2, 3), (1, 1), (5, 100)):
+            start = (offset - 1) if offset else 0
+            end = min((start + limit) if limit else len(expected), len(expected))
+            assert read_lines(path, offset, limit) == (start, expected[start:end]), repr(data)
+
+    # A CRLF split across an index chunk boundary is not a lone "\\r"
+    path.write_bytes(b"1234567\r\nabc\r\n")
+    os.utime(path, ns=(10**6, 10**6))
+    assert read_lines(path) == (0, ["1234567", "abc"])
+    assert LineIndex._cache[str(path.resolve())].lone_cr is False
+
+
+def test_line_index_is_cached_per_mtime_and_size(tmp_path):
+    """The index is reused while the file is unchanged and rebuilt after it changes."""
+    path = tmp_path / "data.txt"
+    path.write_text("a\nb\nc\n")
+    read_lines(path, 2, 1)
+    index = LineIndex._cache[str(path.resolve())]
+    assert read_lines(path, 3, 1) == (2, ["c"])
+    assert LineIndex._cache[str(path.resolve())] is index
+
+    path.write_text("a\nb\nc\nd\n")
+    assert read_lines(path, 4, 1) == (3, ["d"])
+    assert LineIndex._cache[str(path.resolve())].total_lines == 4
+
+
+class CountingEncoding:
+    """Small offline byte-level BPE vocabulary that records how many characters were encoded."""
+
+    def __init__(self):
+        ranks = {bytes([i]): i for i in range(256)}
+        for merge in (b"th", b"the", b" the", b"in", b"ing", b"\n\n"):
+            ranks[merge] = len(ranks)
+        self._encoding = tiktoken.Encoding(
+            name="test-bytes",
+            pat_str=r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]++[\r\n]*|\s*[\r\n]|\s+(?!\S)|\s+""",
+            mergeable_ranks=ranks,
+            special_tokens={},
+        )
+        self.encoded_chars = 0
+
+    def encode(self, text, **kwargs):
+        self.encoded_chars += len(text)
+        return self._encoding.encode(text, **kwargs)
+
+    def decode_bytes(self, tokens):
+        return self._encoding.decode_bytes(tokens)
+
+
+def test_truncate_text_fast_path_skips_encoding(monkeypatch):
+    """Text provably under the limit is returned as-is without being encoded."""
+    encoding = CountingEncoding()
+    monkeypatch.setattr(file_tools, "_get_encoding", lambda: encoding)
+
+    text = "收盘 245.60\n" * 100
+    assert truncate_text_by_tokens(text, 10_000) is text
+    assert encoding.encoded_chars == 0
+
+    # Over the byte bound but under the token limit: encoded, still unchanged
+    text = "the market rose\n" * 100
+    assert truncate_text_by_tokens(text, 1500) is text
+
+
+def test_truncate_text_encodes_only_head_and_tail(monkeypatch):
+    """Huge input: only the head and tail windows are encoded, each within half the budget."""
+    encoding = CountingEncoding()
+    monkeypatch.setattr(file_tools, "_get_encoding", lambda: encoding)
+    lines = [f"{i},688256,寒武纪,the price rose {i % 97}%" for i in range(100_000)]
+    text = "\n".join(lines)
+
+    result = truncate_text_by_tokens(text, 2000)
+    head, note, tail = result.partition("\n\n... [Content truncated: ~")
+    tail = tail.split("] ...\n\n", 1)[1]
+
+    assert encoding.encoded_chars < len(text) / 50
+    assert text.startswith(head) and head.startswith(lines[0])
+    assert text.endswith(tail) and tail.endswith(lines[-1])
+    assert len(encoding._encoding.encode(head)) <= 1000
+    assert len(encoding._encoding.encode(tail)) <= 1000
+
+
+def test_truncate_text_without_tiktoken(monkeypatch):
+    """Without the tokenizer, tokens are estimated from characters."""
+    monkeypatch.setattr(file_tools, "_get_encoding", lambda: None)
+    text = "line of market data\n" * 10_000
+    result = truncate_text_by_tokens(text, 1000)
+    assert "[Content truncated: ~80000 tokens -> ~1000 tokens limit]" in result
+    assert result.startswith("line of market data\n") and len(result) < 3000
+    assert truncate_text_by_tokens("short", 1000) == "short"
+
+
 @pytest.mark.asyncio
 async def test_write_tool():
     """Test write file tool."""
@@ -49,6 +178,53 @@ async def test_write_tool():
         print("✅ WriteTool test passed")
 
 
+@pytest.mark.asyncio
+async def test_write_tool_replaces_atomically(tmp_path, monkeypatch):
+    """Writes go through a temp file and rename: mode is kept, failures leave the old file intact."""
+    report = tmp_path / "688256_professional_20240628.md"
+    report.write_text("old report")
+    os.chmod(report, 0o640)
+
+    tool = WriteTool(workspace_dir=str(tmp_path), durability="fsync_dir")
+    result = await tool.execute(path=report.name, content="new report\n")
+    assert result.success, result.error
+    assert report.read_text() == "new report\n"
+    assert report.stat().st_mode & 0o777 == 0o640
+
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", failing_replace)
+    result = await tool.execute(path=report.name, content="half written?")
+    assert not result.success and "disk full" in result.error
+    assert report.read_text() == "new report\n"
+    assert [p.name for p in tmp_path.iterdir()] == [report.name]
+
+    with pytest.raises(ValueError):
+        WriteTool(durability="sometimes")
+
+
+@pytest.mark.asyncio
+async def test_write_tool_skips_unchanged_content(tmp_path):
+    """Rewriting identical content is skipped; the hook reports every write with its digest."""
+    calls = []
+    tool = WriteTool(workspace_dir=str(tmp_path), on_write=lambda path, digest, changed: calls.append((path.name, digest, changed)))
+    digest = hashlib.sha256("# 报告\n".encode("utf-8")).hexdigest()
+
+    assert (await tool.execute(path="report.md", content="# 报告\n")).success
+    mtime = (tmp_path / "report.md").stat().st_mtime_ns
+    result = await tool.execute(path="report.md", content="# 报告\n")
+    assert "write skipped" in result.content
+    assert (tmp_path / "report.md").stat().st_mtime_ns == mtime
+
+    # A fresh tool hashes the existing file instead of trusting its own cache
+    assert "write skipped" in (await WriteTool(workspace_dir=str(tmp_path)).execute(path="report.md", content="# 报告\n")).content
+
+    await tool.execute(path="report.md", content="# 报告 v2\n")
+    assert calls[:2] == [("report.md", digest, True), ("report.md", digest, False)]
+    assert calls[2][2] is True and (tmp_path / "report.md").read_text() == "# 报告 v2\n"
+
+
 @pytest.mark.asyncio
 async def test_edit_tool():
     """Test edit file tool."""
@@ -72,6 +248,51 @@ async def test_edit_tool():
         Path(temp_path).unlink()
 
 
+@pytest.mark.asyncio
+async def test_edit_tool_applies_batch_in_one_write(tmp_path):
+    """Several edits are applied together and summarized as a compact diff."""
+    report = tmp_path / "report.md"
+    report.write_text("# 688256\n收盘价 245.60\n涨幅 +3.14%\n\n## 结论\n持有\n", encoding="utf-8")
+
+    result = await EditTool(workspace_dir=str(tmp_path)).execute(
+        path="report.md",
+        edits=[
+            {"old_str": "245.60", "new_str": "250.10"},
+            {"old_str": "收盘价", "new_str": "收盘"},
+            {"old_str": "持有\n", "new_str": "增持\n理由：业绩超预期\n"},
+        ],
+    )
+
+    assert result.success, result.error
+    assert report.read_text(encoding="utf-8") == "# 688256\n收盘 250.10\n涨幅 +3.14%\n\n## 结论\n增持\n理由：业绩超预期\n"
+    # Two edits on line 2 share one hunk
+    assert "(3 edits)" in result.content
+    assert "@@ line 2 (new 2): -1 +1 @@\n-收盘价 245.60\n+收盘 250.10" in result.content
+    assert "@@ line 6 (new 6): -2 +3 @@" in result.content
+
+
+@pytest.mark.asyncio
+async def test_edit_tool_batch_is_all_or_nothing(tmp_path):
+    """Ambiguous, missing or overlapping edits fail the whole batch and leave the file untouched."""
+    report = tmp_path / "report.md"
+    original = "持有 持有\n目标价 300\n"
+    report.write_text(original, encoding="utf-8")
+    tool = EditTool(workspace_dir=str(tmp_path))
+
+    result = await tool.execute(path="report.md", old_str="持有", new_str="增持")
+    assert not result.success and "appears 2 times" in result.error
+
+    cases = [
+        ([{"old_str": "目标价 300", "new_str": "目标价 320"}, {"old_str": "不存在", "new_str": "x"}], "Edit #2: Text not found"),
+        ([{"old_str": "目标价", "new_str": "x"}, {"old_str": "目标价 300", "new_str": "y"}], "overlap"),
+        ([{"old_str": "持有\n目标", "new_str": "x"}, {"old_str": "标价 3", "new_str": "y"}], "overlap in the file"),
+    ]
+    for edits, message in cases:
+        result = await tool.execute(path="report.md", edits=edits)
+        assert not result.success and message in result.error
+    assert report.read_text(encoding="utf-8") == original
+
+
 @pytest.mark.asyncio
 async def test_bash_tool():
     """Test bash command tool."""
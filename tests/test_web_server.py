@@ -0,0 +1,162 @@
+"""Test cases for web_server report downloads (ETag, 304 and precompressed variants)."""
+
+import gzip
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import web_server
+
+REPORT_NAME = "688388_normal_20260120.md"
+REPORT_CONTENT = "# 688388 日报\n\n收盘 245.60，涨幅 +3.14%\n".encode("utf-8") * 50
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Flask test client serving reports from tmp_path (no config.yaml needed)."""
+    (tmp_path / "images").mkdir()
+    (tmp_path / "metadata").mkdir()
+    (tmp_path / REPORT_NAME).write_bytes(REPORT_CONTENT)
+    reporter = SimpleNamespace(
+        reports_dir=tmp_path,
+        get_report_content=lambda filename: (tmp_path / filename).read_text(encoding="utf-8"),
+    )
+    monkeypatch.setattr(web_server, "reporter", reporter)
+    monkeypatch.setattr(web_server, "_file_etags", {})
+    monkeypatch.setattr(web_server, "_image_manifests", {})
+    monkeypatch.setattr(web_server, "response_cache", web_server.ResponseCache())
+    return web_server.app.test_client()
+
+
+def _write_gzip_variant(tmp_path, mtime_offset: float):
+    report = tmp_path / REPORT_NAME
+    variant = tmp_path / f"{REPORT_NAME}.gz"
+    variant.write_bytes(gzip.compress(REPORT_CONTENT, mtime=0))
+    mtime = report.stat().st_mtime + mtime_offset
+    os.utime(variant, (mtime, mtime))
+
+
+def test_download_if_none_match_returns_304(client):
+    """A client revalidating with the ETag it was given gets 304 without a body."""
+    response = client.get(f"/download/{REPORT_NAME}", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.data == REPORT_CONTENT
+    etag = response.headers["ETag"]
+
+    response = client.get(
+        f"/download/{REPORT_NAME}", headers={"Accept-Encoding": "identity", "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_download_serves_fresh_gzip_variant_with_own_etag(client, tmp_path):
+    """The precompressed copy is sent with Content-Encoding, Vary and an ETag of its own."""
+    _write_gzip_variant(tmp_path, mtime_offset=1)
+
+    identity = client.get(f"/download/{REPORT_NAME}", headers={"Accept-Encoding": "identity"})
+    compressed = client.get(f"/download/{REPORT_NAME}", headers={"Accept-Encoding": "gzip"})
+
+    assert compressed.status_code == 200
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.data) == REPORT_CONTENT
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+    assert "Accept-Encoding" in identity.headers["Vary"]
+    assert compressed.headers["ETag"] != identity.headers["ETag"]
+
+    response = client.get(
+        f"/download/{REPORT_NAME}",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["ETag"]},
+    )
+    assert response.status_code == 304
+
+
+def test_download_ignores_stale_gzip_variant(client, tmp_path):
+    """A .gz older than the report (report rewritten since) falls back to the identity body."""
+    _write_gzip_variant(tmp_path, mtime_offset=-10)
+
+    response = client.get(f"/download/{REPORT_NAME}", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    assert response.data == REPORT_CONTENT
+
+
+@pytest.mark.parametrize("name", ["images", "metadata", "missing.md"])
+def test_download_non_file_returns_404(client, name):
+    """Directories and missing names are 404, not a server error."""
+    response = client.get(f"/download/{name}", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 404
+
+
+@pytest.mark.skipif(not hasattr(time, "tzset"), reason="time.tzset is not available")
+def test_report_last_modified_is_file_mtime_in_gmt(client, tmp_path):
+    """Last-Modified is the file's mtime in GMT regardless of the server's local time zone."""
+    original_tz = os.environ.get("TZ")
+    os.environ["TZ"] = "Asia/Shanghai"
+    time.tzset()
+    try:
+        os.utime(tmp_path / REPORT_NAME, (1700000000, 1700000000))
+
+        response = client.get(f"/api/report/{REPORT_NAME}")
+        assert response.status_code == 200
+        assert response.headers["Last-Modified"] == "Tue, 14 Nov 2023 22:13:20 GMT"
+
+        response = client.get(
+            f"/api/report/{REPORT_NAME}", headers={"If-Modified-Since": "Tue, 14 Nov 2023 22:13:20 GMT"}
+        )
+        assert response.status_code == 304
+        response = client.get(
+            f"/api/report/{REPORT_NAME}", headers={"If-Modified-Since": "Tue, 14 Nov 2023 22:13:19 GMT"}
+        )
+        assert response.status_code == 200
+    finally:
+        if original_tz is None:
+            del os.environ["TZ"]
+        else:
+            os.environ["TZ"] = original_tz
+        time.tzset()
+
+
+def test_rendered_report_revalidates_when_image_manifest_changes(client, tmp_path):
+    """Historical report pages are not immutable: writing a variant manifest changes the page."""
+    name = "688388_normal_20200101.md"
+    report = tmp_path / name
+    report.write_text("# K 线\n\n![kline](/images/688388/kline.png)\n", encoding="utf-8")
+    os.utime(report, (1700000000, 1700000000))
+
+    first = client.get(f"/api/report/{name}")
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "no-cache"
+    assert "<picture>" not in first.get_json()["content"]
+
+    manifest_dir = tmp_path / "images" / "_variants" / "manifests"
+    manifest_dir.mkdir(parents=True)
+    manifest = {
+        "/images/688388/kline.png": {
+            "hash": "abc123",
+            "width": 1800,
+            "height": 900,
+            "variants": [{"format": "webp", "width": 480, "file": "480.webp"}],
+        }
+    }
+    (manifest_dir / f"{name}.json").write_text(json.dumps(manifest), encoding="utf-8")
+    os.utime(manifest_dir / f"{name}.json", (1700000100, 1700000100))
+
+    second = client.get(
+        f"/api/report/{name}",
+        headers={"If-None-Match": first.headers["ETag"], "If-Modified-Since": first.headers["Last-Modified"]},
+    )
+    assert second.status_code == 200
+    assert "<picture>" in second.get_json()["content"]
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert second.headers["Last-Modified"] == "Tue, 14 Nov 2023 22:15:00 GMT"
+
+    variant = tmp_path / "images" / "_variants" / "abc123" / "480.webp"
+    variant.parent.mkdir(parents=True)
+    variant.write_bytes(b"RIFF")
+    response = client.get("/images/_variants/abc123/480.webp")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "public, max-age=31536000, immutable"
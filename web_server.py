@@ -5,15 +5,31 @@ Web Server for Financial Reports
 提供 Web 界面展示所有历史报告
 """
 
-from flask import Flask, render_template, jsonify, send_from_directory
+from flask import Flask, Response, abort, render_template, jsonify, request, send_from_directory
+from werkzeug.security import safe_join
 from pathlib import Path
 import markdown
-from datetime import datetime
+from datetime import datetime, timezone
+import base64
+import binascii
+import gzip
+import hashlib
+import json
+import threading
+from stat import S_ISREG
+import time
 import yaml
-import re
-from collections import defaultdict
+from collections import OrderedDict
 
-from financial_reporter import FinancialReporter
+from financial_reporter import FinancialReporter, COMPRESSED_SUFFIXES
+from report_catalog import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, ReportCatalog
+from report_events import EVENTS_FILENAME, EventFeed, format_sse
+from image_variants import MANIFESTS_DIRNAME, VARIANTS_DIRNAME, load_report_manifest, responsive_images
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，缺失时只提供 gzip
+    brotli = None
 
 
 app = Flask(__name__)
@@ -21,14 +37,116 @@ app.config['JSON_AS_ASCII'] = False
 
 # 初始化报告生成器（用于读取报告）
 reporter = None
+catalog = None
+event_feed = None
 stocks_config = {}
 
+CATALOG_POLL_INTERVAL = 2.0  # 报告目录轮询间隔（秒）
+
+# SSE 事件流
+EVENT_POLL_INTERVAL = 0.5        # 事件日志轮询间隔（秒）
+EVENT_HEARTBEAT_INTERVAL = 15    # 无事件时发送心跳注释的间隔（秒），防止代理断开空闲连接
+EVENT_STREAM_MAX_SECONDS = 300   # 单个连接的最长时间，到期后由浏览器带 Last-Event-ID 自动重连
+EVENT_RETRY_MS = 3000            # 浏览器断线重连等待时间
+EVENT_STREAM_MAX_CLIENTS = 32    # 每个进程同时保持的事件流连接上限（每个连接占用一个线程）
+
+# HTTP 缓存策略
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'  # 仅用于按内容哈希存放的图片变体
+REVALIDATE_CACHE_CONTROL = 'no-cache'                            # 可缓存，但每次需用 ETag 校验
+MIN_COMPRESS_SIZE = 1024                                         # 小于该字节数的响应不压缩
+RESPONSE_CACHE_SIZE = 256                                        # 渲染结果缓存的最大条目数
+
+MARKDOWN_EXTENSIONS = [
+    'tables',           # 表格支持
+    'fenced_code',      # 代码块支持
+    'nl2br',            # 换行符支持
+    'attr_list',        # 属性列表（图片尺寸控制）
+    'md_in_html'        # HTML中的Markdown
+]
+
+
+class CachedBody:
+    """已渲染的响应体，连同强 ETag 和预先计算好的压缩变体"""
+
+    def __init__(self, body: bytes, mimetype: str):
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.variants = {'identity': body}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            self.variants['gzip'] = gzip.compress(body, compresslevel=6, mtime=0)
+            if brotli is not None:
+                self.variants['br'] = brotli.compress(body, quality=9)
+
+
+class ResponseCache:
+    """按 (类型, 文件名, mtime, 大小) 缓存渲染结果的 LRU，文件一变即失效"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: tuple, build) -> CachedBody:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+
+        cached = build()
+        with self._lock:
+            self._entries[key] = cached
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return cached
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache()
+event_stream_slots = threading.BoundedSemaphore(EVENT_STREAM_MAX_CLIENTS)
+# 文件内容哈希缓存: 路径 -> (mtime_ns, size, etag)
+_file_etags = {}
+# 报告图片清单缓存: 报告文件名 -> (mtime_ns, manifest)
+_image_manifests = {}
+
 
-def init_reporter(config_path=None, reports_dir="./reports"):
-    """初始化报告生成器"""
-    global reporter, stocks_config
+def init_reporter(config_path=None, reports_dir="./reports", watch=True):
+    """
+    初始化报告生成器
+
+    Args:
+        config_path: 配置文件路径
+        reports_dir: 报告存储目录
+        watch: 是否立即启动报告目录的后台轮询线程
+               （多进程模式下由各 worker 在 fork 之后自行启动）
+    """
+    global reporter, catalog, event_feed, stocks_config
     reporter = FinancialReporter(config_path, reports_dir)
     
+    # 报告目录只在启动时全量扫描一次，之后由后台线程增量更新
+    catalog = ReportCatalog(reporter.metadata_dir)
+    # 调度器 / 报告生成器写入的进度事件
+    event_feed = EventFeed(reporter.reports_dir / EVENTS_FILENAME)
+    if watch:
+        catalog.start_watching(CATALOG_POLL_INTERVAL)
+        event_feed.start_watching(EVENT_POLL_INTERVAL)
+    
+    # 首次启动时根据已有报告建立检索索引
+    search_index = reporter.search_index
+    if not search_index.index_path.exists():
+        filenames = [entry['filename']
+                     for versions in catalog.reports_by_stock().values()
+                     for entries in versions.values()
+                     for entry in entries]
+        if filenames:
+            search_index.rebuild(dict.fromkeys(filenames))
+    # 启动时加载索引，避免第一次查询时才加载
+    print(f"🔍 检索索引已加载: {len(search_index)} 篇报告")
+    
     # 加载股票配置
     try:
         with open("stocks_config.yaml", "r", encoding="utf-8") as f:
@@ -42,87 +160,270 @@ def init_reporter(config_path=None, reports_dir="./reports"):
 @app.route('/')
 def index():
     """首页 - 按股票代码分组的报告"""
-    reports_by_stock = get_reports_by_stock()
-    
-    return render_template('index.html', 
-                         stocks=stocks_config,
-                         reports_by_stock=reports_by_stock)
+    cached = response_cache.get_or_build(
+        ('index', id(catalog), catalog.version),
+        lambda: CachedBody(
+            render_template('index.html',
+                            stocks=stocks_config,
+                            reports_by_stock=get_reports_by_stock()).encode('utf-8'),
+            'text/html'
+        )
+    )
+    return conditional_response(cached, cache_control=REVALIDATE_CACHE_CONTROL)
 
 
 @app.route('/api/reports')
 def api_reports():
-    """API - 获取所有报告列表"""
-    reports = reporter.get_all_reports()
-    return jsonify(reports)
+    """
+    API - 分页获取报告列表（最新的在前面）
+
+    查询参数:
+        stock / version / status: 按股票代码、版本、状态过滤
+        date_from / date_to: 按报告日期范围过滤（YYYY-MM-DD，含两端）
+        fields: 逗号分隔的返回字段，例如 fields=filename,date,status
+        limit: 页大小（默认 50，最大 500）
+        cursor: 上一页返回的 next_cursor
+    """
+    args = request.args
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+        after = decode_cursor(args['cursor']) if args.get('cursor') else None
+        for key in ('date_from', 'date_to'):
+            if args.get(key):
+                datetime.strptime(args[key], '%Y-%m-%d')
+    except (ValueError, TypeError):
+        return jsonify({
+            'success': False,
+            'error': '无效的查询参数'
+        }), 400
+
+    fields = [f for f in args.get('fields', '').split(',') if f] or None
+    query = {
+        'stock_code': args.get('stock') or None,
+        'version': args.get('version') or None,
+        'status': args.get('status') or None,
+        'date_from': args.get('date_from') or None,
+        'date_to': args.get('date_to') or None,
+        'after': after,
+        'limit': max(1, min(limit, MAX_PAGE_SIZE)),
+    }
+
+    def build():
+        reports, next_key = catalog.query(**query)
+        if fields:
+            reports = [{f: r[f] for f in fields if f in r} for r in reports]
+        body = json.dumps({
+            'success': True,
+            'reports': reports,
+            'count': len(reports),
+            'next_cursor': encode_cursor(next_key) if next_key else None
+        }, ensure_ascii=False).encode('utf-8')
+        return CachedBody(body, 'application/json')
+
+    cache_key = ('api_reports', id(catalog), catalog.version,
+                 tuple(sorted(args.items(multi=True))))
+    cached = response_cache.get_or_build(cache_key, build)
+    return conditional_response(cached, cache_control=REVALIDATE_CACHE_CONTROL)
+
+
+@app.route('/api/search')
+def api_search():
+    """
+    API - 全文检索报告
+
+    查询参数:
+        q: 查询文本（必填）
+        stock / version: 按股票代码、版本过滤
+        limit: 返回结果数（默认 10，最大 50）
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({
+            'success': False,
+            'error': '缺少查询参数 q'
+        }), 400
+
+    try:
+        limit = max(1, min(int(request.args.get('limit', 10)), 50))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': '无效的查询参数'
+        }), 400
+
+    start = time.perf_counter()
+    results = reporter.search_index.search(
+        query,
+        limit=limit,
+        stock_code=request.args.get('stock') or None,
+        version=request.args.get('version') or None
+    )
+    return jsonify({
+        'success': True,
+        'query': query,
+        'results': results,
+        'took_ms': round((time.perf_counter() - start) * 1000, 2)
+    })
+
+
+@app.route('/api/events')
+def api_events():
+    """
+    API - 报告进度事件流（Server-Sent Events）
+
+    事件类型: task_started / report_started / step_progress /
+             report_completed / report_failed / task_finished
+    断线重连时浏览器会带上 Last-Event-ID，从该事件之后继续推送。
+    """
+    if not event_stream_slots.acquire(blocking=False):
+        response = jsonify({
+            'success': False,
+            'error': '事件流连接数已满，请稍后重试'
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = str(EVENT_RETRY_MS // 1000)
+        return response
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    position = event_feed.resume_from(last_event_id)
+
+    def stream(position):
+        yield f"retry: {EVENT_RETRY_MS}\n\n"
+        deadline = time.monotonic() + EVENT_STREAM_MAX_SECONDS
+        while time.monotonic() < deadline:
+            events, position = event_feed.wait_for_events(position, timeout=EVENT_HEARTBEAT_INTERVAL)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for event_id, event in events:
+                yield format_sse(event_id, event)
+
+    response = Response(stream(position), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # 关闭 nginx 等反向代理的缓冲
+    # 连接关闭（包括客户端中途断开）时归还名额
+    response.call_on_close(event_stream_slots.release)
+    return response
+
+
+def encode_cursor(key: tuple) -> str:
+    """把 (timestamp, 元数据文件名) 编码为不透明的游标字符串"""
+    raw = json.dumps(list(key), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """解析游标字符串，格式错误时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"无效的游标: {cursor}") from e
+    if not (isinstance(key, list) and len(key) == 2 and all(isinstance(k, str) for k in key)):
+        raise ValueError(f"无效的游标: {cursor}")
+    return tuple(key)
 
 
 @app.route('/api/report/<filename>')
 def api_report_content(filename):
     """API - 获取指定报告内容"""
-    content = reporter.get_report_content(filename)
-    if content:
-        # 转换 Markdown 到 HTML
-        html_content = markdown.markdown(
-            content,
-            extensions=[
-                'tables',           # 表格支持
-                'fenced_code',      # 代码块支持
-                'nl2br',            # 换行符支持
-                'attr_list',        # 属性列表（图片尺寸控制）
-                'md_in_html'        # HTML中的Markdown
-            ]
-        )
-        return jsonify({
-            'success': True,
-            'content': html_content,
-            'markdown': content
-        })
-    else:
+    stat = _report_stat(filename)
+    if stat is None:
         return jsonify({
             'success': False,
             'error': '报告不存在'
         }), 404
 
+    images_version, image_manifest = _report_image_manifest(filename)
+
+    def build():
+        content = reporter.get_report_content(filename)
+        body = json.dumps({
+            'success': True,
+            'content': render_markdown(content, image_manifest),
+            'markdown': content
+        }, ensure_ascii=False).encode('utf-8')
+        return CachedBody(body, 'application/json')
+
+    cached = response_cache.get_or_build(
+        ('api_report', filename, stat.st_mtime_ns, stat.st_size, images_version), build
+    )
+    # 渲染结果随图片清单变化（如补生成变体），不能长期缓存，每次用 ETag 校验
+    return conditional_response(
+        cached,
+        last_modified=max(stat.st_mtime, (images_version or 0) / 1e9),
+        cache_control=REVALIDATE_CACHE_CONTROL
+    )
+
 
 @app.route('/report/<filename>')
 def view_report(filename):
     """查看报告详情页"""
-    content = reporter.get_report_content(filename)
-    if content:
-        # 转换 Markdown 到 HTML
-        html_content = markdown.markdown(
-            content,
-            extensions=[
-                'tables',           # 表格支持
-                'fenced_code',      # 代码块支持
-                'nl2br',            # 换行符支持
-                'attr_list',        # 属性列表（图片尺寸控制）
-                'md_in_html'        # HTML中的Markdown
-            ]
-        )
-        return render_template('report.html', 
-                             filename=filename, 
-                             content=html_content)
-    else:
+    stat = _report_stat(filename)
+    if stat is None:
         return "报告不存在", 404
 
+    images_version, image_manifest = _report_image_manifest(filename)
+
+    def build():
+        content = reporter.get_report_content(filename)
+        html = render_template('report.html',
+                               filename=filename,
+                               content=render_markdown(content, image_manifest))
+        return CachedBody(html.encode('utf-8'), 'text/html')
+
+    cached = response_cache.get_or_build(
+        ('report', filename, stat.st_mtime_ns, stat.st_size, images_version), build
+    )
+    # 渲染结果随图片清单变化（如补生成变体），不能长期缓存，每次用 ETag 校验
+    return conditional_response(
+        cached,
+        last_modified=max(stat.st_mtime, (images_version or 0) / 1e9),
+        cache_control=REVALIDATE_CACHE_CONTROL
+    )
+
 
 @app.route('/download/<filename>')
 def download_report(filename):
-    """下载报告"""
-    return send_from_directory(
-        reporter.reports_dir,
-        filename,
-        as_attachment=True
+    """下载报告（优先使用写入时预压缩的文件）"""
+    stat = _report_stat(filename)
+    if stat is None or not S_ISREG(stat.st_mode):
+        abort(404)
+
+    encoding = _negotiate_encoding(
+        [enc for enc, suffix in COMPRESSED_SUFFIXES.items()
+         if _is_fresh_variant(filename, suffix)]
     )
+    if encoding == 'identity':
+        response = send_from_directory(
+            reporter.reports_dir,
+            filename,
+            as_attachment=True,
+            etag=_file_etag(reporter.reports_dir / filename) or True,
+            max_age=0
+        )
+    else:
+        # 预压缩文件内容与原文件对应，用 Content-Encoding 透明下发
+        response = send_from_directory(
+            reporter.reports_dir,
+            f"{filename}{COMPRESSED_SUFFIXES[encoding]}",
+            as_attachment=True,
+            etag=_file_etag(reporter.reports_dir / f"{filename}{COMPRESSED_SUFFIXES[encoding]}") or True,
+            download_name=filename,
+            mimetype='text/markdown',
+            max_age=0
+        )
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
 
 
 @app.route('/api/stocks/<stock_code>/versions')
 def api_stock_versions(stock_code):
     """API - 获取指定股票的所有版本和报告"""
-    reports_by_stock = get_reports_by_stock()
+    versions = catalog.stock_versions(stock_code)
     
-    if stock_code not in reports_by_stock:
+    if versions is None:
         return jsonify({
             'success': False,
             'error': '股票代码不存在'
@@ -132,54 +433,127 @@ def api_stock_versions(stock_code):
         'success': True,
         'stock_code': stock_code,
         'stock_name': stocks_config.get(stock_code, {}).get('name', stock_code),
-        'versions': reports_by_stock[stock_code]
+        'versions': versions
     })
 
 
 def get_reports_by_stock():
     """按股票代码分组报告"""
-    reports = reporter.get_all_reports()
-    grouped = defaultdict(lambda: {'professional': [], 'normal': []})
-    
-    # 报告文件名格式: {stock_code}_{version}_{date}.md
-    # 例如: 688388_professional_20260122.md 或 688388_normal_20260122.md
-    pattern = r'^(\d+)_(professional|normal)_(\d{8})\.md$'
-    
-    for report in reports:
-        if report.get('status') != 'success':
-            continue
-            
-        filename = report.get('filename', '')
-        match = re.match(pattern, filename)
-        
-        if match:
-            stock_code, version, date_str = match.groups()
-            # 格式化日期: 20260122 -> 2026-01-22
-            formatted_date = f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
-            
-            grouped[stock_code][version].append({
-                'filename': filename,
-                'date': formatted_date,
-                'date_str': date_str,
-                'timestamp': report.get('timestamp', '')
-            })
-    
-    # 按日期排序（最新的在前面）
-    for stock_code in grouped:
-        for version in ['professional', 'normal']:
-            grouped[stock_code][version].sort(
-                key=lambda x: x['date_str'], 
-                reverse=True
-            )
-    
-    return dict(grouped)
+    return catalog.reports_by_stock()
 
 
 @app.route('/images/<path:filename>')
 def serve_image(filename):
     """提供图片静态文件服务"""
     images_dir = reporter.reports_dir / 'images' if reporter else Path('./reports/images')
-    return send_from_directory(images_dir, filename)
+    image_path = safe_join(str(images_dir), filename)
+    if image_path is None:
+        abort(404)
+
+    if filename.startswith(f"{VARIANTS_DIRNAME}/"):
+        if filename.startswith(f"{VARIANTS_DIRNAME}/{MANIFESTS_DIRNAME}/"):
+            abort(404)
+        # 变体按内容哈希存放，路径不变内容就不变
+        response = send_from_directory(images_dir, filename)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    # 图片每次生成会覆盖同名文件，因此用内容哈希做强 ETag 并要求重新校验
+    return send_from_directory(
+        images_dir,
+        filename,
+        etag=_file_etag(Path(image_path)) or True,
+        max_age=0
+    )
+
+
+def render_markdown(content: str, image_manifest: dict = None) -> str:
+    """转换 Markdown 到 HTML，有图片清单时把图片替换为响应式 <picture>"""
+    html = markdown.markdown(content, extensions=MARKDOWN_EXTENSIONS)
+    if image_manifest:
+        html = responsive_images(html, image_manifest)
+    return html
+
+
+def conditional_response(cached: CachedBody, last_modified: float = None,
+                         cache_control: str = REVALIDATE_CACHE_CONTROL) -> Response:
+    """按 Accept-Encoding 选择预压缩变体，并处理 If-None-Match / If-Modified-Since"""
+    encoding = _negotiate_encoding([enc for enc in cached.variants if enc != 'identity'])
+    response = Response(cached.variants[encoding], mimetype=cached.mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    # 强 ETag 针对具体表示，不同编码使用不同的值
+    response.set_etag(cached.etag if encoding == 'identity' else f"{cached.etag}-{encoding}")
+    if last_modified is not None:
+        # 带时区的 UTC 时间；naive datetime 会被 Werkzeug 当作 UTC，导致按服务器时区偏移
+        response.last_modified = datetime.fromtimestamp(int(last_modified), tz=timezone.utc)
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+
+def _negotiate_encoding(available) -> str:
+    """从可用编码中挑选客户端接受的最优编码（br 优先于 gzip）"""
+    for encoding in ('br', 'gzip'):
+        if encoding in available and request.accept_encodings[encoding] > 0:
+            return encoding
+    return 'identity'
+
+
+def _report_stat(filename: str):
+    """返回报告文件的 stat，报告不存在时返回 None"""
+    try:
+        return (reporter.reports_dir / filename).stat()
+    except (OSError, ValueError):
+        return None
+
+
+def _report_image_manifest(filename: str) -> tuple:
+    """返回 (清单 mtime_ns, 报告图片清单)，按 mtime 缓存；没有清单时为 (None, None)"""
+    images_dir = reporter.reports_dir / 'images'
+    try:
+        mtime_ns = (images_dir / VARIANTS_DIRNAME / MANIFESTS_DIRNAME / f"{filename}.json").stat().st_mtime_ns
+    except (OSError, ValueError):
+        return None, None
+
+    cached = _image_manifests.get(filename)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached
+    cached = (mtime_ns, load_report_manifest(images_dir, filename))
+    _image_manifests[filename] = cached
+    return cached
+
+
+def _is_fresh_variant(filename: str, suffix: str) -> bool:
+    """预压缩文件存在且不早于原报告时才可使用"""
+    try:
+        source = (reporter.reports_dir / filename).stat()
+        variant = (reporter.reports_dir / f"{filename}{suffix}").stat()
+    except (OSError, ValueError):
+        return False
+    return S_ISREG(variant.st_mode) and variant.st_mtime_ns >= source.st_mtime_ns
+
+
+def _file_etag(path: Path):
+    """计算文件内容哈希作为强 ETag，按 (mtime, size) 缓存，不是普通文件时返回 None"""
+    try:
+        stat = path.stat()
+    except (OSError, ValueError):
+        return None
+    if not S_ISREG(stat.st_mode):
+        return None
+
+    cached = _file_etags.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    etag = digest.hexdigest()[:32]
+    _file_etags[path] = (stat.st_mtime_ns, stat.st_size, etag)
+    return etag
 
 
 @app.route('/health')
@@ -191,6 +565,61 @@ def health():
     })
 
 
+def run_production_server(args):
+    """
+    生产模式 - 使用 gunicorn 多进程 + 线程运行
+
+    - preload: 报告目录、检索索引在主进程加载一次，fork 后各 worker 共享（写时复制）
+    - sendfile: /images/、/download/ 等文件响应由 gunicorn 通过 sendfile() 零拷贝发送
+    - 平滑重启: 向主进程发送 SIGHUP，新 worker 就绪后旧 worker 处理完请求再退出
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("❌ 生产模式需要 gunicorn，请先安装: pip install gunicorn")
+        raise SystemExit(1)
+
+    global event_stream_slots
+    # 事件流长时间占用线程，每个 worker 最多一半线程用于事件流
+    event_stream_slots = threading.BoundedSemaphore(max(1, args.threads // 2))
+
+    def post_fork(server, worker):
+        # 轮询线程不能跨 fork 存活，每个 worker 启动自己的线程并先同步一次
+        catalog.refresh()
+        catalog.start_watching(CATALOG_POLL_INTERVAL)
+        event_feed.poll()
+        event_feed.start_watching(EVENT_POLL_INTERVAL)
+
+    class ProductionServer(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    ProductionServer({
+        'bind': f"{args.host}:{args.port}",
+        'workers': args.workers,
+        'worker_class': 'gthread',
+        'threads': args.threads,
+        'keepalive': args.keepalive,
+        'timeout': 60,
+        'graceful_timeout': args.graceful_timeout,
+        # 定期回收 worker，防止长期运行的内存增长
+        'max_requests': 10000,
+        'max_requests_jitter': 1000,
+        'preload_app': True,
+        'sendfile': True,
+        'accesslog': '-',
+        'post_fork': post_fork,
+    }).run()
+
+
 def main():
     """主函数"""
     import argparse
@@ -201,18 +630,29 @@ def main():
     parser.add_argument("--host", help="服务器地址", default="0.0.0.0")
     parser.add_argument("--port", help="服务器端口", type=int, default=8080)
     parser.add_argument("--debug", action="store_true", help="调试模式")
+    parser.add_argument("--production", action="store_true", help="生产模式（gunicorn 多进程）")
+    parser.add_argument("--workers", help="生产模式 worker 进程数", type=int, default=4)
+    parser.add_argument("--threads", help="生产模式每个 worker 的线程数", type=int, default=8)
+    parser.add_argument("--keepalive", help="生产模式 keep-alive 超时（秒）", type=int, default=5)
+    parser.add_argument("--graceful-timeout", help="生产模式平滑退出超时（秒）", type=int, default=30)
     args = parser.parse_args()
     
-    # 初始化
-    init_reporter(args.config, args.reports_dir)
+    # 初始化（生产模式下轮询线程在 worker fork 之后启动）
+    init_reporter(args.config, args.reports_dir, watch=not args.production)
     
     print(f"\n{'='*60}")
     print(f"🌐 金融报告 Web 服务器启动")
     print(f"{'='*60}")
     print(f"📍 访问地址：http://{args.host}:{args.port}")
     print(f"📂 报告目录：{reporter.reports_dir}")
+    if args.production:
+        print(f"⚙️  生产模式：{args.workers} 个 worker × {args.threads} 线程")
     print(f"{'='*60}\n")
     
+    if args.production:
+        run_production_server(args)
+        return
+    
     # 启动服务器
     app.run(
         host=args.host,